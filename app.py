@@ -1,28 +1,133 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Query
-from typing import List
-import tempfile, os
-
-from ocr_engine.vision_client import ocr_document_text
-from ocr_engine.pdf_render import render_pdf_pages_to_jpeg_bytes
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request, Header
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from pydantic import ValidationError
+from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import json
+import os
+import time
+
+import numpy as np
+
+from ocr_engine.ocr_pipeline import ocr_pages, ocr_page_stream
+from ocr_engine.ocr_cache import page_cache, doc_cache, content_key
+from ocr_engine.vision_client import get_client as get_vision_client, close_client as close_vision_client
+from ocr_engine.pdf_render import open_pdf, iter_pdf_pages, get_profile, preprocess_image_bytes, OCR_PROFILE
+from ocr_engine.raster_pool import iter_pdf_pages_pooled, shutdown_executor as shutdown_raster_pool, RASTER_WORKERS
 from ocr_engine.lease_parser import extract_lease_fields
 
 from ocr_engine.validators import find_required_fields, template_keyword_score
+from ocr_engine.text_index import TextIndex
 from ocr_engine.gms_llm import analyze_contract_text
 
 from reco_engine.schemas import (
     RecoRankExplainRequest,
     RecoRankExplainResponse,
+    RecoRankStreamHeader,
+    RecoRankByIdRequest,
+    RecoNearbyRequest,
+    RecoRankBatchRequest,
+    RecoRankBatchResponse,
     CandidateRankExplain,
     PropertyBrief,
 )
-from reco_engine.ranker import calc_breakdown, calc_score_0_100, judge_code
-from reco_engine.reco_llm import explain_rank_and_summary
+from reco_engine.ranker import judge_code
+from reco_engine.batch_ranker import build_columns, score_columns, breakdown_at, top_k, TopKCollector
+from reco_engine.reco_llm import explain_rank_and_summary, explain_batch, split_cached, iter_misses, GMS_KEY
+from reco_engine.reco_prompt import PROMPT_VERSION
+from reco_engine.explain_cache import explain_cache
+from reco_engine.feature_store import feature_store, load_catalog
+from reco_engine.geo import dist_column
+from reco_engine.price_series import effective_trend, series_features, features_at, series_memo
+
+from common import gms_http
+from common.job_queue import JobQueue, Job, JobFailed, QueueFull
+from common import metrics
+from common.metrics import (
+    STAGE_SECONDS,
+    HTTP_SECONDS,
+    HTTP_IN_FLIGHT,
+    CACHE_HIT_RATIO,
+    CACHE_ITEMS,
+    QUEUE_DEPTH,
+    GMS_REUSE_RATIO,
+)
 
 from fastapi.middleware.cors import CORSMiddleware
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Vision 클라이언트는 시작할 때 한 번만 만들고 종료 때 채널 정리
+    try:
+        get_vision_client()
+    except Exception:
+        # 자격증명이 아직 없으면 첫 OCR 요청 때 다시 시도
+        pass
+    # GMS(LLM) 호출은 keep-alive 커넥션 풀 하나를 같이 씀
+    gms_http.start_client()
+    # ID로 추천 요청하는 경로용 매물 카탈로그 (RECO_CATALOG_PATH 파일 + RECO_CATALOG_DB에 저장된 upsert)
+    load_catalog()
+    await extract_jobs.start()
+    yield
+    await extract_jobs.stop()
+    await gms_http.close_client()
+    close_vision_client()
+    shutdown_raster_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# /extract/jobs 작업 큐: 동시에 처리하는 작업 수 / 대기 작업 상한(넘으면 429) / 끝난 결과 보관 시간
+EXTRACT_JOB_WORKERS = int(os.getenv("EXTRACT_JOB_WORKERS", "2"))
+EXTRACT_JOB_MAX_PENDING = int(os.getenv("EXTRACT_JOB_MAX_PENDING", "16"))
+EXTRACT_JOB_TTL_SEC = int(os.getenv("EXTRACT_JOB_TTL_SEC", "900"))
+EXTRACT_JOB_RETRY_AFTER = int(os.getenv("EXTRACT_JOB_RETRY_AFTER", "5"))
+extract_jobs = JobQueue(EXTRACT_JOB_WORKERS, EXTRACT_JOB_MAX_PENDING, EXTRACT_JOB_TTL_SEC)
+
+# 업로드 파일 하나당 최대 크기 (넘으면 끝까지 읽지 않고 413)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(30 * 1024 * 1024)))
+_UPLOAD_CHUNK = 1024 * 1024
+
+
+async def _read_upload(f: UploadFile, limit: int = MAX_UPLOAD_BYTES) -> bytes:
+    buf = bytearray()
+    with STAGE_SECONDS.time(stage="upload_read"):
+        while True:
+            chunk = await f.read(_UPLOAD_CHUNK)
+            if not chunk:
+                break
+            buf += chunk
+            if len(buf) > limit:
+                raise HTTPException(status_code=413, detail=f"파일이 너무 큽니다 (최대 {limit / (1024 * 1024):g}MB)")
+    return bytes(buf)
+
+
+def _page_sources(sources: List[str]) -> dict:
+    # {"text_layer": [1, 2], "ocr": [3]} 처럼 경로별 페이지 번호(1부터)
+    out: dict = {}
+    for i, src in enumerate(sources):
+        out.setdefault(src, []).append(i + 1)
+    return out
+
+
+def _payload_meta(profile_name: str, stats: dict) -> dict:
+    # OCR로 보낸 페이지별 전처리 전/후 bytes (프로파일 비교용)
+    # bytes_before를 안 잰 페이지가 있으면 (OCR_MEASURE_BASELINE 꺼짐) 합계도 None
+    pages = [{"page": i + 1, **stats[i]} for i in sorted(stats)]
+    befores = [p["bytes_before"] for p in pages]
+    return {
+        "profile": profile_name,
+        "bytes_before": None if None in befores else sum(befores),
+        "bytes_after": sum(p["bytes_after"] for p in pages),
+        "pages": pages,
+    }
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,47 +137,164 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.post("/extract")
-async def extract(files: List[UploadFile] = File(...), llm: int = Query(0)):
-    if not files:
+
+@app.middleware("http")
+async def _http_metrics(request: Request, call_next):
+    # 라우트 경로 템플릿(/extract/jobs/{job_id}) 기준으로 모아서 라벨 수가 늘어나지 않게
+    status = 500
+    t = time.perf_counter()
+    with HTTP_IN_FLIGHT.track():
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_SECONDS.observe(
+                time.perf_counter() - t,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+
+@metrics.register_collector
+def _collect_app_stats():
+    caches = (("ocr_page", page_cache), ("ocr_doc", doc_cache), ("reco_explain", explain_cache), ("reco_series", series_memo))
+    for name, cache in caches:
+        st = cache.stats()
+        CACHE_HIT_RATIO.set(st["hit_ratio"], cache=name)
+        CACHE_ITEMS.set(st.get("mem_items", st.get("items", 0)), cache=name)
+    js = extract_jobs.stats()
+    QUEUE_DEPTH.set(js["pending"], queue="extract_jobs", state="pending")
+    QUEUE_DEPTH.set(js["running"], queue="extract_jobs", state="running")
+    gs = gms_http.stats()
+    GMS_REUSE_RATIO.set(gs["reuse_ratio"])
+    QUEUE_DEPTH.set(gs["limiter"]["waiting"], queue="gms", state="pending")
+    QUEUE_DEPTH.set(gs["limiter"]["in_flight"], queue="gms", state="running")
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _extract_plan(filenames: List[str], profile: Optional[str]) -> dict:
+    """
+    업로드 파일 이름/프로파일만 보고 요청 형식 검증 (bytes 읽기 전에 400).
+    반환: {"kind": "pdf"|"images", "prof", "profile_name"}
+    """
+    if not filenames:
         raise HTTPException(status_code=400, detail="파일이 필요합니다.")
 
-    pdfs = [f for f in files if (f.filename or "").lower().endswith(".pdf")]
-    imgs = [f for f in files if not (f.filename or "").lower().endswith(".pdf")]
+    # OCR 전처리 프로파일 (없으면 OCR_PROFILE 기본값)
+    try:
+        prof = get_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    n_pdf = sum(1 for name in filenames if (name or "").lower().endswith(".pdf"))
+    if n_pdf:
+        if n_pdf != 1 or len(filenames) != 1:
+            raise HTTPException(status_code=400, detail="PDF는 1개만, 이미지와 동시 업로드 불가")
+        kind = "pdf"
+    else:
+        if len(filenames) > 2:
+            raise HTTPException(status_code=400, detail="이미지는 최대 2장까지 업로드 가능")
+        kind = "images"
+    return {"kind": kind, "prof": prof, "profile_name": profile or OCR_PROFILE}
+
+
+async def _run_extract(plan: dict, contents: List[bytes], llm: int, text_layer: int, job: Optional[Job] = None) -> dict:
+    """
+    업로드 bytes → 렌더링/OCR → 필드 추출/검증 → (llm=1이면) LLM 분석.
+    /extract와 작업 큐(/extract/jobs)가 같이 사용. job이 있으면 단계별 진행 상황을 기록.
+    """
+    report = job.update if job is not None else (lambda stage=None, **progress: None)
+    prof, profile_name = plan["prof"], plan["profile_name"]
+    payload_stats = {}
 
     full_text = ""
     meta = {}
 
-    if pdfs:
-        if len(pdfs) != 1 or imgs:
-            raise HTTPException(status_code=400, detail="PDF는 1개만, 이미지와 동시 업로드 불가")
-        pdf = pdfs[0]
-        content = await pdf.read()
+    pages_done = 0
+
+    def _page_done(i: int):
+        nonlocal pages_done
+        pages_done += 1
+        report(pages_done=pages_done)
+
+    if plan["kind"] == "pdf":
+        content = contents[0]
+
+        doc_key = content_key([content], kind="pdf", zoom=2.0, llm=llm, text_layer=text_layer, profile=profile_name)
+        cached = await doc_cache.aget_json(doc_key)
+        if cached is not None:
+            return {**cached, "cache": "hit"}
 
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+        # 임시파일 없이 메모리 bytes로 바로 열고, 페이지 수 제한은 렌더링 전에 확인
         try:
-            tmp.write(content); tmp.close()
-            page_bytes_list = render_pdf_pages_to_jpeg_bytes(tmp.name, zoom=2.0)
-            for page_bytes in page_bytes_list:
-                full_text += "\n" + ocr_document_text(page_bytes)
-            meta = {"pages": len(page_bytes_list)}
+            doc = open_pdf(content)
+        except ValueError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception:
+            raise HTTPException(status_code=400, detail="PDF를 열 수 없습니다.")
+
+        try:
+            report("ocr", pages_total=doc.page_count, pages_done=0)
+            # 페이지를 하나씩 렌더링하면서 바로 OCR 단계로 넘김
+            # (텍스트 레이어가 있는 페이지는 렌더링/OCR 없이 텍스트 그대로,
+            #  워커가 여러 개면 렌더링을 풀에 나눠서 끝나는 페이지부터 OCR로)
+            page_opts = dict(zoom=2.0, text_layer=text_layer == 1, profile=prof, stats=payload_stats)
+            if RASTER_WORKERS > 1:
+                pages = iter_pdf_pages_pooled(content, doc, **page_opts)
+            else:
+                pages = iter_pdf_pages(doc, **page_opts)
+            with STAGE_SECONDS.time(stage="ocr_document"):
+                ocr = await ocr_page_stream(pages, cache_params={"zoom": 2.0, "profile": profile_name}, on_page=_page_done)
         finally:
-            try: os.remove(tmp.name)
-            except: pass
+            doc.close()
+        meta = {"pages": len(ocr["texts"]), "page_sources": _page_sources(ocr["sources"])}
 
     else:
-        if len(imgs) > 2:
-            raise HTTPException(status_code=400, detail="이미지는 최대 2장까지 업로드 가능")
-        for img in imgs:
-            b = await img.read()
-            full_text += "\n" + ocr_document_text(b)
-        meta = {"images": len(imgs)}
-
-    extracted = extract_lease_fields(full_text)
+        img_bytes_list = contents
+
+        doc_key = content_key(img_bytes_list, kind="images", llm=llm, profile=profile_name)
+        cached = await doc_cache.aget_json(doc_key)
+        if cached is not None:
+            return {**cached, "cache": "hit"}
+
+        report("ocr", pages_total=len(img_bytes_list), pages_done=0)
+        sent = []
+        with STAGE_SECONDS.time(stage="image_preprocess"):
+            for i, b in enumerate(img_bytes_list):
+                out, payload_stats[i] = await asyncio.to_thread(preprocess_image_bytes, b, prof)
+                sent.append(out)
+        with STAGE_SECONDS.time(stage="ocr_document"):
+            ocr = await ocr_pages(sent, cache_params={"src": "image", "profile": profile_name}, on_page=_page_done)
+        meta = {"images": len(img_bytes_list)}
+
+    meta["payload"] = _payload_meta(profile_name, payload_stats)
+
+    # 일부 페이지 OCR 실패는 결과에 표시만 하고 나머지 페이지로 계속 진행
+    if ocr["errors"]:
+        if len(ocr["errors"]) == len(ocr["texts"]):
+            raise HTTPException(status_code=502, detail=f"OCR 실패: {ocr['errors'][0]['error']}")
+        meta["ocr_errors"] = ocr["errors"]
+
+    for text in ocr["texts"]:
+        full_text += "\n" + text
+
+    report("parse")
+    # 텍스트는 한 번만 쪼개서 인덱스로 만들고 추출/검증이 같이 사용
+    with STAGE_SECONDS.time(stage="text_index"):
+        idx = TextIndex(full_text)
+    with STAGE_SECONDS.time(stage="extract_fields"):
+        extracted = extract_lease_fields(idx)
 
     # --- analysis (flags) ---
-    req = find_required_fields(full_text)
-    tpl = template_keyword_score(full_text)
+    with STAGE_SECONDS.time(stage="validators"):
+        req = find_required_fields(idx)
+        tpl = template_keyword_score(idx)
 
     flags = []
     if req["missing_fields"] or req["present_but_blank"]:
@@ -89,120 +311,645 @@ async def extract(files: List[UploadFile] = File(...), llm: int = Query(0)):
     }
 
     if llm == 1:
-        analysis["llm"] = await analyze_contract_text(full_text)
+        report("llm")
+        # 페이지 경계로 나눠서 문서 전체를 분석 (길면 여러 조각 동시 호출)
+        with STAGE_SECONDS.time(stage="contract_llm"):
+            analysis["llm"] = await analyze_contract_text(full_text, pages=ocr["texts"])
 
-    return {"status": "ok", **meta, "extracted": extracted, "analysis": analysis}
+    out = {"status": "ok", **meta, "extracted": extracted, "analysis": analysis}
+    # 일부 페이지라도 OCR 실패했거나 LLM 분석이 (일부라도) 실패한 결과는 재시도 때 다시 돌도록 캐시하지 않음
+    # (캐시 TTL이 길어서 일시적인 GMS 오류 결과를 며칠씩 돌려주게 됨)
+    if not ocr["errors"] and not _llm_degraded(analysis.get("llm")):
+        await doc_cache.aset_json(doc_key, out)
+    return out
 
-@app.post("/reco/rank-explain", response_model=RecoRankExplainResponse)
-async def reco_rank_explain(req: RecoRankExplainRequest):
-    base = req.base
-    cands = req.candidates or []
 
-    if not cands:
-        return {"status": "ok", "model": None, "results": []}
+def _llm_degraded(llm_out: Optional[dict]) -> bool:
+    # llm=0이면 None (정상). 비활성/오류/조각 일부 실패면 True
+    if llm_out is None:
+        return False
+    return not llm_out.get("enabled") or bool(llm_out.get("error")) or bool(llm_out.get("chunk_errors"))
 
-    # 1) 정량 점수 계산
-    enriched = []
-    for c in cands:
-        bd = calc_breakdown(base, c)
-        score = calc_score_0_100(bd)
-        jc = judge_code(score)
-
-        enriched.append({
-            "propertyId": c.propertyId,
-            "score": score,
-            "judgeCode": jc,
-            "breakdown": bd,
-            "aptName": c.aptName,
-            "rating": c.rating,
-            "trend": c.trend,
-            "price": c.price,
-            "deposit": c.deposit,
-            "area": c.area,
-            "distM": c.distM,
-        })
-
-    # 2) topK만 LLM 설명 생성(비용 절약)
-    enriched_sorted = sorted(enriched, key=lambda x: x["score"], reverse=True)[: req.topK]
-
-    # LLM 입력 payload(설명에 필요한 것만)
-    payload = {
-        "base": base.model_dump(),
-        "candidates": enriched_sorted,
-        "maxReasons": req.maxReasons,
-        "mode": req.mode,
+
+@app.post("/extract")
+async def extract(
+    files: List[UploadFile] = File(...),
+    llm: int = Query(0),
+    text_layer: int = Query(1),
+    profile: Optional[str] = Query(None),
+):
+    plan = _extract_plan([f.filename or "" for f in files or []], profile)
+    contents = [await _read_upload(f) for f in files]
+    return await _run_extract(plan, contents, llm, text_layer)
+
+
+@app.post("/extract/jobs", status_code=202)
+async def submit_extract_job(
+    files: List[UploadFile] = File(...),
+    llm: int = Query(0),
+    text_layer: int = Query(1),
+    profile: Optional[str] = Query(None),
+):
+    """
+    /extract와 같은 입력을 작업 큐에 넣고 바로 jobId 반환.
+    상태는 GET /extract/jobs/{jobId}, 결과는 GET /extract/jobs/{jobId}/result.
+    대기 작업이 EXTRACT_JOB_MAX_PENDING개 차 있으면 429.
+    """
+    plan = _extract_plan([f.filename or "" for f in files or []], profile)
+    contents = [await _read_upload(f) for f in files]
+
+    async def _job(job: Job) -> dict:
+        try:
+            return await _run_extract(plan, contents, llm, text_layer, job=job)
+        except HTTPException as e:
+            raise JobFailed(e.status_code, e.detail)
+
+    try:
+        job = extract_jobs.submit(_job)
+    except QueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail="처리 대기 중인 작업이 많습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(EXTRACT_JOB_RETRY_AFTER)},
+        )
+    return {**job.to_status(), "position": extract_jobs.position(job)}
+
+
+def _get_job(job_id: str) -> Job:
+    job = extract_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업이 없거나 만료되었습니다.")
+    return job
+
+
+@app.get("/extract/jobs/{job_id}")
+async def extract_job_status(job_id: str):
+    job = _get_job(job_id)
+    return {**job.to_status(), "position": extract_jobs.position(job)}
+
+
+@app.get("/extract/jobs/{job_id}/result")
+async def extract_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status == "error":
+        raise HTTPException(status_code=job.error["status_code"], detail=job.error["detail"])
+    if job.status != "done":
+        # 아직 처리 중이면 상태만 (202)
+        return JSONResponse(status_code=202, content={**job.to_status(), "position": extract_jobs.position(job)})
+    return job.result
+
+
+@app.get("/extract/jobs-stats")
+async def extract_jobs_stats():
+    return extract_jobs.stats()
+
+
+@app.get("/ocr/cache-stats")
+async def ocr_cache_stats():
+    return {"page": page_cache.stats(), "doc": doc_cache.stats()}
+
+
+@app.get("/gms/pool-stats")
+async def gms_pool_stats():
+    return gms_http.stats()
+
+
+@app.get("/reco/explain-cache-stats")
+async def reco_explain_cache_stats():
+    return explain_cache.stats()
+
+
+# 카탈로그 upsert용 관리자 토큰 (X-Admin-Token 헤더). 비어 있으면 upsert 엔드포인트를 막음
+RECO_ADMIN_TOKEN = os.getenv("RECO_ADMIN_TOKEN", "")
+
+
+async def _sync_catalog() -> None:
+    # 다른 워커가 RECO_CATALOG_DB에 저장한 upsert 반영 (RECO_CATALOG_SYNC_SEC마다, DB 조회는 스레드에서)
+    if feature_store.sync_due():
+        await asyncio.to_thread(feature_store.sync)
+
+
+@app.get("/reco/catalog-stats")
+async def reco_catalog_stats():
+    await _sync_catalog()
+    return feature_store.stats()
+
+
+@app.post("/reco/catalog/upsert")
+async def reco_catalog_upsert(items: List[PropertyBrief], x_admin_token: Optional[str] = Header(default=None)):
+    """
+    매물 추가/변경분만 보내면 됨 (propertyId 기준으로 덮어씀). RECO_ADMIN_TOKEN이 있어야 열림.
+    RECO_CATALOG_DB가 있으면 거기 저장돼서 다른 워커/재시작 뒤에도 보이고,
+    없으면 요청을 받은 워커 메모리에만 반영됨 (워커 1개일 때만 쓸 것).
+    """
+    if not RECO_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="카탈로그 upsert가 꺼져 있습니다 (RECO_ADMIN_TOKEN 미설정)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), RECO_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="관리자 토큰이 맞지 않습니다")
+    return await asyncio.to_thread(feature_store.upsert_shared, items)
+
+
+def _enriched_item(c: PropertyBrief, score: float, breakdown: dict) -> dict:
+    item = {
+        "propertyId": c.propertyId,
+        "score": score,
+        "judgeCode": judge_code(score),
+        "breakdown": breakdown,
+        "aptName": c.aptName,
+        "rating": c.rating,
+        # 점수 계산에 쓴 trend (series가 있으면 거기서 계산한 값)
+        "trend": effective_trend(c),
+        "price": c.price,
+        "deposit": c.deposit,
+        "area": c.area,
+        "distM": c.distM,
     }
+    if c.recentPriceSeries:
+        # series 원본 대신 요약 숫자 몇 개만 (점수 계산 때 메모에 들어가 있어서 다시 계산 안 함)
+        f = features_at(series_features([c.recentPriceSeries]), 0)
+        item.update({"seriesN": f["n"], "slopePct": f["slopePct"], "volPct": f["volPct"], "recentChgPct": f["recentChgPct"]})
+    return item
 
-    llm_out = await explain_rank_and_summary(payload)
 
-    # 3) LLM 비활성/실패 시: 기본 템플릿 설명으로 fallback
-    if not llm_out.get("enabled"):
-        results = []
-        for item in enriched_sorted:
-            pid = item["propertyId"]
-            results.append({
-                "propertyId": pid,
-                "score": item["score"],
-                "judgeCode": item["judgeCode"],
-                "summary": "기준 매물과 조건이 비교적 유사해 보일 수 있어요.",
-                "reasons": [
-                    f"거리/가격/면적/평점/추세를 종합한 점수가 {item['score']}점이에요.",
-                    f"평점은 {item.get('rating')}점, 거래 추세는 {item.get('trend')}로 분석됐어요.",
-                ][: req.maxReasons],
-                "breakdown": item["breakdown"],
-            })
-        return {"status": "ok", "model": None, "results": results, "error": llm_out.get("error")}
+def _fallback_result(item: dict, max_reasons: int) -> dict:
+    # LLM 비활성/실패 시 기본 템플릿 설명
+    return {
+        "propertyId": item["propertyId"],
+        "score": item["score"],
+        "judgeCode": item["judgeCode"],
+        "summary": "기준 매물과 조건이 비교적 유사해 보일 수 있어요.",
+        "reasons": [
+            f"거리/가격/면적/평점/추세를 종합한 점수가 {item['score']}점이에요.",
+            f"평점은 {item.get('rating')}점, 거래 추세는 {item.get('trend')}로 분석됐어요.",
+        ][: max_reasons],
+        "breakdown": item["breakdown"],
+    }
+
+
+def _merge_llm_result(item: dict, lr: dict, max_reasons: int) -> dict:
+    # LLM 키 이름(aiSummary/aiReasons/aiJudgeCode/aiScore)로 읽기
+    summary = str(lr.get("aiSummary") or "").strip()
+    reasons = lr.get("aiReasons") or []
+    reasons = [str(x).strip() for x in reasons if str(x).strip()]
+
+    # judgeCode / score도 LLM이 덮어쓰게 할지 선택 가능
+    jc = str(lr.get("aiJudgeCode") or item["judgeCode"]).strip() or item["judgeCode"]
+    ai_score = lr.get("aiScore")
+    try:
+        ai_score = float(ai_score) if ai_score is not None else None
+    except:
+        ai_score = None
+
+    if not summary:
+        summary = "두집이가 보기엔, 기준 매물과 조건이 꽤 비슷한 편이라 한 번 같이 비교해볼 만해요."
+
+    # reasons가 너무 짧으면 정량정보 기반으로 보강
+    if len(reasons) < 4:
+        reasons = reasons + [
+            f"거리·가격·면적·후기·거래흐름을 합쳐서 {item['score']}점으로 나왔어요.",
+            f"후기 평점은 {item.get('rating')}점, 최근 거래 흐름은 {item.get('trend')}로 보여요.",
+            "조건이 비슷해도 세대/층/단지 분위기에 따라 체감이 달라질 수 있으니 현장도 같이 확인해보면 좋아요.",
+        ]
+    reasons = reasons[: max_reasons]  # max_reasons가 3이면 3개로 잘림 (원하면 5로 올려)
 
-        # 4) LLM 결과 매핑 (propertyId 기준으로 합치기)
-    llm_results = llm_out.get("results") or []
-    llm_map = {
+    return {
+        "propertyId": item["propertyId"],
+        "score": ai_score if ai_score is not None else item["score"],  # LLM 점수 쓰고 싶으면
+        "judgeCode": jc,
+        "summary": summary,
+        "reasons": reasons,
+        "breakdown": item["breakdown"],
+    }
+
+
+def _llm_map(llm_results: List[dict]) -> dict:
+    # LLM 결과 매핑 (propertyId 기준으로 합치기)
+    return {
         int(x.get("propertyId")): x
         for x in llm_results
         if str(x.get("propertyId", "")).isdigit()
     }
 
-    final = []
-    for item in enriched_sorted:
-        pid = item["propertyId"]
-        lr = llm_map.get(pid, {})
 
-        # LLM 키 이름(aiSummary/aiReasons/aiJudgeCode/aiScore)로 읽기
-        summary = str(lr.get("aiSummary") or "").strip()
-        reasons = lr.get("aiReasons") or []
-        reasons = [str(x).strip() for x in reasons if str(x).strip()]
+def _explain_payload(base: PropertyBrief, enriched_sorted: List[dict], max_reasons: int, mode: str) -> dict:
+    # LLM 입력 payload(설명에 필요한 것만, 좌표는 거리 계산용이라 뺌)
+    return {
+        "base": base.model_dump(exclude={"lat", "lng"}),
+        "candidates": enriched_sorted,
+        "maxReasons": max_reasons,
+        "mode": mode,
+    }
+
 
-        # judgeCode / score도 LLM이 덮어쓰게 할지 선택 가능
-        jc = str(lr.get("aiJudgeCode") or item["judgeCode"]).strip() or item["judgeCode"]
-        ai_score = lr.get("aiScore")
+async def _explain_ranked(base: PropertyBrief, enriched_sorted: List[dict], max_reasons: int, mode: str) -> dict:
+    with STAGE_SECONDS.time(stage="reco_explain"):
         try:
-            ai_score = float(ai_score) if ai_score is not None else None
-        except:
-            ai_score = None
-
-        if not summary:
-            summary = "두집이가 보기엔, 기준 매물과 조건이 꽤 비슷한 편이라 한 번 같이 비교해볼 만해요."
-
-        # reasons가 너무 짧으면 정량정보 기반으로 보강
-        if len(reasons) < 4:
-            reasons = reasons + [
-                f"거리·가격·면적·후기·거래흐름을 합쳐서 {item['score']}점으로 나왔어요.",
-                f"후기 평점은 {item.get('rating')}점, 최근 거래 흐름은 {item.get('trend')}로 보여요.",
-                "조건이 비슷해도 세대/층/단지 분위기에 따라 체감이 달라질 수 있으니 현장도 같이 확인해보면 좋아요.",
-            ]
-        reasons = reasons[: req.maxReasons]  # req.maxReasons가 3이면 3개로 잘림 (원하면 5로 올려)
-
-        final.append({
-            "propertyId": pid,
-            "score": ai_score if ai_score is not None else item["score"],  # LLM 점수 쓰고 싶으면
-            "judgeCode": jc,
-            "summary": summary,
-            "reasons": reasons,
-            "breakdown": item["breakdown"],
-        })
+            llm_out = await explain_rank_and_summary(_explain_payload(base, enriched_sorted, max_reasons, mode))
+        except gms_http.GMS_CALL_ERRORS as e:
+            # LLM 호출 실패가 500으로 새지 않게 (점수는 이미 있으니 템플릿 설명으로)
+            llm_out = {"enabled": False, "error": f"{type(e).__name__}: {e}"}
+    return _finish_ranked(enriched_sorted, llm_out, max_reasons)
+
+
+def _finish_ranked(enriched_sorted: List[dict], llm_out: dict, max_reasons: int) -> dict:
+    # 3) LLM 비활성/실패 시: 기본 템플릿 설명으로 fallback
+    if not llm_out.get("enabled"):
+        results = [_fallback_result(item, max_reasons) for item in enriched_sorted]
+        return {"status": "ok", "model": None, "results": results, "error": llm_out.get("error")}
+
+    # 4) LLM 결과 매핑 (propertyId 기준으로 합치기)
+    llm_map = _llm_map(llm_out.get("results") or [])
+    final = [_merge_llm_result(item, llm_map.get(item["propertyId"], {}), max_reasons) for item in enriched_sorted]
 
     return {
         "status": "ok",
         "model": llm_out.get("prompt_version"),
         "results": final,
         "error": None,
-    }
\ No newline at end of file
+        "promptTokens": (llm_out.get("prompt") or {}).get("tokens"),
+    }
+
+
+def _rank_enriched(req: RecoRankExplainRequest) -> List[dict]:
+    # 정량 점수 계산 (후보 전체를 컬럼으로 바꿔서 한 번에) → topK만 골라서(전체 정렬 없이) 결과 객체 생성
+    cands = req.candidates
+    with STAGE_SECONDS.time(stage="reco_score"):
+        scored = score_columns(req.base, build_columns(cands))
+        order = top_k(scored["score"], req.topK)
+    return [
+        _enriched_item(cands[i], float(scored["score"][i]), breakdown_at(scored, i))
+        for i in order
+    ]
+
+
+@app.post("/reco/rank-explain", response_model=RecoRankExplainResponse)
+async def reco_rank_explain(req: RecoRankExplainRequest):
+    base = req.base
+    cands = req.candidates or []
+
+    if not cands:
+        return {"status": "ok", "model": None, "results": []}
+
+    # 1) 정량 점수 계산 2) topK만 LLM 설명(비용 절약)
+    enriched_sorted = _rank_enriched(req)
+    return await _explain_ranked(base, enriched_sorted, req.maxReasons, req.mode)
+
+
+# 주변 추천에서 radiusM/k를 안 주면 쓰는 반경(m)
+RECO_NEARBY_DEFAULT_RADIUS_M = float(os.getenv("RECO_NEARBY_DEFAULT_RADIUS_M", "2000"))
+
+
+def _rank_catalog_rows(base: PropertyBrief, rows, top_k_n: int, dist=None) -> List[dict]:
+    # 카탈로그 행들을 컬럼 그대로 점수 계산 → topK만 PropertyBrief로 꺼내서 결과 객체 생성
+    with STAGE_SECONDS.time(stage="reco_score"):
+        cols = feature_store.columns(rows, base, dist)
+        scored = score_columns(base, cols)
+        order = top_k(scored["score"], top_k_n)
+    base_has_coords = base.lat is not None and base.lng is not None
+    enriched_sorted = []
+    for i in order:
+        c = feature_store.get_at(int(rows[i]))
+        # 좌표가 없어서 99999m로 계산한 경우는 distM 없음으로 표시
+        has_coords = base_has_coords and c.lat is not None and c.lng is not None
+        c = c.model_copy(update={"distM": float(cols["dist"][i]) if has_coords else None})
+        enriched_sorted.append(_enriched_item(c, float(scored["score"][i]), breakdown_at(scored, i)))
+    return enriched_sorted
+
+
+def _catalog_base(base_id: int) -> PropertyBrief:
+    base = feature_store.get(base_id)
+    if base is None:
+        raise HTTPException(status_code=404, detail=f"카탈로그에 기준 매물이 없습니다: {base_id}")
+    return base
+
+
+@app.post("/reco/rank-explain/by-id", response_model=RecoRankExplainResponse)
+async def reco_rank_explain_by_id(req: RecoRankByIdRequest):
+    """
+    /reco/rank-explain과 같은 결과를 매물 ID만으로. 매물 정보는 카탈로그(feature_store)에서 꺼내고
+    distM 대신 카탈로그 좌표(lat/lng)로 거리를 계산함. 카탈로그에 없는 후보는 빼고 missingIds로 알려줌.
+    """
+    await _sync_catalog()
+    base = _catalog_base(req.baseId)
+    rows, missing = feature_store.rows(req.candidateIds)
+    if not len(rows):
+        return {"status": "ok", "model": None, "results": [], "missingIds": missing}
+
+    enriched_sorted = _rank_catalog_rows(base, rows, req.topK)
+    out = await _explain_ranked(base, enriched_sorted, req.maxReasons, req.mode)
+    out["missingIds"] = missing
+    return out
+
+
+@app.post("/reco/rank-explain/nearby", response_model=RecoRankExplainResponse)
+async def reco_rank_explain_nearby(req: RecoNearbyRequest):
+    """
+    후보 목록 없이 기준 매물 ID만 받아서, 카탈로그 격자 인덱스로 주변 매물(radiusM 안 / 가까운 k개)을 찾고
+    찾은 후보 전체를 점수 계산 → topK 설명. radiusM/k 둘 다 없으면 RECO_NEARBY_DEFAULT_RADIUS_M 반경.
+    """
+    await _sync_catalog()
+    base = _catalog_base(req.baseId)
+    if base.lat is None or base.lng is None:
+        raise HTTPException(status_code=400, detail=f"기준 매물 좌표(lat/lng)가 없어 주변 검색을 할 수 없습니다: {req.baseId}")
+
+    radius = req.radiusM if req.radiusM is not None or req.k is not None else RECO_NEARBY_DEFAULT_RADIUS_M
+    with STAGE_SECONDS.time(stage="reco_retrieve"):
+        rows, dist = feature_store.nearby(base.lat, base.lng, radius, req.k, exclude_pid=base.propertyId)
+    if not len(rows):
+        return {"status": "ok", "model": None, "results": [], "candidateCount": 0}
+
+    enriched_sorted = _rank_catalog_rows(base, rows, req.topK, dist)
+    out = await _explain_ranked(base, enriched_sorted, req.maxReasons, req.mode)
+    out["candidateCount"] = int(len(rows))
+    return out
+
+
+def _pool_columns(pool: List[PropertyBrief]) -> dict:
+    # 공유 후보 풀: 컬럼 변환(문자열 가격 파싱, series trend)은 한 번만, 좌표도 배열로 같이
+    cols = build_columns(pool)
+    cols["lat"] = np.array([np.nan if c.lat is None else c.lat for c in pool], dtype=np.float64)
+    cols["lng"] = np.array([np.nan if c.lng is None else c.lng for c in pool], dtype=np.float64)
+    return cols
+
+
+def _rank_pool(base: PropertyBrief, pool: List[PropertyBrief], cols: dict, top_k_n: int) -> List[dict]:
+    """
+    공유 풀을 기준 매물 하나에 대해 점수 계산 → topK. 기준 매물 자신은 뺌.
+    기준 매물과 후보 둘 다 좌표가 있으면 그 거리로, 아니면 후보의 distM으로 계산.
+    """
+    dist = cols["dist"]
+    by_coords = None
+    if base.lat is not None and base.lng is not None:
+        by_coords = ~(np.isnan(cols["lat"]) | np.isnan(cols["lng"]))
+        dist = np.where(by_coords, dist_column(base.lat, base.lng, cols["lat"], cols["lng"]), dist)
+    scored = score_columns(base, {**cols, "dist": dist})
+    order = [i for i in top_k(scored["score"], top_k_n + 1) if pool[i].propertyId != base.propertyId][:top_k_n]
+
+    enriched_sorted = []
+    for i in order:
+        c = pool[i]
+        if by_coords is not None and by_coords[i]:
+            c = c.model_copy(update={"distM": float(dist[i])})
+        enriched_sorted.append(_enriched_item(c, float(scored["score"][i]), breakdown_at(scored, i)))
+    return enriched_sorted
+
+
+@app.post("/reco/rank-explain/batch", response_model=RecoRankBatchResponse)
+async def reco_rank_explain_batch(req: RecoRankBatchRequest):
+    """
+    기준 매물 여러 개를 한 번에. 후보 목록이 없는 항목은 요청의 공유 후보 풀로 점수 계산하고
+    (풀 컬럼 변환은 한 번), 모든 기준 매물의 topK 설명을 LLM 호출 몇 개로 묶어서 받음
+    (호출 수는 RECO_BATCH_MAX_CALLS 이하, 호출당 RECO_BATCH_TOKEN_BUDGET 토큰 안쪽).
+    결과는 item.key(없으면 base.propertyId) → 단건 /reco/rank-explain과 같은 모양.
+    """
+    keys = [it.key or str(it.base.propertyId) for it in req.items]
+    dup = sorted({k for k in keys if keys.count(k) > 1})
+    if dup:
+        raise HTTPException(status_code=400, detail=f"기준 매물 키가 중복됩니다: {dup} (key로 구분해 주세요)")
+    pool = req.candidates or []
+    no_cands = [k for k, it in zip(keys, req.items) if it.candidates is None and not pool]
+    if no_cands:
+        raise HTTPException(status_code=400, detail=f"후보 목록도 공유 후보 풀(candidates)도 없습니다: {no_cands}")
+
+    # 1) 정량 점수 (공유 풀은 컬럼 한 번 만들고 기준 매물마다 점수만)
+    pool_cols = None
+    ranked: List[List[dict]] = []
+    for it in req.items:
+        if it.candidates is not None:
+            ranked.append(_rank_enriched(it) if it.candidates else [])
+            continue
+        with STAGE_SECONDS.time(stage="reco_score"):
+            if pool_cols is None:
+                pool_cols = _pool_columns(pool)
+            ranked.append(_rank_pool(it.base, pool, pool_cols, it.topK))
+
+    # 2) 후보가 남은 기준 매물만 모아서 LLM 호출 몇 개로
+    todo = [i for i, enriched in enumerate(ranked) if enriched]
+    payloads = [_explain_payload(req.items[i].base, ranked[i], req.items[i].maxReasons, req.items[i].mode) for i in todo]
+    with STAGE_SECONDS.time(stage="reco_explain"):
+        llm_outs, stats = await explain_batch(payloads)
+    llm_by_item = dict(zip(todo, llm_outs))
+
+    results = {}
+    for i, (key, it) in enumerate(zip(keys, req.items)):
+        if not ranked[i]:
+            results[key] = {"status": "ok", "model": None, "results": []}
+            continue
+        results[key] = _finish_ranked(ranked[i], llm_by_item[i], it.maxReasons)
+        if it.candidates is None:
+            results[key]["candidateCount"] = int(np.count_nonzero(pool_cols["propertyId"] != it.base.propertyId))
+    return {"status": "ok", "results": results, "llmCalls": stats["calls"]}
+
+
+# 스트리밍 응답에서 LLM 설명을 기다리는 최대 시간 (넘으면 남은 후보는 템플릿 설명)
+RECO_STREAM_EXPLAIN_TIMEOUT = float(os.getenv("RECO_STREAM_EXPLAIN_TIMEOUT", "20"))
+
+
+def _ndjson_line(obj: dict) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _stream_ranked(base: PropertyBrief, enriched_sorted: List[dict], max_reasons: int, mode: str):
+    """
+    2단계 NDJSON 스트림:
+      {"type": "scores", "results": [...]}   점수/judgeCode/breakdown (바로 전송)
+      {"type": "explain", "result": {...}}   후보별 설명 (캐시 hit 먼저, 나머지는 LLM 출력에서 하나씩 완성되는 대로)
+      {"type": "done", "model": ..., "error": ...}
+    LLM 비활성/실패/타임아웃이면 남은 후보는 기본 템플릿 설명으로 채움.
+    """
+    yield _ndjson_line({
+        "type": "scores",
+        "results": [
+            {k: item[k] for k in ("propertyId", "score", "judgeCode", "breakdown")}
+            for item in enriched_sorted
+        ],
+    })
+
+    if not GMS_KEY:
+        for item in enriched_sorted:
+            yield _ndjson_line({"type": "explain", "result": _fallback_result(item, max_reasons)})
+        yield _ndjson_line({"type": "done", "model": None, "error": "GMS_KEY not set"})
+        return
+
+    payload = _explain_payload(base, enriched_sorted, max_reasons, mode)
+    keys, cached, misses = split_cached(payload)
+    info: dict = {}
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _pump():
+        # LLM 스트림에서 설명이 하나 완성될 때마다 큐로 넘김 (None = 끝)
+        try:
+            if misses:
+                async for lr in iter_misses(payload, keys, misses, info):
+                    queue.put_nowait(lr)
+        except Exception as e:
+            info["failed"] = str(e)
+        finally:
+            queue.put_nowait(None)
+
+    # 캐시 hit 후보를 보내는 동안 LLM 호출은 먼저 시작
+    task = asyncio.create_task(_pump())
+    try:
+        by_pid = {item["propertyId"]: item for item in enriched_sorted}
+        for item in enriched_sorted:
+            lr = cached.get(item["propertyId"])
+            if lr is not None:
+                yield _ndjson_line({"type": "explain", "result": _merge_llm_result(item, lr, max_reasons)})
+
+        pending = {c["propertyId"] for c in misses}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RECO_STREAM_EXPLAIN_TIMEOUT
+        error = None
+        while pending:
+            try:
+                lr = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                error = "LLM timeout"
+                break
+            if lr is None:
+                # 스트림이 중간에 끊긴 경우(info["error"])도 실패로 봄
+                error = info.get("failed") or info.get("error")
+                break
+            pid = lr["propertyId"]
+            if pid in pending:
+                pending.discard(pid)
+                yield _ndjson_line({"type": "explain", "result": _merge_llm_result(by_pid[pid], lr, max_reasons)})
+
+        # 남은 후보: LLM이 정상 종료했는데 빠뜨린 건 기존 보강 문구, 실패/타임아웃이면 템플릿 설명
+        for c in misses:
+            item = by_pid[c["propertyId"]]
+            if item["propertyId"] not in pending:
+                continue
+            result = _merge_llm_result(item, {}, max_reasons) if error is None else _fallback_result(item, max_reasons)
+            yield _ndjson_line({"type": "explain", "result": result})
+        model = PROMPT_VERSION if error is None else None
+        prompt = info.get("prompt") or {}
+        yield _ndjson_line({"type": "done", "model": model, "error": error, "promptTokens": prompt.get("tokens")})
+    finally:
+        # 클라이언트가 끊었거나 타임아웃이면 LLM 호출도 정리
+        if not task.done():
+            task.cancel()
+
+
+@app.post("/reco/rank-explain/stream")
+async def reco_rank_explain_stream(req: RecoRankExplainRequest):
+    """
+    /reco/rank-explain과 같은 요청, 응답만 NDJSON 스트림(application/x-ndjson).
+    정량 점수는 바로 보내고 LLM 설명은 준비되는 대로 후보별로 이어서 보냄.
+    """
+    enriched_sorted = _rank_enriched(req) if req.candidates else []
+    return StreamingResponse(
+        _stream_ranked(req.base, enriched_sorted, req.maxReasons, req.mode),
+        media_type="application/x-ndjson",
+    )
+
+
+# NDJSON 요청에서 몇 줄씩 모아서 점수 계산할지
+_NDJSON_CHUNK = 2048
+
+# 점수 계산(build_columns)이 읽는 필드의 타입 검사 (줄마다 PropertyBrief 전체 검증은 비싸서 이것만)
+_NDJSON_NUM_FIELDS = ("distM", "area", "rating")
+_NDJSON_STR_FIELDS = ("price", "deposit", "trend")
+
+
+def _is_num(v) -> bool:
+    # PropertyBrief의 float 필드처럼 숫자 또는 숫자 문자열
+    if isinstance(v, bool):
+        return False
+    if isinstance(v, (int, float)):
+        return True
+    if isinstance(v, str):
+        try:
+            float(v)
+            return True
+        except ValueError:
+            return False
+    return False
+
+
+def _ndjson_row_error(obj) -> Optional[str]:
+    """
+    후보 한 줄(propertyId는 확인된 dict)에서 점수 계산 전에 걸러야 할 타입 문제 (없으면 None).
+    """
+    for f in _NDJSON_NUM_FIELDS:
+        if obj.get(f) is not None and not _is_num(obj[f]):
+            return f"{f}는 숫자여야 합니다"
+    for f in _NDJSON_STR_FIELDS:
+        if obj.get(f) is not None and not isinstance(obj[f], str):
+            return f"{f}는 문자열이어야 합니다"
+    series = obj.get("recentPriceSeries")
+    if series is not None:
+        if not isinstance(series, list):
+            return "recentPriceSeries는 {date, amount} 목록이어야 합니다"
+        for p in series:
+            if not isinstance(p, dict) or not isinstance(p.get("date"), str) or not isinstance(p.get("amount"), str):
+                return "recentPriceSeries는 {date, amount} 목록이어야 합니다"
+    return None
+
+
+@app.post("/reco/rank-explain/ndjson", response_model=RecoRankExplainResponse)
+async def reco_rank_explain_ndjson(request: Request):
+    """
+    후보가 아주 많을 때용. 요청 본문(application/x-ndjson):
+      1번째 줄: {"base": {...}, "topK": 10, "maxReasons": 3, "mode": "compare"}
+      2번째 줄부터: 후보 PropertyBrief 한 줄에 하나
+    본문을 받는 대로 청크 단위로 점수 계산하고 상위 topK만 들고 있음.
+    (줄마다 점수 계산에 쓰는 필드 타입만 검사해서 틀리면 줄 번호와 함께 422, PropertyBrief 전체 검증은 최종 topK에만)
+    """
+    header: Optional[RecoRankStreamHeader] = None
+    collector: Optional[TopKCollector] = None
+    chunk: List[dict] = []
+    buf = b""
+    line_no = 0
+
+    def _line(raw: bytes):
+        nonlocal header, collector, chunk
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            obj = json.loads(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"{line_no}번째 줄 JSON 파싱 실패")
+        if header is None:
+            try:
+                header = RecoRankStreamHeader.model_validate(obj)
+            except ValidationError as e:
+                raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+            collector = TopKCollector(header.base, header.topK)
+            return
+        if not isinstance(obj, dict) or not str(obj.get("propertyId", "")).lstrip("-").isdigit():
+            raise HTTPException(status_code=400, detail=f"{line_no}번째 줄 propertyId 없음")
+        err = _ndjson_row_error(obj)
+        if err is not None:
+            # 점수 계산(build_columns) 중에 터지지 않게 여기서 막음
+            raise HTTPException(status_code=422, detail=f"{line_no}번째 줄 {err}")
+        chunk.append(obj)
+        if len(chunk) >= _NDJSON_CHUNK:
+            collector.add_chunk(chunk)
+            chunk = []
+
+    async for data in request.stream():
+        buf += data
+        *lines, buf = buf.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            _line(raw)
+    line_no += 1
+    _line(buf)
+
+    if header is None:
+        raise HTTPException(status_code=400, detail="요청 헤더 줄(base)이 필요합니다.")
+    collector.add_chunk(chunk)
+
+    enriched_sorted = []
+    for obj, score, bd in collector.results():
+        try:
+            c = PropertyBrief.model_validate(obj)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        enriched_sorted.append(_enriched_item(c, score, bd))
+
+    if not enriched_sorted:
+        return {"status": "ok", "model": None, "results": []}
+    return await _explain_ranked(header.base, enriched_sorted, header.maxReasons, header.mode)
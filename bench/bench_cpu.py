@@ -0,0 +1,183 @@
+"""
+CPU 구간 마이크로벤치마크 + 기준값(baseline) 대비 회귀 검사.
+- 함수별/입력 크기별로 여러 번 돌려서 p50/p99(ms)와 처리량(입력 단위/초)을 출력
+- --baseline 파일이 있으면 p50이 threshold 비율 이상 느려진 항목을 표시하고 종료 코드 1
+- --save-baseline으로 현재 결과를 기준값으로 저장 (기준값은 같은 머신에서 만든 것끼리 비교)
+
+    python -m bench.bench_cpu                         # 측정만 (bench/baseline_cpu.json 있으면 비교)
+    python -m bench.bench_cpu --save-baseline         # 기준값 저장
+    python -m bench.bench_cpu --quick --only lease    # 작은 입력만, 이름에 lease 들어간 것만
+    python -m bench.bench_cpu --threshold 0.15
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, List, Tuple
+
+from ocr_engine.pdf_render import render_pdf_pages_to_jpeg_bytes
+from ocr_engine.lease_parser import extract_lease_fields
+from ocr_engine.validators import find_required_fields, template_keyword_score
+from ocr_engine.text_index import TextIndex
+from reco_engine.ranker import calc_breakdown, calc_score_0_100
+from reco_engine.batch_ranker import build_columns, score_columns
+from reco_engine.reco_prompt import build_reco_prompt
+from reco_engine.price_series import series_features, series_memo
+from bench.fixtures import make_lease_text, make_text_pdf, make_scanned_pdf, make_candidates, make_base, make_payload
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline_cpu.json")
+
+# (이름, 크기 목록, quick 크기 목록, 입력 생성(크기) → 입력, 측정 함수(입력), 처리량 단위, 크기 → 단위 수)
+Case = Tuple[str, List[int], List[int], Callable[[int], Any], Callable[[Any], Any], str, Callable[[int, Any], float]]
+
+
+def _scalar_scores(args):
+    base, cands = args
+    return [calc_score_0_100(calc_breakdown(base, c)) for c in cands]
+
+
+def _vector_scores(args):
+    base, cands = args
+    return score_columns(base, build_columns(cands))["score"]
+
+
+def _series_cold(series):
+    # 메모 없이 매번 새로 파싱/계산하는 비용
+    series_memo.clear()
+    return series_features(series)
+
+
+def _series_of(n: int):
+    return [c.recentPriceSeries for c in make_candidates(n)]
+
+
+CASES: List[Case] = [
+    ("render_pdf_pages_to_jpeg_bytes[scanned]", [1, 10, 50], [1, 5],
+     make_scanned_pdf, render_pdf_pages_to_jpeg_bytes, "pages", lambda n, _: n),
+    ("render_pdf_pages_to_jpeg_bytes[text]", [1, 10, 50], [1, 5],
+     make_text_pdf, render_pdf_pages_to_jpeg_bytes, "pages", lambda n, _: n),
+    ("TextIndex", [5, 50, 500], [5, 50],
+     make_lease_text, TextIndex, "kchars", lambda n, x: len(x) / 1000),
+    ("extract_lease_fields", [5, 50, 500], [5, 50],
+     make_lease_text, extract_lease_fields, "kchars", lambda n, x: len(x) / 1000),
+    ("find_required_fields", [5, 50, 500], [5, 50],
+     make_lease_text, find_required_fields, "kchars", lambda n, x: len(x) / 1000),
+    ("template_keyword_score", [5, 50, 500], [5, 50],
+     make_lease_text, template_keyword_score, "kchars", lambda n, x: len(x) / 1000),
+    ("calc_breakdown+calc_score_0_100", [10, 1000, 50000], [10, 1000],
+     lambda n: (make_base(False), make_candidates(n)), _scalar_scores, "cands", lambda n, _: n),
+    ("score_columns(vector)", [10, 1000, 50000], [10, 1000],
+     lambda n: (make_base(False), make_candidates(n)), _vector_scores, "cands", lambda n, _: n),
+    ("series_features(cold)", [10, 1000, 50000], [10, 1000],
+     _series_of, _series_cold, "cands", lambda n, _: n),
+    ("series_features(memo)", [10, 1000, 50000], [10, 1000],
+     _series_of, series_features, "cands", lambda n, _: n),
+    ("build_reco_prompt", [5, 10, 30], [5, 10],
+     make_payload, build_reco_prompt, "cands", lambda n, _: n),
+]
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def measure(fn: Callable[[Any], Any], arg: Any, min_runs: int, max_runs: int, budget_sec: float) -> List[float]:
+    """
+    fn(arg)을 한 번 워밍업하고, min_runs번 이상 & budget_sec 동안(최대 max_runs번) 반복해서 호출별 시간(초) 목록 반환.
+    """
+    fn(arg)
+    times: List[float] = []
+    start = time.perf_counter()
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - start < budget_sec):
+        t = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def run(only: str = "", quick: bool = False, budget_sec: float = 0.5) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, sizes, quick_sizes, make, fn, unit, units in CASES:
+        if only and only not in name:
+            continue
+        for n in (quick_sizes if quick else sizes):
+            arg = make(n)
+            times = sorted(measure(fn, arg, min_runs=3, max_runs=2000, budget_sec=budget_sec))
+            p50 = _percentile(times, 0.50)
+            results[f"{name}[n={n}]"] = {
+                "runs": len(times),
+                "p50_ms": round(p50 * 1000, 4),
+                "p99_ms": round(_percentile(times, 0.99) * 1000, 4),
+                "throughput": round(units(n, arg) / p50, 2) if p50 > 0 else None,
+                "unit": f"{unit}/s",
+            }
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    p50이 baseline보다 threshold 비율 이상 느려진 항목 이름 목록.
+    """
+    regressed = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base or not base.get("p50_ms"):
+            continue
+        ratio = cur["p50_ms"] / base["p50_ms"]
+        cur["vs_baseline"] = round(ratio, 3)
+        if ratio > 1.0 + threshold:
+            regressed.append(key)
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", default="", help="이름에 이 문자열이 들어간 항목만")
+    ap.add_argument("--quick", action="store_true", help="작은 입력 크기만")
+    ap.add_argument("--budget", type=float, default=0.5, help="항목당 최소 측정 시간(초)")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--threshold", type=float, default=0.25, help="p50이 이 비율 이상 느려지면 회귀 (0.25 = 25%%)")
+    ap.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = ap.parse_args()
+
+    results = run(only=args.only, quick=args.quick, budget_sec=args.budget)
+
+    regressed: List[str] = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressed = compare(results, json.load(f), args.threshold)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for key, r in results.items():
+            vs = f"  x{r['vs_baseline']:.2f}" if "vs_baseline" in r else ""
+            mark = "  << REGRESSION" if key in regressed else ""
+            print(
+                f"{key:<52} p50 {r['p50_ms']:>10.3f}ms  p99 {r['p99_ms']:>10.3f}ms"
+                f"  {r['throughput']:>12,.1f} {r['unit']:<10} ({r['runs']} runs){vs}{mark}"
+            )
+
+    if args.save_baseline:
+        # 이번에 측정한 항목만 덮어쓰고 나머지 기준값은 유지
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update({k: {kk: v[kk] for kk in ("p50_ms", "p99_ms", "throughput", "unit")} for k, v in results.items()})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"baseline saved: {args.baseline}")
+
+    if regressed:
+        print(f"{len(regressed)} regression(s) over {args.threshold:.0%}: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+reco_prompt 프롬프트 크기 비교 (LLM 호출 없음).
+- legacy(reco-rank-explain-v3-dozip, payload JSON 통째로) vs compact(표 형식 + 토큰 예산)
+- 후보 수별 글자 수 / 토큰 수 / 예산 때문에 빠진 후보 수
+
+    python -m bench.bench_prompt --topk 5,10,30 --budget 6000
+"""
+import time
+import random
+import argparse
+
+from reco_engine.ranker import judge_code
+from reco_engine.schemas import PricePoint
+from reco_engine.batch_ranker import build_columns, score_columns, breakdown_at, top_k
+from reco_engine.price_series import effective_trend, series_features, features_at
+from reco_engine.reco_prompt import (
+    build_reco_prompt_legacy,
+    build_reco_prompt_compact,
+    count_tokens,
+    LEGACY_PROMPT_VERSION,
+    COMPACT_PROMPT_VERSION,
+    TOKENIZER,
+)
+from bench.bench_ranker import make_candidates, make_base
+
+
+def make_payload(k: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    base = make_base(False)
+    base.aptName = "래미안 두집 파크"
+    base.recentPriceSeries = [
+        PricePoint(date=f"2024-{m:02d}-15", amount=f"{rng.randint(40000, 47000):,}만") for m in range(1, 13)
+    ]
+    cands = make_candidates(max(k * 20, 200), seed=seed)
+    for c in cands:
+        c.aptName = f"단지{c.propertyId}"
+
+    # app._enriched_item과 같은 모양으로 topK만
+    scored = score_columns(base, build_columns(cands))
+    enriched = []
+    for i in top_k(scored["score"], k):
+        c, score = cands[i], float(scored["score"][i])
+        item = {
+            "propertyId": c.propertyId,
+            "score": score,
+            "judgeCode": judge_code(score),
+            "breakdown": breakdown_at(scored, i),
+            "aptName": c.aptName,
+            "rating": c.rating,
+            "trend": effective_trend(c),
+            "price": c.price,
+            "deposit": c.deposit,
+            "area": c.area,
+            "distM": c.distM,
+        }
+        if c.recentPriceSeries:
+            f = features_at(series_features([c.recentPriceSeries]), 0)
+            item.update({"seriesN": f["n"], "slopePct": f["slopePct"], "volPct": f["volPct"], "recentChgPct": f["recentChgPct"]})
+        enriched.append(item)
+    return {"base": base.model_dump(), "candidates": enriched, "maxReasons": 3, "mode": "compare"}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--topk", default="5,10,30")
+    ap.add_argument("--budget", type=int, default=6000)
+    args = ap.parse_args()
+
+    print(f"tokenizer: {TOKENIZER}")
+    print(f"{'topK':>5} | {LEGACY_PROMPT_VERSION:>28} | {COMPACT_PROMPT_VERSION:>28} | trimmed | ratio | encode")
+    for k in [int(x) for x in args.topk.split(",") if x.strip()]:
+        payload = make_payload(k)
+
+        legacy = build_reco_prompt_legacy(payload)
+        t = time.perf_counter()
+        compact, stats = build_reco_prompt_compact(payload, budget=args.budget)
+        t_enc = time.perf_counter() - t
+
+        lt = count_tokens(legacy)
+        print(
+            f"{k:>5} | {len(legacy):>9} chars {lt:>7} tok | {len(compact):>9} chars {stats['tokens']:>7} tok"
+            f" | {stats['trimmed']:>7} | {stats['tokens'] / lt:5.2f} | {t_enc * 1000:5.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
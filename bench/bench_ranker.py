@@ -0,0 +1,132 @@
+"""
+reco_engine.batch_ranker 벡터 점수 계산 속도 측정 (+ 측정 전 스칼라 구현과 같은지 한 번 확인).
+- 스칼라 구현과의 일치 검사는 tests/test_batch_ranker.py에서 (pytest), 여기서는 같은 check_parity를 한 번 더 돌림
+- 후보 수별 처리 시간 비교: 벡터 경로 전체 = 컬럼 만들기(build_columns) + 점수 계산(score_columns)
+  점수 계산은 10k 후보에 1ms 남짓이고 전체 시간은 컬럼 만들기가 대부분
+
+    python -m bench.bench_ranker --sizes 100,1000,10000,50000
+"""
+import time
+import random
+import argparse
+from typing import List, Optional
+
+from reco_engine.schemas import PropertyBrief, PricePoint
+from reco_engine.ranker import calc_breakdown, calc_score_0_100
+from reco_engine.batch_ranker import build_columns, score_columns, breakdown_at, rank_order
+
+_TRENDS = ["UP", "DOWN", "FLAT", "UNKNOWN", None, "", "up"]
+_DEALS = ["월세", "전세", "매매", None]
+
+
+def _price(rng: random.Random):
+    r = rng.random()
+    if r < 0.1:
+        return None
+    if r < 0.15:
+        return ""
+    if r < 0.2:
+        return "가격문의"
+    if r < 0.25:
+        return "1.2.3"
+    v = rng.randint(10, 200000)
+    return f"{v:,}만" if rng.random() < 0.5 else str(v)
+
+
+def make_series(rng: random.Random) -> Optional[List[PricePoint]]:
+    # 후보 일부에만 최근 거래 series (건수/단위/날짜 형식/추세를 섞어서)
+    if rng.random() < 0.6:
+        return None
+    level = rng.randint(5000, 150000)
+    drift = rng.choice([-0.03, -0.01, 0.0, 0.002, 0.01, 0.03])
+    points = []
+    for k in range(rng.randint(1, 12)):
+        v = int(level * (1 + drift) ** k * rng.uniform(0.97, 1.03))
+        amount = f"{v // 10000}억 {v % 10000:,}만" if v >= 10000 and rng.random() < 0.5 else f"{v:,}"
+        date = f"2024-{k % 12 + 1:02d}-{rng.randint(1, 28):02d}" if rng.random() < 0.8 else f"2024.{k % 12 + 1:02d}"
+        points.append(PricePoint(date=date, amount=amount))
+    return points
+
+
+def make_candidates(n: int, seed: int = 0) -> List[PropertyBrief]:
+    rng = random.Random(seed)
+    # series는 따로 뽑아서 기존 필드 값(=기준값 비교 입력)은 그대로 유지
+    srng = random.Random(seed + 7919)
+    out = []
+    for i in range(n):
+        out.append(PropertyBrief(
+            propertyId=i + 1,
+            dealType=rng.choice(_DEALS),
+            price=_price(rng),
+            deposit=_price(rng),
+            area=None if rng.random() < 0.1 else round(rng.uniform(15, 200), 2),
+            distM=None if rng.random() < 0.1 else rng.choice([0.0, rng.uniform(0, 5000)]),
+            rating=None if rng.random() < 0.2 else round(rng.uniform(0, 5), 1),
+            trend=rng.choice(_TRENDS),
+            recentPriceSeries=make_series(srng),
+        ))
+    return out
+
+
+def make_base(monthly: bool) -> PropertyBrief:
+    return PropertyBrief(
+        propertyId=0, dealType="월세" if monthly else "전세",
+        price="120" if monthly else "43,000만", deposit="5,000",
+        area=84.5, rating=4.2, trend="UP",
+    )
+
+
+def check_parity(base: PropertyBrief, cands: List[PropertyBrief]) -> None:
+    scored = score_columns(base, build_columns(cands))
+    scalar = []
+    for i, c in enumerate(cands):
+        bd = calc_breakdown(base, c)
+        score = calc_score_0_100(bd)
+        assert bd == breakdown_at(scored, i), (i, bd, breakdown_at(scored, i))
+        assert score == float(scored["score"][i]), (i, score, scored["score"][i])
+        scalar.append((score, c.propertyId))
+    expected = [pid for _, pid in sorted(scalar, key=lambda x: x[0], reverse=True)]
+    got = [cands[i].propertyId for i in rank_order(scored["score"])]
+    assert expected == got, "rank order mismatch"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,1000,10000,50000")
+    args = ap.parse_args()
+
+    srng = random.Random(3)
+    for monthly in (False, True):
+        check_parity(make_base(monthly), make_candidates(5000, seed=1 + monthly))
+        # 기준 매물에도 series가 있으면 base trend도 series에서 계산
+        base = make_base(monthly)
+        base.recentPriceSeries = make_series(srng) or [PricePoint(date="2024-01-01", amount="43,000만")]
+        check_parity(base, make_candidates(5000, seed=3 + monthly))
+    print("parity: ok")
+
+    base = make_base(False)
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        cands = make_candidates(n)
+
+        t = time.perf_counter()
+        sorted(((calc_score_0_100(calc_breakdown(base, c)), c) for c in cands), key=lambda x: x[0], reverse=True)
+        t_scalar = time.perf_counter() - t
+
+        t = time.perf_counter()
+        cols = build_columns(cands)
+        t_cols = time.perf_counter() - t
+        t = time.perf_counter()
+        scored = score_columns(base, cols)
+        rank_order(scored["score"])
+        t_vec = time.perf_counter() - t
+
+        total = t_cols + t_vec
+        # 벡터 경로 전체 시간은 컬럼 만들기(build_columns)가 대부분
+        print(
+            f"n={n:>6}: scalar {t_scalar * 1000:8.2f}ms | vectorized {total * 1000:7.2f}ms"
+            f" = columns {t_cols * 1000:7.2f}ms ({t_cols / total:4.0%}) + score {t_vec * 1000:6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+PDF 페이지 렌더링/인코딩 처리량 측정 (pages/sec).
+스캔본처럼 페이지마다 이미지가 깔린 PDF를 만들어서
+순차 렌더링 vs 워커 풀(워커 수별)을 비교.
+
+    python -m bench.bench_raster --pages 24 --workers 1,2,4,8
+"""
+import os
+import time
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+import numpy as np
+
+import ocr_engine.raster_pool as rp
+from ocr_engine.pdf_render import open_pdf, iter_pdf_pages, PROFILES
+from ocr_engine.raster_pool import iter_pdf_pages_pooled, _render_chunk
+
+
+def make_scanned_pdf(pages: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()  # A4
+        # 스캔 노이즈 비슷한 회색 이미지 + 글자
+        noise = rng.integers(200, 256, size=(1100, 850), dtype=np.uint8)
+        pix = fitz.Pixmap(fitz.csGRAY, 850, 1100, noise.tobytes(), False)
+        page.insert_image(page.rect, pixmap=pix)
+        for row in range(40):
+            page.insert_text((40, 40 + row * 19), f"page {i + 1} line {row + 1} lease contract sample text", fontsize=10)
+    return doc.tobytes()
+
+
+def _run_serial(pdf_bytes: bytes) -> int:
+    doc = open_pdf(pdf_bytes, max_pages=0)
+    try:
+        return sum(1 for _ in iter_pdf_pages(doc, text_layer=False))
+    finally:
+        doc.close()
+
+
+def _run_pooled(pdf_bytes: bytes, executor, workers: int) -> int:
+    rp.RASTER_WORKERS = workers
+    doc = open_pdf(pdf_bytes, max_pages=0)
+    try:
+        return sum(1 for _ in iter_pdf_pages_pooled(pdf_bytes, doc, text_layer=False, executor=executor))
+    finally:
+        doc.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=24)
+    ap.add_argument("--workers", default="1,2,4,8")
+    ap.add_argument("--executor", choices=["process", "thread"], default="process")
+    args = ap.parse_args()
+
+    pdf_bytes = make_scanned_pdf(args.pages)
+    print(f"pdf: {args.pages} pages, {len(pdf_bytes) / 1024 / 1024:.1f}MB, cpu={os.cpu_count()}")
+
+    t = time.perf_counter()
+    n = _run_serial(pdf_bytes)
+    dt = time.perf_counter() - t
+    print(f"{'serial':>12}: {n / dt:7.2f} pages/s ({dt:.2f}s)")
+
+    for w in [int(x) for x in args.workers.split(",") if x.strip()]:
+        if args.executor == "thread":
+            ex = ThreadPoolExecutor(max_workers=w)
+        else:
+            ex = ProcessPoolExecutor(max_workers=w, mp_context=multiprocessing.get_context("spawn"))
+        # 워커 기동 시간은 빼고 측정 (서버에서는 풀을 계속 재사용)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+            f.write(pdf_bytes)
+            f.flush()
+            list(ex.map(_render_chunk, [f.name] * w, [[0]] * w, [0.1] * w, [PROFILES["default"]] * w))
+        try:
+            t = time.perf_counter()
+            n = _run_pooled(pdf_bytes, ex, w)
+            dt = time.perf_counter() - t
+        finally:
+            ex.shutdown()
+        print(f"{args.executor + ' x' + str(w):>12}: {n / dt:7.2f} pages/s ({dt:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+벤치마크용 합성 입력 (계약서 텍스트 / PDF / 추천 후보).
+시드가 같으면 항상 같은 입력이 나와서 기준값(baseline)과 비교 가능.
+"""
+import random
+from typing import List
+
+import fitz  # PyMuPDF
+
+from bench.bench_raster import make_scanned_pdf
+from bench.bench_ranker import make_candidates, make_base
+from bench.bench_prompt import make_payload
+
+__all__ = [
+    "make_lease_text",
+    "make_text_pdf",
+    "make_scanned_pdf",
+    "make_candidates",
+    "make_base",
+    "make_payload",
+]
+
+_NAMES = ["홍길동", "김철수", "이영희", "박민수", "최지우", "정하늘"]
+_ADDRS = [
+    "서울특별시 강남구 테헤란로 123, 101동 1203호",
+    "경기도 성남시 분당구 정자일로 95 두집아파트 302동 804호",
+    "부산광역시 해운대구 센텀중앙로 79 센텀빌 1502호",
+]
+_CLAUSES = [
+    "임차인은 임대인의 동의 없이 목적물의 구조를 변경하거나 전대할 수 없다.",
+    "임대인은 계약 존속 중 목적물을 사용·수익에 필요한 상태로 유지하여야 한다.",
+    "계약이 종료된 경우 임차인은 목적물을 원상으로 회복하여 임대인에게 반환한다.",
+    "임차인이 2기의 차임액에 달하도록 연체하는 경우 임대인은 계약을 해지할 수 있다.",
+    "중개보수는 거래가액의 0.4% 이내에서 임대인과 임차인이 각각 부담한다.",
+    "관리비는 별도로 하며 매월 말일까지 관리사무소에 납부한다.",
+]
+_SPECIALS = [
+    "반려동물 사육은 임대인과 협의 후 가능하다.",
+    "입주 전 도배 및 장판은 임대인 부담으로 교체한다.",
+    "잔금일 전까지 근저당권을 말소하기로 한다.",
+    "계약기간 중 중도 해지 시 중개보수는 임차인이 부담한다.",
+]
+
+
+def make_lease_text(clauses: int = 10, seed: int = 0) -> str:
+    """
+    OCR 결과처럼 보이는 주택임대차계약서 텍스트.
+    clauses로 본문 조항 수(=길이)를 조절. 라벨 사이 공백/줄바꿈도 섞어서 OCR 흔들림 흉내.
+    """
+    rng = random.Random(seed)
+    sp = lambda word: " ".join(word) if rng.random() < 0.3 else word
+    lines: List[str] = [
+        "주택임대차표준계약서",
+        f"{sp('임대인')}과 {sp('임차인')} 쌍방은 아래 표시 주택에 관하여 다음 계약 내용과 같이 임대차계약을 체결한다.",
+        f"{sp('소재지')} {rng.choice(_ADDRS)}",
+        f"토지 지목 대 면적 {rng.randint(30, 300)}㎡",
+        f"{sp('보증금')} 금 {rng.randint(1, 50)}억원정 (₩{rng.randint(1, 50) * 10 ** 8:,})",
+        f"{sp('차임')} 금 {rng.randint(30, 300)}만원정은 매월 {rng.randint(1, 28)}일에 지불한다.",
+        f"{sp('계약기간')} 20{rng.randint(20, 26)}년 {rng.randint(1, 12)}월 {rng.randint(1, 28)}일부터 24개월",
+    ]
+    for k in range(clauses):
+        lines.append(f"제{k + 1}조 ({rng.choice(['목적', '존속기간', '용도변경', '계약해지', '원상회복'])})")
+        lines.append(rng.choice(_CLAUSES))
+        if rng.random() < 0.2:
+            lines.append("")
+    lines.append(f"[{sp('특약사항')}]")
+    lines.extend(rng.sample(_SPECIALS, k=rng.randint(1, len(_SPECIALS))))
+    lines += [
+        f"작성일 20{rng.randint(20, 26)}년 {rng.randint(1, 12)}월 {rng.randint(1, 28)}일",
+        f"{sp('임대인')} 주소 {rng.choice(_ADDRS)}",
+        f"성명 {rng.choice(_NAMES)} (인)",
+        f"{sp('임차인')} 주소 {rng.choice(_ADDRS)}",
+        f"성명 {rng.choice(_NAMES)} {sp('서명')} 또는 날인",
+        "개업공인중개사 사무소 명칭 두집공인중개사사무소",
+    ]
+    return "\n".join(lines)
+
+
+def make_text_pdf(pages: int, seed: int = 0) -> bytes:
+    """
+    텍스트 레이어가 있는 계약서 PDF (페이지마다 계약서 텍스트 일부).
+    """
+    text = make_lease_text(clauses=pages * 12, seed=seed).splitlines()
+    per = max(1, len(text) // pages)
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        for row, line in enumerate(text[p * per:(p + 1) * per][:45]):
+            page.insert_text((40, 40 + row * 17), line, fontname="korea", fontsize=9)
+    return doc.tobytes()
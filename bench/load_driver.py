@@ -0,0 +1,213 @@
+"""
+떠 있는 앱에 동시 요청을 걸어서 동시성 단계별 처리량/지연/에러율을 재는 부하 드라이버.
+외부 API 대신 bench/standins.py 대역 서버를 보게 띄운 앱에 돌리는 걸 전제로 함.
+
+    python -m bench.standins --port 18090 &
+    VISION_API_ENDPOINT=http://127.0.0.1:18090 VISION_TRANSPORT=rest VISION_ANONYMOUS=1 \\
+    GMS_BASE_URL=http://127.0.0.1:18090/v1 GMS_KEY=standin uvicorn app:app --port 8000 &
+
+    python -m bench.load_driver --target extract --concurrency 1,4,16 --duration 20
+    python -m bench.load_driver --target reco --concurrency 1,8,32 --requests 200
+    python -m bench.load_driver --target reco-stream --candidates 200 --topk 10
+
+- extract: 미리 만든 PDF 몇 개를 돌려가며 보냄. 같은 PDF가 다시 오면 OCR 캐시에 걸리므로
+  캐시 없는 경로를 재려면 앱을 OCR_CACHE_MEM_ITEMS=0 (OCR_CACHE_DB 비움)으로 띄움
+- reco / reco-stream: 기준 매물을 요청마다 바꿔서 설명 캐시에 안 걸리게
+  (reco-stream은 첫 줄(점수)까지 시간을 ttfb로 따로 집계)
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from bench.fixtures import make_scanned_pdf, make_text_pdf, make_candidates, make_base
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+# ---------------------------------------------------------------------------
+# 요청 종류별 (client, i) → (status, ttfb초 또는 None)
+# ---------------------------------------------------------------------------
+
+def make_extract(args) -> Callable[[httpx.AsyncClient, int], Any]:
+    # PDF 생성(특히 스캔본)이 느려서 측정 전에 미리 만들어 둠
+    make = make_text_pdf if args.text_pdf else make_scanned_pdf
+    pdfs = [make(args.pages, seed=s) for s in range(args.distinct_pdfs)]
+    params = {"llm": args.llm, "text_layer": 1 if args.text_pdf else 0}
+
+    async def call(client: httpx.AsyncClient, i: int):
+        files = {"files": (f"load_{i}.pdf", pdfs[i % len(pdfs)], "application/pdf")}
+        r = await client.post("/extract", params=params, files=files)
+        return r.status_code, None
+
+    return call
+
+
+# 실행마다 기준 매물 id를 다르게 해서 앞선 실행의 설명 캐시에도 안 걸리게
+_RUN_SALT = int(time.time()) % 100_000 * 1000
+
+
+def _reco_body(args, i: int) -> Dict[str, Any]:
+    base = make_base(monthly=bool(i % 2)).model_dump()
+    base["propertyId"] = 100_000_000 + _RUN_SALT + i
+    base["area"] = round(60 + (i % 50), 1)
+    cands = [c.model_dump() for c in make_candidates(args.candidates, seed=i % 16)]
+    return {"base": base, "candidates": cands, "topK": args.topk, "maxReasons": 3}
+
+
+def make_reco(args) -> Callable[[httpx.AsyncClient, int], Any]:
+    async def call(client: httpx.AsyncClient, i: int):
+        r = await client.post("/reco/rank-explain", json=_reco_body(args, i))
+        # LLM이 실패해도 템플릿 설명으로 200이 나가므로 error 필드로 따로 셈
+        if r.status_code == 200 and r.json().get("error"):
+            return "llm_error", None
+        return r.status_code, None
+
+    return call
+
+
+def make_reco_stream(args) -> Callable[[httpx.AsyncClient, int], Any]:
+    async def call(client: httpx.AsyncClient, i: int):
+        t0 = time.perf_counter()
+        ttfb = None
+        async with client.stream("POST", "/reco/rank-explain/stream", json=_reco_body(args, i)) as r:
+            async for line in r.aiter_lines():
+                if ttfb is None and line:
+                    ttfb = time.perf_counter() - t0
+                if line:
+                    ev = json.loads(line)
+                    if ev.get("type") == "done" and ev.get("error"):
+                        return "llm_error", ttfb
+            return r.status_code, ttfb
+
+    return call
+
+
+TARGETS = {"extract": make_extract, "reco": make_reco, "reco-stream": make_reco_stream}
+
+
+async def run_level(
+    base_url: str,
+    call: Callable[[httpx.AsyncClient, int], Any],
+    concurrency: int,
+    duration: Optional[float],
+    total: Optional[int],
+    timeout: float,
+) -> Dict[str, Any]:
+    """
+    concurrency개 워커가 duration초 동안(또는 total개 요청을 다 보낼 때까지) 쉬지 않고 요청.
+    """
+    latencies: List[float] = []
+    ttfbs: List[float] = []
+    statuses: Counter = Counter()
+    counter = {"next": 0}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                i = counter["next"]
+                if total is not None and i >= total:
+                    return
+                counter["next"] = i + 1
+                t = time.perf_counter()
+                try:
+                    status, ttfb = await call(client, i)
+                except httpx.TimeoutException:
+                    status, ttfb = "timeout", None
+                except httpx.HTTPError as e:
+                    status, ttfb = type(e).__name__, None
+                latencies.append(time.perf_counter() - t)
+                statuses[status] += 1
+                if ttfb is not None:
+                    ttfbs.append(ttfb)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    ttfbs.sort()
+    n = len(latencies)
+    ok = sum(c for s, c in statuses.items() if isinstance(s, int) and 200 <= s < 300)
+    out = {
+        "concurrency": concurrency,
+        "requests": n,
+        "elapsed_sec": round(elapsed, 3),
+        "rps": round(n / elapsed, 2) if elapsed > 0 else 0.0,
+        "ok_rps": round(ok / elapsed, 2) if elapsed > 0 else 0.0,
+        "error_rate": round(1 - ok / n, 4) if n else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p90_ms": round(_percentile(latencies, 0.90) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+    if ttfbs:
+        out["ttfb_p50_ms"] = round(_percentile(ttfbs, 0.50) * 1000, 1)
+        out["ttfb_p99_ms"] = round(_percentile(ttfbs, 0.99) * 1000, 1)
+    return out
+
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    call = TARGETS[args.target](args)
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    results = []
+    for c in levels:
+        res = await run_level(args.url, call, c, args.duration if args.requests is None else None, args.requests, args.timeout)
+        results.append(res)
+        if not args.json:
+            ttfb = f"  ttfb p50 {res['ttfb_p50_ms']:>8.1f}ms" if "ttfb_p50_ms" in res else ""
+            print(
+                f"c={c:<4} {res['requests']:>6} req  {res['rps']:>8.2f} rps  err {res['error_rate']:>6.1%}"
+                f"  p50 {res['p50_ms']:>8.1f}ms  p90 {res['p90_ms']:>8.1f}ms  p99 {res['p99_ms']:>8.1f}ms{ttfb}"
+                f"  {res['statuses']}",
+                flush=True,
+            )
+        if args.pause > 0:
+            await asyncio.sleep(args.pause)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--target", choices=sorted(TARGETS), default="reco")
+    ap.add_argument("--concurrency", default="1,4,16", help="쉼표로 구분한 동시성 단계")
+    ap.add_argument("--duration", type=float, default=15.0, help="단계별 측정 시간(초)")
+    ap.add_argument("--requests", type=int, default=None, help="지정하면 시간 대신 단계별 요청 수로")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--pause", type=float, default=1.0, help="단계 사이 쉬는 시간(초)")
+    # extract
+    ap.add_argument("--pages", type=int, default=2)
+    ap.add_argument("--distinct-pdfs", type=int, default=8, help="돌려 쓸 서로 다른 PDF 개수")
+    ap.add_argument("--text-pdf", action="store_true", help="스캔 PDF 대신 텍스트 레이어 PDF")
+    ap.add_argument("--llm", type=int, default=0, help="extract에 llm=1로 계약서 분석까지")
+    # reco
+    ap.add_argument("--candidates", type=int, default=50)
+    ap.add_argument("--topk", type=int, default=10)
+    ap.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = ap.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    if any(r["requests"] == 0 for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
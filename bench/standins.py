@@ -0,0 +1,208 @@
+"""
+부하 테스트용 로컬 대역 서버 (Google Vision REST + GMS /responses).
+실제 외부 API 없이 /extract, /reco/rank-explain 전체 경로를 돌려볼 수 있음.
+
+    python -m bench.standins --port 18090
+
+앱은 환경변수로 대역 서버를 보게 해서 띄움:
+
+    VISION_API_ENDPOINT=http://127.0.0.1:18090 VISION_TRANSPORT=rest VISION_ANONYMOUS=1 \\
+    GMS_BASE_URL=http://127.0.0.1:18090/v1 GMS_KEY=standin \\
+    uvicorn app:app --port 8000
+
+대역 서버 설정 (환경변수):
+- STANDIN_VISION_LATENCY / STANDIN_GMS_LATENCY: 응답 지연 분포 (ms)
+    "fixed:200" | "uniform:100,400" | "lognormal:300,0.5" (중앙값, sigma) | "0"
+- STANDIN_VISION_ERROR_RATE / STANDIN_GMS_ERROR_RATE: 요청 전체를 503으로 실패시킬 확률
+- STANDIN_VISION_PAGE_ERROR_RATE: 배치 안에서 페이지 하나만 에러로 돌려줄 확률
+- STANDIN_VISION_TEXT_FILE: OCR 결과로 돌려줄 텍스트 파일 (없으면 합성 계약서 텍스트)
+- STANDIN_GMS_STREAM_CHUNKS: stream=true 요청일 때 출력 텍스트를 몇 조각으로 나눠 보낼지
+- STANDIN_GMS_CHUNK_MS: 스트리밍 조각 사이 간격(ms)
+"""
+import os
+import re
+import json
+import math
+import random
+import asyncio
+import argparse
+from typing import List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from bench.fixtures import make_lease_text
+
+
+def parse_latency(spec: str):
+    """
+    지연 분포 문자열 → ms를 하나씩 뽑는 함수.
+    """
+    spec = (spec or "0").strip()
+    kind, _, args = spec.partition(":")
+    if not args:
+        value = float(kind)
+        return lambda: value
+    nums = [float(x) for x in args.split(",")]
+    if kind == "fixed":
+        return lambda: nums[0]
+    if kind == "uniform":
+        lo, hi = nums
+        return lambda: random.uniform(lo, hi)
+    if kind == "lognormal":
+        median, sigma = nums
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"unknown latency spec: {spec}")
+
+
+VISION_LATENCY = parse_latency(os.getenv("STANDIN_VISION_LATENCY", "lognormal:400,0.4"))
+VISION_ERROR_RATE = float(os.getenv("STANDIN_VISION_ERROR_RATE", "0"))
+VISION_PAGE_ERROR_RATE = float(os.getenv("STANDIN_VISION_PAGE_ERROR_RATE", "0"))
+GMS_LATENCY = parse_latency(os.getenv("STANDIN_GMS_LATENCY", "lognormal:2500,0.5"))
+GMS_ERROR_RATE = float(os.getenv("STANDIN_GMS_ERROR_RATE", "0"))
+GMS_STREAM_CHUNKS = int(os.getenv("STANDIN_GMS_STREAM_CHUNKS", "20"))
+GMS_CHUNK_MS = float(os.getenv("STANDIN_GMS_CHUNK_MS", "50"))
+
+_text_file = os.getenv("STANDIN_VISION_TEXT_FILE", "")
+if _text_file:
+    with open(_text_file, encoding="utf-8") as f:
+        VISION_TEXT = f.read()
+else:
+    VISION_TEXT = make_lease_text(clauses=12, seed=7)
+
+app = FastAPI()
+_counters = {"vision_requests": 0, "vision_images": 0, "gms_requests": 0, "errors": 0}
+
+
+async def _sleep(latency) -> None:
+    ms = latency()
+    if ms > 0:
+        await asyncio.sleep(ms / 1000.0)
+
+
+def _unavailable() -> JSONResponse:
+    _counters["errors"] += 1
+    return JSONResponse(status_code=503, content={"error": {"code": 503, "message": "standin: injected failure"}})
+
+
+# ---------------------------------------------------------------------------
+# Vision REST: POST /v1/images:annotate (batch_annotate_images)
+# ---------------------------------------------------------------------------
+
+@app.post("/v1/images:annotate")
+async def images_annotate(request: Request):
+    body = await request.json()
+    reqs = body.get("requests") or []
+    _counters["vision_requests"] += 1
+    _counters["vision_images"] += len(reqs)
+
+    await _sleep(VISION_LATENCY)
+    if random.random() < VISION_ERROR_RATE:
+        return _unavailable()
+
+    responses = []
+    for r in reqs:
+        if random.random() < VISION_PAGE_ERROR_RATE:
+            responses.append({"error": {"code": 13, "message": "standin: page failed"}})
+            continue
+        # 이미지 크기를 텍스트에 같이 넣어서 페이지마다 결과가 조금씩 다르게
+        size = len((r.get("image") or {}).get("content") or "")
+        responses.append({"fullTextAnnotation": {"text": f"{VISION_TEXT}\n(page bytes {size})"}})
+    return {"responses": responses}
+
+
+# ---------------------------------------------------------------------------
+# GMS: POST /v1/responses (Responses API, stream 지원)
+# ---------------------------------------------------------------------------
+
+def _reco_pids(prompt: str) -> List[int]:
+    # compact 프롬프트: 후보 표 줄 맨 앞이 propertyId / legacy: 입력 JSON의 candidates
+    pids = [int(x) for x in re.findall(r"(?m)^(\d+)\|", prompt)]
+    if pids:
+        return pids
+    _, _, data = prompt.partition("입력 데이터(JSON):\n")
+    try:
+        return [int(c["propertyId"]) for c in json.loads(data).get("candidates") or []]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return []
+
+
+def _canned_output(prompt: str) -> str:
+    if "OCR TEXT:" in prompt:
+        return json.dumps({
+            "suspicious": False,
+            "risk": random.randint(5, 30),
+            "reasons": ["필수 항목이 대부분 채워져 있어요.", "특약사항 문구가 일반적인 형태예요."],
+        }, ensure_ascii=False)
+
+    # 배치 프롬프트는 '[그룹 N]' 블록마다 후보를 읽어서 group 번호를 붙임
+    blocks = re.split(r"(?m)^\[그룹 (\d+)\]$", prompt)
+    if len(blocks) > 1:
+        pairs = [(int(g), pid) for g, block in zip(blocks[1::2], blocks[2::2]) for pid in _reco_pids(block)]
+    else:
+        pairs = [(None, pid) for pid in _reco_pids(prompt)]
+
+    results = []
+    for group, pid in pairs:
+        results.append({
+            **({"group": group} if group is not None else {}),
+            "propertyId": pid,
+            "aiScore": random.randint(50, 95),
+            "aiJudgeCode": "RECO",
+            "aiSummary": "기준 매물과 가격대와 면적이 비슷해서 같이 비교해보기 좋아요.",
+            "aiReasons": [
+                "가격이 기준 매물과 비슷한 수준이라 부담이 크지 않아요.",
+                "면적 차이가 크지 않아서 생활 공간이 비슷해요.",
+                "거리가 가까워서 생활권이 겹쳐요.",
+                "최근 거래 흐름이 안정적인 편이에요.",
+            ],
+            "aiWarnings": [],
+            "aiBreakdown": {},
+        })
+    return json.dumps({"model_name": "standin", "results": results, "meta": {"tone": "dozip-friendly"}}, ensure_ascii=False)
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    body = await request.json()
+    _counters["gms_requests"] += 1
+    prompt = str(body.get("input") or "")
+
+    await _sleep(GMS_LATENCY)
+    if random.random() < GMS_ERROR_RATE:
+        return _unavailable()
+
+    text = _canned_output(prompt)
+    if not body.get("stream"):
+        return {"output_text": text}
+
+    async def events():
+        n = max(1, GMS_STREAM_CHUNKS)
+        step = max(1, math.ceil(len(text) / n))
+        for i in range(0, len(text), step):
+            ev = {"type": "response.output_text.delta", "delta": text[i:i + step]}
+            yield f"data: {json.dumps(ev, ensure_ascii=False)}\n\n"
+            if GMS_CHUNK_MS > 0:
+                await asyncio.sleep(GMS_CHUNK_MS / 1000.0)
+        yield f"data: {json.dumps({'type': 'response.completed', 'response': {}})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def stats():
+    return _counters
+
+
+def main():
+    import uvicorn
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18090)
+    args = ap.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
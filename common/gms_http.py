@@ -0,0 +1,257 @@
+import os
+import threading
+import json
+import asyncio
+import hashlib
+from typing import Dict, Any, Optional, AsyncIterator, Awaitable, Callable, List
+
+import httpx
+
+from common.metrics import GMS_SECONDS, GMS_IN_FLIGHT, GMS_COALESCED
+from common.limiter import gms_limiter
+
+# GMS 게이트웨이 호출용 공유 커넥션 풀 설정
+GMS_POOL_MAX_CONNECTIONS = int(os.getenv("GMS_POOL_MAX_CONNECTIONS", "20"))
+GMS_POOL_MAX_KEEPALIVE = int(os.getenv("GMS_POOL_MAX_KEEPALIVE", "10"))
+GMS_KEEPALIVE_EXPIRY = float(os.getenv("GMS_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2는 h2 패키지가 있어야 함 (pip install "httpx[http2]"), 없으면 HTTP/1.1로
+GMS_HTTP2 = os.getenv("GMS_HTTP2", "0") == "1"
+GMS_TIMEOUT = float(os.getenv("GMS_TIMEOUT", "30"))
+# 같은 요청(URL + 본문)이 이미 진행 중이면 새로 호출하지 않고 그 결과를 같이 받음
+GMS_SINGLE_FLIGHT = os.getenv("GMS_SINGLE_FLIGHT", "1") == "1"
+
+# GMS 호출이 실패했다고 보고 fallback하는 예외: HTTP/연결 오류·한도 초과(GmsOverloaded) +
+# 200인데 본문이 JSON이 아닐 때(HTML 오류 페이지 등) r.json()/json.loads가 내는 ValueError(JSONDecodeError)
+GMS_CALL_ERRORS = (httpx.HTTPError, ValueError)
+
+_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+_counters = {"requests": 0, "coalesced": 0, "new_connections": 0, "tls_handshakes": 0}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=GMS_HTTP2 and _http2_available(),
+        timeout=GMS_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=GMS_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=GMS_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=GMS_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    앱 lifespan에서 만든 공유 클라이언트. (스크립트 등 lifespan 밖에서 부르면 그때 만듦)
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _new_client()
+    return _client
+
+
+def start_client() -> None:
+    get_client()
+
+
+async def close_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def _trace(event_name: str, info: Dict[str, Any]) -> None:
+    # 새 TCP 연결/TLS 핸드셰이크가 일어날 때만 불림 → 요청 수 대비 비율로 재사용 확인
+    if event_name == "connection.connect_tcp.complete":
+        _counters["new_connections"] += 1
+    elif event_name == "connection.start_tls.complete":
+        _counters["tls_handshakes"] += 1
+
+
+def request_key(url: str, body: Dict[str, Any]) -> str:
+    # 프롬프트 해시 (모델/입력/stream 여부까지 본문 전체가 같아야 같은 요청)
+    raw = json.dumps([url, body], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """
+    진행 중인 호출 하나 (먼저 온 요청이 task로 실제 호출, 같은 키로 온 요청은 결과만 같이 기다림).
+    기다리는 쪽이 모두 빠지면(취소/중간에 그만 읽음) 호출도 취소.
+    스트림이면 받은 이벤트를 events에 쌓아두고, 늦게 합류한 쪽은 처음부터 다시 읽음.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.events: List[Dict[str, Any]] = []
+        self.changed = asyncio.Event()
+
+    def push(self, ev: Dict[str, Any]) -> None:
+        self.events.append(ev)
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def leave(self) -> None:
+        self.waiters -= 1
+        if self.waiters <= 0 and self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+_flights: Dict[str, _Flight] = {}
+
+
+def _join(key: str, op: str, start: Callable[[_Flight], Awaitable[Any]]) -> _Flight:
+    flight = _flights.get(key)
+    if flight is not None:
+        _counters["coalesced"] += 1
+        GMS_COALESCED.inc(op=op)
+    else:
+        flight = _flights[key] = _Flight()
+
+        def done(_task: asyncio.Task) -> None:
+            # 끝나면 바로 빠짐 (그 뒤에 온 같은 요청은 새로 호출 — 결과 재사용은 각 모듈의 캐시 몫)
+            if _flights.get(key) is flight:
+                del _flights[key]
+            flight._notify()
+
+        flight.task = asyncio.ensure_future(start(flight))
+        flight.task.add_done_callback(done)
+    flight.waiters += 1
+    return flight
+
+
+async def post_json(
+    url: str, headers: Dict[str, str], body: Dict[str, Any], timeout: Optional[float] = None, op: str = "other"
+) -> Dict[str, Any]:
+    """
+    공유 풀로 POST 후 JSON 반환 (HTTP 에러면 raise_for_status 예외).
+    op: 지표 라벨 (어떤 LLM 호출인지)
+    같은 요청이 진행 중이면 합쳐서 한 번만 호출 (결과 dict는 같은 객체를 나눠 가짐 → 읽기만 할 것).
+    """
+    if not GMS_SINGLE_FLIGHT:
+        return await _post_json(url, headers, body, timeout, op)
+
+    async def start(_flight: _Flight) -> Dict[str, Any]:
+        return await _post_json(url, headers, body, timeout, op)
+
+    flight = _join(request_key(url, body), op, start)
+    try:
+        return await asyncio.shield(flight.task)
+    finally:
+        flight.leave()
+
+
+async def _post_json(
+    url: str, headers: Dict[str, str], body: Dict[str, Any], timeout: Optional[float], op: str
+) -> Dict[str, Any]:
+    async with gms_limiter.slot(op):
+        _counters["requests"] += 1
+        with GMS_IN_FLIGHT.track(op=op), GMS_SECONDS.time(op=op):
+            r = await get_client().post(
+                url,
+                headers=headers,
+                json=body,
+                timeout=timeout if timeout is not None else GMS_TIMEOUT,
+                extensions={"trace": _trace},
+            )
+            r.raise_for_status()
+            return r.json()
+
+
+async def stream_events(
+    url: str, headers: Dict[str, str], body: Dict[str, Any], timeout: Optional[float] = None, op: str = "other"
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    공유 풀로 POST 후 SSE(text/event-stream) 이벤트를 받는 대로 JSON으로 yield.
+    서버가 스트리밍 없이 JSON 한 번에 주면 {"type": "response.completed", "response": ...} 하나로 변환.
+    (지표의 호출 시간은 스트림을 끝까지 받은 시점까지)
+    같은 요청이 진행 중이면 그 스트림에 합류해서 지금까지 온 이벤트부터 같이 받음.
+    """
+    if not GMS_SINGLE_FLIGHT:
+        async for ev in _stream_limited(url, headers, body, timeout, op):
+            yield ev
+        return
+
+    async def start(flight: _Flight) -> None:
+        async for ev in _stream_limited(url, headers, body, timeout, op):
+            flight.push(ev)
+
+    flight = _join(request_key(url, body), op, start)
+    i = 0
+    try:
+        while True:
+            while i < len(flight.events):
+                i += 1
+                yield flight.events[i - 1]
+            task = flight.task
+            if task.done():
+                task.result()  # 호출이 실패했으면 같은 예외
+                return
+            changed = flight.changed
+            await changed.wait()
+    finally:
+        flight.leave()
+
+
+async def _stream_limited(
+    url: str, headers: Dict[str, str], body: Dict[str, Any], timeout: Optional[float], op: str
+) -> AsyncIterator[Dict[str, Any]]:
+    # 스트림은 끝까지 받는 동안 자리를 차지함
+    async with gms_limiter.slot(op):
+        _counters["requests"] += 1
+        with GMS_IN_FLIGHT.track(op=op), GMS_SECONDS.time(op=op):
+            async for ev in _stream_events(url, headers, body, timeout):
+                yield ev
+
+
+async def _stream_events(url: str, headers: Dict[str, str], body: Dict[str, Any], timeout: Optional[float]) -> AsyncIterator[Dict[str, Any]]:
+    async with get_client().stream(
+        "POST",
+        url,
+        headers=headers,
+        json=body,
+        timeout=timeout if timeout is not None else GMS_TIMEOUT,
+        extensions={"trace": _trace},
+    ) as r:
+        r.raise_for_status()
+        if not r.headers.get("content-type", "").startswith("text/event-stream"):
+            yield {"type": "response.completed", "response": json.loads(await r.aread())}
+            return
+
+        async for line in r.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if not data or data == "[DONE]":
+                continue
+            try:
+                yield json.loads(data)
+            except ValueError:
+                continue
+
+
+def stats() -> Dict[str, Any]:
+    c = dict(_counters)
+    reqs = c["requests"]
+    c["reused_connections"] = max(0, reqs - c["new_connections"])
+    c["reuse_ratio"] = round(c["reused_connections"] / reqs, 4) if reqs else 0.0
+    c["http2"] = GMS_HTTP2 and _http2_available()
+    c["in_flight_keys"] = len(_flights)
+    c["limiter"] = gms_limiter.stats()
+    return c
@@ -0,0 +1,163 @@
+import time
+import uuid
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+
+
+class QueueFull(Exception):
+    """대기 중인 작업이 max_pending개 차서 더 못 받음 (API에서는 429)."""
+
+
+class JobFailed(Exception):
+    """
+    작업 함수가 실패 사유를 HTTP 상태 코드와 같이 남기고 싶을 때 raise.
+    (그 외 예외는 status_code 500으로 기록)
+    """
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(str(detail))
+        self.status_code = status_code
+        self.detail = detail
+
+
+class Job:
+    """
+    작업 하나의 상태. status: queued → running → done | error
+    stage/progress는 작업 함수가 job.update(...)로 갱신.
+    """
+
+    def __init__(self, fn: Callable[["Job"], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def update(self, stage: Optional[str] = None, **progress) -> None:
+        if stage is not None:
+            self.stage = stage
+        self.progress.update(progress)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def to_status(self) -> Dict[str, Any]:
+        out = {
+            "jobId": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": dict(self.progress),
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+class JobQueue:
+    """
+    프로세스 안의 작업 큐 + 고정 개수 워커(asyncio task).
+    - 대기 작업이 max_pending개면 submit에서 QueueFull (요청을 무한정 쌓지 않음)
+    - 끝난 작업 결과는 ttl_sec 동안만 보관 (submit/get 때 만료분 정리)
+    """
+
+    def __init__(self, workers: int, max_pending: int, ttl_sec: float):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.ttl_sec = ttl_sec
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+        self.counters = {"submitted": 0, "rejected": 0, "done": 0, "error": 0, "expired": 0}
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, fn: Callable[[Job], Awaitable[Any]]) -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobQueue not started")
+        self._expire()
+        if self._queue.qsize() >= self.max_pending:
+            self.counters["rejected"] += 1
+            raise QueueFull()
+        job = Job(fn)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self.counters["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int:
+        # 대기열에서 앞에 있는 작업 수 (queued가 아니면 0)
+        if job.status != "queued":
+            return 0
+        return sum(1 for j in self._jobs.values() if j.status == "queued" and j.created_at < job.created_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+            "stored": len(self._jobs),
+        }
+
+    def _expire(self) -> None:
+        now = time.time()
+        expired = [
+            jid for jid, j in self._jobs.items()
+            if j.finished and j.finished_at is not None and now - j.finished_at > self.ttl_sec
+        ]
+        for jid in expired:
+            del self._jobs[jid]
+        self.counters["expired"] += len(expired)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            self._running += 1
+            try:
+                job.result = await job.fn(job)
+                job.status = "done"
+                job.stage = "done"
+            except asyncio.CancelledError:
+                job.status = "error"
+                job.error = {"status_code": 503, "detail": "서버 종료로 작업이 취소되었습니다."}
+                raise
+            except JobFailed as e:
+                job.status = "error"
+                job.error = {"status_code": e.status_code, "detail": e.detail}
+            except Exception as e:
+                job.status = "error"
+                job.error = {"status_code": 500, "detail": str(e)}
+            finally:
+                self._running -= 1
+                job.finished_at = time.time()
+                job.fn = None  # 업로드 bytes 등 클로저가 잡고 있는 것 해제
+                self.counters[job.status] = self.counters.get(job.status, 0) + 1
+                self._queue.task_done()
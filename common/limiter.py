@@ -0,0 +1,173 @@
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+import httpx
+
+from common.metrics import GMS_QUEUE_SECONDS, GMS_CONCURRENCY_LIMIT, GMS_REJECTED
+
+# GMS(LLM) 동시 호출 한도 (AIMD: 성공하면 조금씩 올리고, 429/503/타임아웃이면 절반으로)
+# 0이면 한도 없이 바로 호출 (예전 동작)
+GMS_LIMITER = os.getenv("GMS_LIMITER", "1") == "1"
+GMS_LIMIT_INITIAL = int(os.getenv("GMS_LIMIT_INITIAL", "8"))
+GMS_LIMIT_MIN = int(os.getenv("GMS_LIMIT_MIN", "1"))
+GMS_LIMIT_MAX = int(os.getenv("GMS_LIMIT_MAX", os.getenv("GMS_POOL_MAX_CONNECTIONS", "20")))
+# 과부하 신호 때 한도에 곱하는 값
+GMS_LIMIT_BACKOFF = float(os.getenv("GMS_LIMIT_BACKOFF", "0.5"))
+# 호출 시간이 이 값(초)보다 길면 과부하 신호로 봄 (0이면 지연시간은 안 봄, LLM은 프롬프트마다 시간이 달라서 기본 끔)
+GMS_LIMIT_LATENCY_SEC = float(os.getenv("GMS_LIMIT_LATENCY_SEC", "0"))
+# 자리를 기다리는 최대 시간(초) / 최대 대기 수. 넘으면 GmsOverloaded (꼬리 지연이 끝없이 늘지 않게)
+GMS_LIMIT_QUEUE_TIMEOUT = float(os.getenv("GMS_LIMIT_QUEUE_TIMEOUT", "10"))
+GMS_LIMIT_MAX_QUEUE = int(os.getenv("GMS_LIMIT_MAX_QUEUE", "200"))
+
+# 한도를 줄이는 응답 상태 코드 (rate limit / 게이트웨이 과부하)
+_OVERLOAD_STATUS = {429, 502, 503, 504}
+
+
+class GmsOverloaded(httpx.PoolTimeout):
+    """
+    한도가 차서 GMS_LIMIT_QUEUE_TIMEOUT 안에 자리를 못 얻었거나 대기열이 가득 참.
+    httpx 예외(풀 타임아웃)로 두어서 GMS HTTP 오류와 같이 잡힘
+    (explain_rank_and_summary / explain_batch / analyze_contract_text가 gms_http.GMS_CALL_ERRORS로 잡아서 템플릿 fallback).
+    """
+
+
+def is_overload(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _OVERLOAD_STATUS
+    return isinstance(exc, httpx.TimeoutException) and not isinstance(exc, GmsOverloaded)
+
+
+class AdaptiveLimiter:
+    """
+    동시 호출 한도를 AIMD로 조정하는 FIFO 대기열.
+    - 한도를 다 쓰고 있을 때 성공하면 한도 += 1/한도 (한도만큼 성공하면 +1)
+    - 과부하 신호(429/502/503/504, 타임아웃, GMS_LIMIT_LATENCY_SEC 초과)면 한도 × backoff.
+      마지막으로 줄인 뒤에 시작한 호출의 신호만 봄 (같은 폭주로 몰린 실패 여러 개에 여러 번 줄이지 않음)
+    """
+
+    def __init__(
+        self,
+        initial: int = GMS_LIMIT_INITIAL,
+        min_limit: int = GMS_LIMIT_MIN,
+        max_limit: int = GMS_LIMIT_MAX,
+        backoff: float = GMS_LIMIT_BACKOFF,
+        latency_sec: float = GMS_LIMIT_LATENCY_SEC,
+        queue_timeout: float = GMS_LIMIT_QUEUE_TIMEOUT,
+        max_queue: int = GMS_LIMIT_MAX_QUEUE,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.latency_sec = latency_sec
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_drop = 0.0
+        self.counters = {"acquired": 0, "queued": 0, "rejected": 0, "timeouts": 0, "increases": 0, "drops": 0}
+        GMS_CONCURRENCY_LIMIT.set(int(self.limit))
+
+    async def _acquire(self, op: str) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.counters["acquired"] += 1
+            GMS_QUEUE_SECONDS.observe(0.0, op=op)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.counters["rejected"] += 1
+            GMS_REJECTED.inc(op=op, reason="queue_full")
+            raise GmsOverloaded(f"GMS 호출 대기열이 가득 참 ({self.max_queue})")
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.counters["queued"] += 1
+        t = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # 자리를 받은 직후에 타임아웃/취소 → 받은 자리는 돌려줌
+                self._release()
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.counters["timeouts"] += 1
+            GMS_REJECTED.inc(op=op, reason="queue_timeout")
+            raise GmsOverloaded(f"GMS 호출 자리를 {self.queue_timeout}초 안에 못 얻음") from None
+        finally:
+            GMS_QUEUE_SECONDS.observe(time.perf_counter() - t, op=op)
+        self.counters["acquired"] += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        # 한도 안에서 앞에서부터 자리 넘김 (in_flight는 여기서 미리 올려둠)
+        while self._waiters and self.in_flight < int(self.limit):
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(None)
+
+    def _on_success(self) -> None:
+        # 한도를 다 쓰고 있을 때만 올림 (한가할 때 한도만 끝없이 커지지 않게)
+        if self.in_flight >= int(self.limit) and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.counters["increases"] += 1
+            GMS_CONCURRENCY_LIMIT.set(int(self.limit))
+
+    def _on_overload(self, started: float) -> None:
+        if started < self._last_drop:
+            return
+        self._last_drop = time.monotonic()
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        self.counters["drops"] += 1
+        GMS_CONCURRENCY_LIMIT.set(int(self.limit))
+
+    @asynccontextmanager
+    async def slot(self, op: str = "other") -> AsyncIterator[None]:
+        """
+        자리 하나를 잡고 블록 실행. 블록에서 난 예외로 과부하 여부를 판단해서 한도를 조정.
+        (과부하와 상관없는 예외 — 400/401, JSON 오류 등 — 는 한도를 건드리지 않음)
+        """
+        if not GMS_LIMITER:
+            yield
+            return
+        await self._acquire(op)
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            if is_overload(e):
+                self._on_overload(started)
+            raise
+        else:
+            if self.latency_sec > 0 and time.monotonic() - started > self.latency_sec:
+                self._on_overload(started)
+            else:
+                self._on_success()
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "enabled": GMS_LIMITER,
+            "limit": int(self.limit),
+            "limit_exact": round(self.limit, 3),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+        }
+
+
+gms_limiter = AdaptiveLimiter()
@@ -0,0 +1,194 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 단계별 지연시간/크기/캐시 지표 (GET /metrics 에서 Prometheus text 형식으로 내보냄)
+# prometheus_client 없이 최소 구현: 값 갱신은 lock + dict 갱신 정도라 운영에서 켜둬도 부담 없음
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "dozip")
+
+# 초 단위 기본 버킷 (페이지 렌더링 ms ~ LLM 호출 수십 초)
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 크기(bytes/글자/토큰) 버킷
+SIZE_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000, 5000000)
+
+LabelKey = Tuple[str, ...]
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = f"{METRICS_PREFIX}_{name}" if METRICS_PREFIX else name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1.0, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, value: float = 1.0, **labels) -> None:
+        self.inc(-value, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        # 블록 안에 있는 동안 +1 (in-flight 개수)
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = TIME_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨별 [버킷별 개수..., +Inf 개수], 합계
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[i] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        lines = self.header()
+        for key, counts, total in items:
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, ('le', _fmt_value(le)))} {acc}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {acc}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+# 내보낼 때마다 호출해서 다른 모듈의 stats()를 gauge로 옮겨 담는 함수들
+_COLLECTORS: List[Callable[[], None]] = []
+
+
+def register_collector(fn: Callable[[], None]) -> Callable[[], None]:
+    _COLLECTORS.append(fn)
+    return fn
+
+
+def render() -> str:
+    for fn in _COLLECTORS:
+        try:
+            fn()
+        except Exception:
+            # 지표 하나 못 모아도 나머지는 내보냄
+            pass
+    lines: List[str] = []
+    for m in REGISTRY:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# 공용 지표
+# ---------------------------------------------------------------------------
+
+STAGE_SECONDS = Histogram(
+    "stage_seconds", "처리 단계별 소요 시간(초)", ["stage"],
+)
+HTTP_SECONDS = Histogram(
+    "http_request_seconds", "HTTP 요청 처리 시간(초, 스트리밍 응답은 헤더까지)", ["method", "route", "status"],
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "처리 중인 HTTP 요청 수")
+
+OCR_PAGES = Counter("ocr_pages_total", "처리한 페이지 수 (source: text_layer/ocr_cache/ocr)", ["source"])
+OCR_BYTES_SENT = Counter("ocr_bytes_sent_total", "Vision으로 보낸 이미지 bytes")
+OCR_IN_FLIGHT = Gauge("ocr_batches_in_flight", "진행 중인 Vision 배치 요청 수")
+
+GMS_SECONDS = Histogram("gms_request_seconds", "GMS(LLM) 호출 왕복 시간(초)", ["op"])
+GMS_IN_FLIGHT = Gauge("gms_requests_in_flight", "진행 중인 GMS(LLM) 호출 수", ["op"])
+GMS_REUSE_RATIO = Gauge("gms_connection_reuse_ratio", "GMS 호출 중 기존 keep-alive 연결을 재사용한 비율")
+LLM_PROMPT_CHARS = Histogram("llm_prompt_chars", "LLM 프롬프트 글자 수", ["op"], SIZE_BUCKETS)
+LLM_PROMPT_TOKENS = Histogram("llm_prompt_tokens", "LLM 프롬프트 토큰 수(추정 포함)", ["op"], SIZE_BUCKETS)
+LLM_RESPONSE_CHARS = Histogram("llm_response_chars", "LLM 응답 텍스트 글자 수", ["op"], SIZE_BUCKETS)
+
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "캐시 적중률", ["cache"])
+CACHE_ITEMS = Gauge("cache_items", "캐시에 들어있는 항목 수", ["cache"])
+QUEUE_DEPTH = Gauge("queue_depth", "작업 큐 상태 (state: pending/running)", ["queue", "state"])
+GMS_QUEUE_SECONDS = Histogram("gms_queue_wait_seconds", "GMS 동시 호출 한도 때문에 자리를 기다린 시간(초)", ["op"])
+GMS_CONCURRENCY_LIMIT = Gauge("gms_concurrency_limit", "GMS 동시 호출 한도 (AIMD로 자동 조정)")
+GMS_REJECTED = Counter("gms_rejected_total", "자리를 못 얻고 거절된 GMS 호출 수 (reason: queue_full/queue_timeout)", ["op", "reason"])
+GMS_COALESCED = Counter("gms_coalesced_total", "진행 중인 같은 요청에 합쳐져서 따로 호출하지 않은 GMS 요청 수", ["op"])
@@ -1,38 +1,93 @@
-import os, json
-import httpx
-from typing import Dict, Any
+import os, re, json
+import asyncio
+from common.gms_http import post_json, GMS_CALL_ERRORS
+from common.metrics import LLM_PROMPT_CHARS, LLM_RESPONSE_CHARS
+from typing import Dict, Any, List, Optional
 
 GMS_BASE_URL = os.getenv("GMS_BASE_URL", "https://gms.ssafy.io/gmsapi/api.openai.com/v1")
 GMS_KEY = os.getenv("GMS_KEY")
+GMS_ANALYZE_TIMEOUT = float(os.getenv("GMS_ANALYZE_TIMEOUT", "30"))
+# 한 번의 LLM 호출에 넣는 최대 글자 수 (예전 12000자 자르기와 같은 크기), 넘으면 여러 조각으로 나눠서 동시 분석
+GMS_ANALYZE_CHUNK_CHARS = int(os.getenv("GMS_ANALYZE_CHUNK_CHARS", "12000"))
+GMS_ANALYZE_CONCURRENCY = int(os.getenv("GMS_ANALYZE_CONCURRENCY", "4"))
 
-async def analyze_contract_text(full_text: str) -> Dict[str, Any]:
-    if not GMS_KEY:
-        return {"enabled": False, "error": "GMS_KEY not set"}
+_PROMPT_HEAD = (
+    "다음은 OCR로 추출한 한국 임대차 계약서 텍스트입니다.\n"
+    "법적 판단(진위 확정)은 하지 말고, 일반적인 계약서와 비교했을 때\n"
+    "필수 항목 누락/빈칸, 문맥 단절, 비정상적 표현, 위조 의심 신호가 있는지 점검하세요.\n"
+)
+_PROMPT_PART = (
+    "다음은 OCR로 추출한 한국 임대차 계약서 텍스트의 일부({i}/{n})입니다.\n"
+    "법적 판단(진위 확정)은 하지 말고, 일반적인 계약서와 비교했을 때\n"
+    "이 부분 안의 빈칸, 문맥 단절, 비정상적 표현, 위조 의심 신호가 있는지 점검하세요.\n"
+    "다른 부분에 있을 수 있는 항목이 이 부분에 없다는 이유만으로 누락이라고 하지 마세요.\n"
+)
+_PROMPT_TAIL = (
+    "JSON으로만 답하세요. 스키마:\n"
+    "{ \"suspicious\": boolean, \"risk\": 0-100, \"reasons\": string[] }\n\n"
+    "OCR TEXT:\n"
+)
 
-    prompt = (
-        "다음은 OCR로 추출한 한국 임대차 계약서 텍스트입니다.\n"
-        "법적 판단(진위 확정)은 하지 말고, 일반적인 계약서와 비교했을 때\n"
-        "필수 항목 누락/빈칸, 문맥 단절, 비정상적 표현, 위조 의심 신호가 있는지 점검하세요.\n"
-        "JSON으로만 답하세요. 스키마:\n"
-        "{ \"suspicious\": boolean, \"risk\": 0-100, \"reasons\": string[] }\n\n"
-        f"OCR TEXT:\n{full_text[:12000]}"  # 길이 제한(비용/토큰)
-    )
+# 조항/특약 시작 줄 (긴 페이지를 나눌 때 이 줄 앞에서 자름)
+_SECTION_START = re.compile(r"^\s*(제\s*\d+\s*조|특\s*약|\[?\s*특약\s*사항|\d+\s*[.)]\s)", re.M)
 
-    url = f"{GMS_BASE_URL}/responses"
-    headers = {
-        "Authorization": f"Bearer {GMS_KEY}",
-        "Content-Type": "application/json",
-    }
-    body = {
-        "model": "gpt-4.1",
-        "input": prompt,
-    }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.post(url, headers=headers, json=body)
-        r.raise_for_status()
-        data = r.json()
+def _split_long(text: str, limit: int) -> List[str]:
+    """
+    limit보다 긴 텍스트를 조항 경계 → 줄 경계 → 글자 수 순으로 잘라서 limit 이하 조각으로.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    cuts = [m.start() for m in _SECTION_START.finditer(text) if m.start() > 0]
+    sections = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
 
+    out: List[str] = []
+    for sec in sections:
+        if len(sec) <= limit:
+            out.append(sec)
+            continue
+        buf = ""
+        for line in sec.splitlines(keepends=True):
+            while len(line) > limit:
+                if buf:
+                    out.append(buf)
+                    buf = ""
+                out.append(line[:limit])
+                line = line[limit:]
+            if len(buf) + len(line) > limit:
+                out.append(buf)
+                buf = ""
+            buf += line
+        if buf:
+            out.append(buf)
+    return out
+
+
+def split_contract_text(full_text: str, pages: Optional[List[str]] = None, limit: int = GMS_ANALYZE_CHUNK_CHARS) -> List[str]:
+    """
+    페이지(없으면 전체 텍스트)를 순서대로 limit 글자 이하 조각으로 묶음.
+    페이지/조항 경계에서만 자르고, 한 페이지가 limit보다 길 때만 페이지 안에서 나눔.
+    """
+    parts: List[str] = []
+    for page in (pages if pages is not None else [full_text]):
+        parts.extend(_split_long(page or "", limit))
+
+    chunks: List[str] = []
+    buf = ""
+    for part in parts:
+        if not part.strip():
+            continue
+        if buf and len(buf) + 1 + len(part) > limit:
+            chunks.append(buf)
+            buf = ""
+        buf = f"{buf}\n{part}" if buf else part
+    if buf:
+        chunks.append(buf)
+    return chunks or [""]
+
+
+def _output_text(data: Dict[str, Any]) -> str:
     # responses API는 output 텍스트를 파싱해야 함(형태가 다양할 수 있음)
     # 여기서는 가장 단순한 케이스로 output_text 추출 시도
     text = data.get("output_text")
@@ -44,9 +99,120 @@ async def analyze_contract_text(full_text: str) -> Dict[str, Any]:
                 if c.get("type") == "output_text":
                     out.append(c.get("text", ""))
         text = "\n".join(out).strip()
+    return text
+
+
+async def _analyze_chunk(prompt: str) -> Dict[str, Any]:
+    url = f"{GMS_BASE_URL}/responses"
+    headers = {
+        "Authorization": f"Bearer {GMS_KEY}",
+        "Content-Type": "application/json",
+    }
+    body = {
+        "model": "gpt-4.1",
+        "input": prompt,
+    }
+
+    LLM_PROMPT_CHARS.observe(len(prompt), op="contract_analyze")
+    # 공유 커넥션 풀 사용 (요청마다 TCP/TLS 연결을 새로 맺지 않음)
+    data = await post_json(url, headers, body, timeout=GMS_ANALYZE_TIMEOUT, op="contract_analyze")
+    text = _output_text(data)
+    LLM_RESPONSE_CHARS.observe(len(text or ""), op="contract_analyze")
 
     try:
         parsed = json.loads(text)
         return {"enabled": True, **parsed}
     except Exception:
         return {"enabled": True, "raw": text}
+
+
+def _risk_value(x: Any) -> Optional[float]:
+    if isinstance(x, bool) or x is None:
+        return None
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_chunk_results(results: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    조각별 결과를 하나로 합침 (조각 순서대로 처리해서 결과가 항상 같음).
+    suspicious: 하나라도 true면 true / risk: 최댓값 / reasons: 순서 유지하며 중복 제거
+    호출이 실패한 조각은 None으로 넘기면 건너뜀.
+    """
+    suspicious = False
+    risks: List[float] = []
+    reasons: List[str] = []
+    seen = set()
+    raws = []
+
+    for i, r in enumerate(results):
+        if r is None:
+            continue
+        if "raw" in r:
+            raws.append({"chunk": i, "raw": r["raw"]})
+            continue
+        suspicious = suspicious or r.get("suspicious") is True
+        risk = _risk_value(r.get("risk"))
+        if risk is not None:
+            risks.append(risk)
+        for reason in r.get("reasons") or []:
+            reason = str(reason).strip()
+            if reason and reason not in seen:
+                seen.add(reason)
+                reasons.append(reason)
+
+    if len(raws) == sum(r is not None for r in results):
+        return {"enabled": True, "raw": "\n".join(x["raw"] for x in raws)}
+
+    risk = max(risks) if risks else None
+    out = {
+        "enabled": True,
+        "suspicious": suspicious,
+        "risk": int(risk) if risk is not None and risk.is_integer() else risk,
+        "reasons": reasons,
+    }
+    if raws:
+        out["raw_chunks"] = raws
+    return out
+
+
+async def analyze_contract_text(full_text: str, pages: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    계약서 텍스트 전체를 LLM으로 점검.
+    GMS_ANALYZE_CHUNK_CHARS보다 길면 페이지/조항 경계로 나눠서 동시에(GMS_ANALYZE_CONCURRENCY개까지) 분석하고
+    merge_chunk_results로 합침. pages(페이지별 텍스트)를 주면 페이지 경계를 우선 사용.
+    GMS 호출이 실패하면(GMS_CALL_ERRORS: HTTP 오류·한도 초과, JSON이 아닌 응답) 예외 대신 enabled=False + error
+    (일부 조각만 실패하면 나머지로 합치고 chunk_errors에 표시).
+    """
+    if not GMS_KEY:
+        return {"enabled": False, "error": "GMS_KEY not set"}
+
+    chunks = split_contract_text(full_text, pages)
+    if len(chunks) == 1:
+        try:
+            return await _analyze_chunk(_PROMPT_HEAD + _PROMPT_TAIL + chunks[0])
+        except GMS_CALL_ERRORS as e:
+            return {"enabled": False, "error": f"{type(e).__name__}: {e}"}
+
+    sem = asyncio.Semaphore(GMS_ANALYZE_CONCURRENCY)
+
+    async def run(i: int, chunk: str) -> Dict[str, Any]:
+        async with sem:
+            return await _analyze_chunk(_PROMPT_PART.format(i=i + 1, n=len(chunks)) + _PROMPT_TAIL + chunk)
+
+    results = await asyncio.gather(*(run(i, c) for i, c in enumerate(chunks)), return_exceptions=True)
+
+    errors = [{"chunk": i, "error": str(r)} for i, r in enumerate(results) if isinstance(r, BaseException)]
+    if len(errors) == len(results):
+        # 조각 전부 GMS 오류면 분석 없이 (OCR/필드 추출 결과는 그대로 응답)
+        if all(isinstance(r, GMS_CALL_ERRORS) for r in results):
+            return {"enabled": False, "error": f"{type(results[0]).__name__}: {results[0]}", "chunks": len(chunks), "chunk_errors": errors}
+        raise results[0]
+
+    out = merge_chunk_results([None if isinstance(r, BaseException) else r for r in results])
+    out["chunks"] = len(chunks)
+    if errors:
+        out["chunk_errors"] = errors
+    return out
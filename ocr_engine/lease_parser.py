@@ -1,20 +1,27 @@
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
+
+from ocr_engine.text_index import TextIndex, as_index, ADDRESS_LABEL, NAME_TERM
+
+_SPACES = re.compile(r"[ \t]+")
+_ADDR_CUT = re.compile(r"(토지|건물|구조|용도|대지권|면적)\b")
+
+name_pat = re.compile(r"^성명\s*([가-힣]{2,4})$")
+# "B 성명 빈지향" 같은 변형도 허용
+name_pat2 = re.compile(r".*성명\s*([가-힣]{2,4})")
 
 def _clean(text: str) -> str:
-    return re.sub(r"[ \t]+", " ", (text or "")).strip()
+    return _SPACES.sub(" ", (text or "")).strip()
 
-def _line_after_label(full_text: str, label_regex: str) -> Optional[str]:
-    for line in full_text.splitlines():
-        if re.search(label_regex, line):
-            parts = re.split(label_regex, line, maxsplit=1)
-            if len(parts) == 2:
-                return _clean(parts[1].lstrip(":： ").strip())
-    return None
+def _line_after_label(idx: TextIndex, label_regex: str) -> Optional[str]:
+    tail = idx.label_tail(label_regex)
+    if tail is None:
+        return None
+    return _clean(tail.lstrip(":： ").strip())
 
-def extract_lease_fields(full_text: str) -> Dict[str, Any]:
-    full_text = full_text or ""
-    lines = [l.strip() for l in full_text.splitlines() if l.strip()]
+def extract_lease_fields(full_text: Union[str, TextIndex]) -> Dict[str, Any]:
+    idx = as_index(full_text)
+    lines = idx.lines
 
     out: Dict[str, Any] = {
         "tenant_name": None,
@@ -25,9 +32,9 @@ def extract_lease_fields(full_text: str) -> Dict[str, Any]:
     # -------------------------
     # 1) 주소 (지금 너 결과처럼 잘 나오게 유지)
     # -------------------------
-    addr = _line_after_label(full_text, r"^\s*소\s*재\s*지\s*")
+    addr = _line_after_label(idx, ADDRESS_LABEL)
     if addr:
-        addr = re.split(r"(토지|건물|구조|용도|대지권|면적)\b", addr)[0].strip()
+        addr = _ADDR_CUT.split(addr)[0].strip()
         out["debug"]["address_candidates"].append(addr)
         out["address_raw"] = addr
 
@@ -35,19 +42,16 @@ def extract_lease_fields(full_text: str) -> Dict[str, Any]:
     # 2) 임차인 이름: "임대인 임차인" 구역 근처에서 탐색
     # -------------------------
     # (A) '임대인 임차인' 라인 이후 30줄 안에서 '성명 김xx' 후보 수집
-    start_idx = None
-    for i, line in enumerate(lines):
-        if "임대인" in line and "임차인" in line:
-            start_idx = i
-            break
+    both = set(idx.term_lines("임대인")) & set(idx.term_lines("임차인"))
+    start_idx = min(both) if both else None
 
-    name_pat = re.compile(r"^성명\s*([가-힣]{2,4})$")
-    # "B 성명 빈지향" 같은 변형도 허용
-    name_pat2 = re.compile(r".*성명\s*([가-힣]{2,4})")
+    # '성명'이 들어있는 라인만 이름 패턴 검사
+    name_lines = idx.term_lines(NAME_TERM)
 
     if start_idx is not None:
-        window = lines[start_idx : min(len(lines), start_idx + 30)]
-        for w in window:
+        window = [i for i in name_lines if start_idx <= i < start_idx + 30]
+        for i in window:
+            w = lines[i]
             m = name_pat.search(w) or name_pat2.search(w)
             if m:
                 out["debug"]["tenant_candidates"].append(m.group(1))
@@ -63,7 +67,8 @@ def extract_lease_fields(full_text: str) -> Dict[str, Any]:
     # (B) fallback: 문서 끝부분에서 '성명 김xx'를 찾으면 마지막 것을 임차인 후보로
     if out["tenant_name"] is None:
         all_names = []
-        for line in lines:
+        for i in name_lines:
+            line = lines[i]
             m = name_pat.search(line) or name_pat2.search(line)
             if m:
                 all_names.append(m.group(1))
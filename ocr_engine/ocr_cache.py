@@ -0,0 +1,224 @@
+import os
+import time
+import asyncio
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Iterable
+
+# 메모리 LRU에 둘 항목 수
+OCR_CACHE_MEM_ITEMS = int(os.getenv("OCR_CACHE_MEM_ITEMS", "512"))
+# 디스크(SQLite) 캐시 경로. 비어 있으면 디스크 캐시 사용 안 함 (uvicorn 워커끼리 공유하려면 지정)
+OCR_CACHE_DB = os.getenv("OCR_CACHE_DB", "")
+OCR_CACHE_TTL_SEC = int(os.getenv("OCR_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+# namespace별 디스크 최대 항목 수 (넘으면 오래 안 쓴 것부터 삭제)
+OCR_CACHE_DB_MAX_ITEMS = int(os.getenv("OCR_CACHE_DB_MAX_ITEMS", "20000"))
+# 디스크 캐시 적중 때 last_access를 다시 쓰는 최소 간격(초). 적중할 때마다 쓰면 읽기가 전부 디스크 쓰기가 됨
+OCR_CACHE_TOUCH_SEC = int(os.getenv("OCR_CACHE_TOUCH_SEC", "3600"))
+# set 몇 번마다 디스크 만료/용량 정리할지
+_PRUNE_EVERY = 200
+
+
+def content_key(chunks: Iterable[bytes], **params: Any) -> str:
+    """
+    bytes 내용 + 렌더링/처리 파라미터(zoom 등)로 만든 sha256 키.
+    """
+    h = hashlib.sha256()
+    for c in chunks:
+        h.update(hashlib.sha256(c).digest())
+    h.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+class OcrCache:
+    """
+    2단 캐시: 프로세스 메모리 LRU + (선택) SQLite 디스크 캐시.
+    값은 문자열(OCR 텍스트 / JSON)로 저장.
+    이벤트 루프에서는 aget/aset(_json)을 씀: 메모리 조회는 바로, 디스크 조회/저장은 asyncio.to_thread로.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        mem_items: int = OCR_CACHE_MEM_ITEMS,
+        db_path: str = OCR_CACHE_DB,
+        ttl_sec: int = OCR_CACHE_TTL_SEC,
+        db_max_items: int = OCR_CACHE_DB_MAX_ITEMS,
+        touch_sec: int = OCR_CACHE_TOUCH_SEC,
+    ):
+        self.namespace = namespace
+        self.mem_items = mem_items
+        self.ttl_sec = ttl_sec
+        self.db_max_items = db_max_items
+        self.touch_sec = touch_sec
+
+        self._mem: "OrderedDict[str, tuple]" = OrderedDict()
+        # 메모리 LRU용 / SQLite용 락을 따로 (디스크 조회 중에도 메모리 적중은 안 기다림)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._sets = 0
+        self.counters = {"hits_mem": 0, "hits_disk": 0, "misses": 0, "sets": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+            # 여러 워커 프로세스가 동시에 읽고 쓸 수 있게 WAL
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL,"
+                " PRIMARY KEY (ns, key))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS ocr_cache_access ON ocr_cache (ns, last_access)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._get_mem(key, now)
+        if value is None and self._db is not None:
+            value = self._get_disk(key, now)
+        if value is None:
+            self._count("misses")
+        return value
+
+    async def aget(self, key: str) -> Optional[str]:
+        """
+        get과 같음. 메모리에 없을 때 디스크(SQLite) 조회만 스레드에서 (이벤트 루프를 막지 않게).
+        """
+        now = time.time()
+        value = self._get_mem(key, now)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._get_disk, key, now)
+        if value is None:
+            self._count("misses")
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        self._set_mem(key, value, now)
+        if self._db is not None:
+            self._set_disk(key, value, now)
+
+    async def aset(self, key: str, value: str) -> None:
+        now = time.time()
+        self._set_mem(key, value, now)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, value, now)
+
+    def get_json(self, key: str) -> Optional[Dict[str, Any]]:
+        return _loads(self.get(key))
+
+    async def aget_json(self, key: str) -> Optional[Dict[str, Any]]:
+        return _loads(await self.aget(key))
+
+    def set_json(self, key: str, value: Dict[str, Any]) -> None:
+        self.set(key, json.dumps(value, ensure_ascii=False))
+
+    async def aset_json(self, key: str, value: Dict[str, Any]) -> None:
+        await self.aset(key, json.dumps(value, ensure_ascii=False))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _get_mem(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is None:
+                return None
+            value, created_at = hit
+            if now - created_at > self.ttl_sec:
+                del self._mem[key]
+                return None
+            self._mem.move_to_end(key)
+            self.counters["hits_mem"] += 1
+            return value
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        with self._db_lock:
+            try:
+                row = self._db.execute(
+                    "SELECT value, created_at, last_access FROM ocr_cache WHERE ns = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl_sec:
+                    return None
+                # 읽을 때마다 쓰지 않고 last_access가 OCR_CACHE_TOUCH_SEC보다 오래됐을 때만 갱신 (용량 정리 순서용이라 대략이면 충분)
+                if now - row[2] >= self.touch_sec:
+                    self._db.execute(
+                        "UPDATE ocr_cache SET last_access = ? WHERE ns = ? AND key = ?",
+                        (now, self.namespace, key),
+                    )
+                    self._db.commit()
+            except sqlite3.Error:
+                # 디스크 캐시 문제로 요청이 실패하면 안 됨
+                return None
+        with self._lock:
+            self._mem_put(key, row[0], row[1])
+            self.counters["hits_disk"] += 1
+        return row[0]
+
+    def _set_mem(self, key: str, value: str, now: float) -> None:
+        with self._lock:
+            self._mem_put(key, value, now)
+            self.counters["sets"] += 1
+
+    def _set_disk(self, key: str, value: str, now: float) -> None:
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (ns, key, value, created_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, value, now, now),
+                )
+                self._sets += 1
+                if self._sets % _PRUNE_EVERY == 0:
+                    self._prune(now)
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            c = dict(self.counters)
+            c["mem_items"] = len(self._mem)
+        lookups = c["hits_mem"] + c["hits_disk"] + c["misses"]
+        c["hit_ratio"] = round((c["hits_mem"] + c["hits_disk"]) / lookups, 4) if lookups else 0.0
+        return c
+
+    def _mem_put(self, key: str, value: str, created_at: float) -> None:
+        self._mem[key] = (value, created_at)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.mem_items:
+            self._mem.popitem(last=False)
+
+    def _prune(self, now: float) -> None:
+        self._db.execute(
+            "DELETE FROM ocr_cache WHERE ns = ? AND created_at < ?",
+            (self.namespace, now - self.ttl_sec),
+        )
+        self._db.execute(
+            "DELETE FROM ocr_cache WHERE ns = ? AND key IN ("
+            " SELECT key FROM ocr_cache WHERE ns = ?"
+            " ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.db_max_items),
+        )
+
+
+def _loads(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except Exception:
+        return None
+
+
+# 페이지 단위 OCR 텍스트 / 문서 단위 /extract 결과
+page_cache = OcrCache("page")
+doc_cache = OcrCache("doc")
@@ -0,0 +1,121 @@
+import os
+import asyncio
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Union, Callable
+
+from ocr_engine.vision_client import ocr_document_texts_batch, VISION_BATCH_SIZE, VISION_BATCH_MAX_BYTES
+from ocr_engine.ocr_cache import page_cache, content_key
+from common.metrics import STAGE_SECONDS, OCR_PAGES, OCR_BYTES_SENT, OCR_IN_FLIGHT
+
+# 동시에 날릴 Vision 요청(배치) 수 (Vision 쿼터 보면서 조정)
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "4"))
+
+
+async def ocr_page_stream(
+    pages: Iterable[Tuple[int, Union[bytes, str]]],
+    concurrency: int = OCR_CONCURRENCY,
+    cache_params: Optional[Dict[str, Any]] = None,
+    on_page: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    (페이지 인덱스, 페이지 이미지)를 하나씩 받아가며 배치로 묶어서 동시에 OCR.
+    - pages는 제너레이터여도 됨. 다음 페이지 꺼내기(렌더링)도 스레드에서 실행
+    - 페이지가 순서대로 오지 않아도 됨 (렌더링 풀에서 끝나는 순서대로 오는 경우)
+    - str 페이지는 이미 텍스트(PDF 텍스트 레이어)라서 OCR 없이 그대로 사용
+    - 진행 중인 배치가 concurrency개 차 있으면 다음 페이지 렌더링도 기다림
+      → 메모리에 올라가는 페이지 이미지 수가 문서 길이와 무관하게 제한됨
+    - 페이지 bytes 해시 + cache_params(zoom 등)로 캐시를 먼저 보고, 없는 페이지만 Vision 호출
+    - 페이지 여러 장을 batch_annotate_images 한 번으로 보내서 왕복 횟수를 줄임
+    - 결과 texts는 입력 페이지 순서 그대로 (실패한 페이지는 "")
+    - sources: 페이지별 처리 경로 ("text_layer" / "ocr_cache" / "ocr")
+    - errors: [{"page": 1부터 시작하는 페이지 번호, "error": "..."}]
+    - on_page(페이지 인덱스): 페이지 하나가 끝날 때마다 호출 (진행률 표시용)
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    params = cache_params or {}
+    texts: Dict[int, str] = {}
+    sources: Dict[int, str] = {}
+    errors: List[Dict[str, Any]] = []
+    tasks: List[asyncio.Task] = []
+    done = on_page or (lambda i: None)
+
+    async def _run(batch: List[tuple]):
+        try:
+            OCR_BYTES_SENT.inc(sum(len(b) for _, _, b in batch))
+            with OCR_IN_FLIGHT.track(), STAGE_SECONDS.time(stage="vision_batch"):
+                outs = await asyncio.to_thread(ocr_document_texts_batch, [b for _, _, b in batch])
+        except Exception as e:
+            outs = [("", str(e))] * len(batch)
+        finally:
+            sem.release()
+        for (i, key, _), (text, err) in zip(batch, outs):
+            texts[i] = text
+            if err is not None:
+                errors.append({"page": i + 1, "error": err})
+            else:
+                await page_cache.aset(key, text)
+            done(i)
+
+    async def _flush(batch: List[tuple]):
+        await sem.acquire()
+        tasks.append(asyncio.create_task(_run(batch)))
+
+    it = iter(pages)
+    batch: List[tuple] = []
+    batch_bytes = 0
+    try:
+        while True:
+            item = await asyncio.to_thread(next, it, None)
+            if item is None:
+                break
+            i, b = item
+            if isinstance(b, str):
+                texts[i] = b
+                sources[i] = "text_layer"
+                done(i)
+                continue
+            texts[i] = ""
+            sources[i] = "ocr"
+
+            key = content_key([b], **params)
+            cached = await page_cache.aget(key)
+            if cached is not None:
+                texts[i] = cached
+                sources[i] = "ocr_cache"
+                done(i)
+                continue
+
+            if batch and (len(batch) >= VISION_BATCH_SIZE or batch_bytes + len(b) > VISION_BATCH_MAX_BYTES):
+                await _flush(batch)
+                batch, batch_bytes = [], 0
+            batch.append((i, key, b))
+            batch_bytes += len(b)
+
+        if batch:
+            await _flush(batch)
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        raise
+
+    errors.sort(key=lambda e: e["page"])
+    for src in sources.values():
+        OCR_PAGES.inc(source=src)
+    n = max(texts) + 1 if texts else 0
+    return {
+        "texts": [texts.get(i, "") for i in range(n)],
+        "sources": [sources.get(i, "") for i in range(n)],
+        "errors": errors,
+    }
+
+
+async def ocr_pages(
+    pages: List[bytes],
+    concurrency: int = OCR_CONCURRENCY,
+    cache_params: Optional[Dict[str, Any]] = None,
+    on_page: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    이미 메모리에 있는 페이지 이미지 목록 OCR (ocr_page_stream과 결과 형식 동일).
+    """
+    return await ocr_page_stream(enumerate(pages), concurrency=concurrency, cache_params=cache_params, on_page=on_page)
@@ -1,29 +1,235 @@
+import os
+import re
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
 import fitz  # PyMuPDF
 import cv2
 import numpy as np
 
-def render_pdf_pages_to_jpeg_bytes(pdf_path: str, zoom: float = 2.0) -> list[bytes]:
+from common.metrics import STAGE_SECONDS
+
+# 너무 긴 PDF는 렌더링 시작 전에 거절 (메모리/OCR 비용 보호)
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "60"))
+# 텍스트 레이어에 한글이 이만큼 있으면 렌더링/OCR 없이 그 텍스트를 그대로 씀
+TEXT_LAYER_MIN_HANGUL = int(os.getenv("TEXT_LAYER_MIN_HANGUL", "30"))
+
+_HANGUL = re.compile(r"[가-힣]")
+
+# OCR로 보내기 전 전처리 프로파일 (OCR_PROFILE 또는 /extract?profile=로 선택)
+# - dpi: 이 해상도보다 크면 줄임 (None이면 그대로)
+# - crop_margins: 여백 잘라내기 / deskew: 기울기 보정 / binarize: 적응형 이진화
+# - format/quality/png_compression: 인코딩 설정
+PROFILES: Dict[str, Dict[str, Any]] = {
+    # 기존 동작 그대로 (zoom 해상도, JPEG 기본 품질)
+    "default": {"dpi": None, "crop_margins": False, "deskew": False, "binarize": False, "format": "jpg", "quality": 95},
+    "compact": {"dpi": 110, "crop_margins": True, "deskew": False, "binarize": False, "format": "jpg", "quality": 70},
+    "clean": {"dpi": 144, "crop_margins": True, "deskew": True, "binarize": False, "format": "jpg", "quality": 80},
+    "binary": {"dpi": 144, "crop_margins": True, "deskew": True, "binarize": True, "format": "png", "png_compression": 9},
+}
+OCR_PROFILE = os.getenv("OCR_PROFILE", "default")
+# default 프로파일이 아닐 때 bytes_before(default로 보냈을 크기)를 잴지.
+# 재려면 페이지마다 default 전처리/인코딩을 한 번 더 (DPI를 낮추는 프로파일은 원래 해상도로 다시 렌더링까지) 해야 해서
+# 운영에서는 끄고 프로파일 비교할 때만 켬. 꺼져 있으면 bytes_before는 None
+OCR_MEASURE_BASELINE = os.getenv("OCR_MEASURE_BASELINE", "0") == "1"
+
+# 업로드 이미지는 DPI 정보가 없어서 A4 긴 변(인치) 기준으로 추정
+_A4_LONG_INCH = 11.69
+
+
+def open_pdf(pdf: Union[str, bytes], max_pages: int = MAX_PDF_PAGES) -> fitz.Document:
     """
-    PDF를 페이지별 JPEG bytes 리스트로 변환.
+    PDF 경로 또는 메모리 bytes를 열고 페이지 수 제한을 먼저 확인.
+    (업로드 bytes는 임시파일 없이 바로 연다)
     """
-    doc = fitz.open(pdf_path)
-    outputs: list[bytes] = []
+    if isinstance(pdf, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=pdf, filetype="pdf")
+    else:
+        doc = fitz.open(pdf)
 
-    mat = fitz.Matrix(zoom, zoom)
-    for i in range(len(doc)):
-        page = doc.load_page(i)
-        pix = page.get_pixmap(matrix=mat)
+    if max_pages and doc.page_count > max_pages:
+        n = doc.page_count
+        doc.close()
+        raise ValueError(f"PDF 페이지 수 초과: {n}쪽 (최대 {max_pages}쪽)")
+    return doc
+
+
+def get_profile(name: Optional[str]) -> Dict[str, Any]:
+    profile = PROFILES.get(name or OCR_PROFILE)
+    if profile is None:
+        raise ValueError(f"알 수 없는 전처리 프로파일: {name} (가능: {', '.join(PROFILES)})")
+    return profile
+
+
+def _deskew(gray: np.ndarray) -> np.ndarray:
+    # 글자(어두운 픽셀) 전체를 감싸는 최소 사각형의 각도로 기울기 추정
+    inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+    pts = cv2.findNonZero(inv)
+    if pts is None or len(pts) < 100:
+        return gray
+    # 각도 범위가 OpenCV 버전마다 달라서 90도 주기로 (-45, 45] 안으로 맞춤
+    angle = cv2.minAreaRect(pts)[2]
+    if angle > 45:
+        angle -= 90
+    elif angle <= -45:
+        angle += 90
+    # 너무 작으면 보정 의미 없고, 너무 크면 추정이 틀렸을 가능성이 큼
+    if abs(angle) < 0.3 or abs(angle) > 15:
+        return gray
+    h, w = gray.shape
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(gray, m, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+
+def _crop_margins(gray: np.ndarray, pad: int = 16) -> np.ndarray:
+    # 어두운 픽셀이 몇 개 이상 있는 행/열만 내용으로 봄 (스캔 잡티 무시)
+    mask = gray < 200
+    rows = np.flatnonzero(mask.sum(axis=1) > 2)
+    cols = np.flatnonzero(mask.sum(axis=0) > 2)
+    if rows.size == 0 or cols.size == 0:
+        return gray
+    h, w = gray.shape
+    y0, y1 = max(0, rows[0] - pad), min(h, rows[-1] + pad + 1)
+    x0, x1 = max(0, cols[0] - pad), min(w, cols[-1] + pad + 1)
+    return gray[y0:y1, x0:x1]
+
+
+def preprocess_gray(gray: np.ndarray, profile: Dict[str, Any], src_dpi: Optional[float] = None) -> np.ndarray:
+    dpi = profile.get("dpi")
+    if dpi and src_dpi and src_dpi > dpi * 1.05:
+        scale = dpi / src_dpi
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if profile.get("deskew"):
+        gray = _deskew(gray)
+    if profile.get("crop_margins"):
+        gray = _crop_margins(gray)
+    if profile.get("binarize"):
+        gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+    return gray
+
+
+def encode_gray(gray: np.ndarray, profile: Dict[str, Any]) -> bytes:
+    if profile.get("format") == "png":
+        ok, encoded = cv2.imencode(".png", gray, [cv2.IMWRITE_PNG_COMPRESSION, int(profile.get("png_compression", 3))])
+    else:
+        ok, encoded = cv2.imencode(".jpg", gray, [cv2.IMWRITE_JPEG_QUALITY, int(profile.get("quality", 95))])
+    if not ok:
+        raise RuntimeError("페이지 이미지 인코딩 실패")
+    return encoded.tobytes()
+
+
+def render_page_image(
+    page: fitz.Page, zoom: float, profile: Dict[str, Any], measure_before: bool = False,
+) -> Tuple[bytes, Dict[str, Optional[int]]]:
+    """
+    페이지 하나를 그레이스케일로 렌더링 → 전처리 → 인코딩.
+    반환: (이미지 bytes, {"bytes_before": default 프로파일로 보냈을 bytes, "bytes_after": 보낼 bytes})
+    bytes_before는 업로드 이미지(preprocess_image_bytes)와 같은 기준 — default 프로파일로 인코딩한 크기.
+    default가 아닌 프로파일은 measure_before 또는 OCR_MEASURE_BASELINE일 때만 재고, 아니면 None.
+    """
+    # 목표 DPI가 더 낮으면 크게 그렸다 줄이지 않고 처음부터 그 해상도로 렌더링
+    eff_zoom = zoom
+    if profile.get("dpi"):
+        eff_zoom = min(zoom, profile["dpi"] / 72.0)
+
+    # RGB로 렌더링 후 BGR→GRAY 변환하지 않고 처음부터 그레이스케일 pixmap으로 렌더링
+    pix = page.get_pixmap(matrix=fitz.Matrix(eff_zoom, eff_zoom), colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.stride)[:, : pix.w]
 
-        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
-        if pix.n >= 3:
-            img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    out = encode_gray(preprocess_gray(gray, profile), profile)
+    before: Optional[int] = len(out) if profile == PROFILES["default"] else None
+    if before is None and (measure_before or OCR_MEASURE_BASELINE):
+        before = _default_size(page, zoom, eff_zoom, gray)
+    return out, {"bytes_before": before, "bytes_after": len(out)}
 
-        # (선택) 최소 전처리: 그레이스케일
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        ok, encoded = cv2.imencode(".jpg", gray)
-        if not ok:
-            raise RuntimeError("PDF page -> JPEG 인코딩 실패")
-        outputs.append(encoded.tobytes())
+def _default_size(page: fitz.Page, zoom: float, eff_zoom: float, gray: np.ndarray) -> int:
+    # default 프로파일 결과 크기 (같은 해상도로 렌더링했으면 그 픽셀을 다시 인코딩만)
+    default = PROFILES["default"]
+    if eff_zoom != zoom:
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.stride)[:, : pix.w]
+    return len(encode_gray(preprocess_gray(gray, default), default))
 
-    return outputs
+
+def preprocess_image_bytes(image_bytes: bytes, profile: Dict[str, Any]) -> Tuple[bytes, Dict[str, int]]:
+    """
+    직접 업로드된 이미지에 같은 전처리 적용.
+    default 프로파일이거나 디코딩 실패/결과가 더 크면 원본 그대로 보냄.
+    """
+    stat = {"bytes_before": len(image_bytes), "bytes_after": len(image_bytes)}
+    if profile == PROFILES["default"]:
+        return image_bytes, stat
+
+    gray = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return image_bytes, stat
+
+    src_dpi = max(gray.shape) / _A4_LONG_INCH
+    out = encode_gray(preprocess_gray(gray, profile, src_dpi=src_dpi), profile)
+    if len(out) >= len(image_bytes):
+        return image_bytes, stat
+    stat["bytes_after"] = len(out)
+    return out, stat
+
+
+def page_text_layer(page: fitz.Page, min_hangul: int = TEXT_LAYER_MIN_HANGUL) -> Optional[str]:
+    """
+    디지털로 만든 PDF면 페이지에 텍스트 레이어가 있음.
+    쓸 만한 한글 텍스트가 충분하면 반환, 스캔본/이미지 페이지면 None.
+    """
+    text = page.get_text("text") or ""
+    hangul = len(_HANGUL.findall(text))
+    if hangul < min_hangul:
+        return None
+    # 폰트 매핑이 깨진 PDF는 글자가 U+FFFD로 나옴 → OCR로 보냄
+    if text.count("\ufffd") > hangul // 10:
+        return None
+    return text
+
+
+def iter_pdf_pages_jpeg(doc: fitz.Document, zoom: float = 2.0) -> Iterator[bytes]:
+    """
+    PDF를 한 페이지씩 JPEG bytes로 렌더링해서 바로 넘겨줌.
+    전체 페이지를 리스트로 쌓지 않으므로 메모리는 처리 중인 페이지 수에만 비례.
+    """
+    profile = PROFILES["default"]
+    for i in range(doc.page_count):
+        yield render_page_image(doc.load_page(i), zoom, profile)[0]
+
+
+def iter_pdf_pages(
+    doc: fitz.Document,
+    zoom: float = 2.0,
+    text_layer: bool = True,
+    profile: Optional[Dict[str, Any]] = None,
+    stats: Optional[Dict[int, Dict[str, int]]] = None,
+) -> Iterator[Tuple[int, Union[str, bytes]]]:
+    """
+    페이지별로 (페이지 인덱스, 내용)을 넘겨줌.
+    텍스트 레이어가 쓸 만하면 내용은 str(텍스트), 아니면 전처리 프로파일대로 렌더링한 이미지 bytes.
+    str 페이지는 OCR을 건너뛰고, bytes 페이지만 OCR 대상.
+    stats를 넘기면 렌더링한 페이지의 전/후 bytes를 페이지 인덱스별로 채움.
+    """
+    profile = profile or get_profile(None)
+    for i in range(doc.page_count):
+        page = doc.load_page(i)
+        text = page_text_layer(page) if text_layer else None
+        if text is not None:
+            yield i, text
+            continue
+        with STAGE_SECONDS.time(stage="render_page"):
+            image, stat = render_page_image(page, zoom, profile)
+        if stats is not None:
+            stats[i] = stat
+        yield i, image
+
+
+def render_pdf_pages_to_jpeg_bytes(pdf: Union[str, bytes], zoom: float = 2.0) -> list[bytes]:
+    """
+    PDF를 페이지별 JPEG bytes 리스트로 변환.
+    """
+    doc = open_pdf(pdf, max_pages=0)
+    try:
+        return list(iter_pdf_pages_jpeg(doc, zoom=zoom))
+    finally:
+        doc.close()
@@ -0,0 +1,191 @@
+import os
+import time
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+from ocr_engine.pdf_render import render_page_image, page_text_layer, get_profile
+from common.metrics import STAGE_SECONDS
+
+# 페이지 렌더링/인코딩 워커 수 (1 이하면 풀 없이 요청 스레드에서 순서대로 렌더링)
+RASTER_WORKERS = int(os.getenv("RASTER_WORKERS", str(os.cpu_count() or 1)))
+# process: PyMuPDF 렌더링이 GIL을 잡고 있어서 기본은 프로세스 풀
+# thread: 워커 프로세스를 못 띄우는 환경용 (cv2 인코딩 구간만 병렬)
+RASTER_EXECUTOR = os.getenv("RASTER_EXECUTOR", "process")
+# 워커 작업 하나에 넣을 페이지 수 (작을수록 완료된 페이지가 빨리 나옴)
+RASTER_CHUNK_PAGES = int(os.getenv("RASTER_CHUNK_PAGES", "2"))
+# 렌더링할 페이지가 이보다 적으면 풀 없이 요청 스레드에서 (임시파일/IPC 비용이 병렬 이득보다 큼)
+RASTER_POOL_MIN_PAGES = int(os.getenv("RASTER_POOL_MIN_PAGES", "4"))
+# 워커에 PDF를 넘길 임시파일 위치 (비어 있으면 시스템 기본, /dev/shm 등 메모리 파일시스템 권장)
+RASTER_TMP_DIR = os.getenv("RASTER_TMP_DIR", "") or None
+# 워커가 열어둔 문서를 이 시간(초) 동안 안 쓰면 닫음. 임시파일은 요청이 끝나면 지우지만
+# 열린 문서가 있으면 내용이 남아 있어서 (/dev/shm이면 메모리) 쉬는 워커가 계속 붙잡지 않게
+RASTER_DOC_IDLE_SEC = float(os.getenv("RASTER_DOC_IDLE_SEC", "2"))
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = max(1, RASTER_WORKERS)
+                if RASTER_EXECUTOR == "thread":
+                    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="raster")
+                else:
+                    # uvicorn 스레드가 떠 있는 상태에서 fork하지 않도록 spawn
+                    _executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# 워커(프로세스/스레드)별로 마지막에 연 문서 하나 (같은 요청의 다음 작업은 다시 안 열고 씀)
+# 스레드 id → [파일 키, 문서, 사용 중 여부, 세대]. 쉬는 문서는 타이머 스레드가 닫아서 _docs_lock으로 보호
+_docs: Dict[int, list] = {}
+_docs_lock = threading.Lock()
+
+
+def _acquire_doc(pdf_path: str) -> Tuple[fitz.Document, int]:
+    st = os.stat(pdf_path)
+    key = (pdf_path, st.st_ino, st.st_mtime_ns)
+    tid = threading.get_ident()
+    with _docs_lock:
+        entry = _docs.get(tid)
+        if entry is not None and entry[0] == key:
+            entry[2] = True
+            entry[3] += 1
+            return entry[1], entry[3]
+        if entry is not None:
+            entry[1].close()
+            del _docs[tid]
+    doc = fitz.open(pdf_path, filetype="pdf")
+    with _docs_lock:
+        _docs[tid] = [key, doc, True, 0]
+    return doc, 0
+
+
+def _release_doc(gen: int) -> None:
+    # 작업이 끝나면 사용 중 표시를 풀고, RASTER_DOC_IDLE_SEC 뒤에도 그대로면 닫음
+    tid = threading.get_ident()
+    with _docs_lock:
+        entry = _docs.get(tid)
+        if entry is None:
+            return
+        entry[2] = False
+    timer = threading.Timer(RASTER_DOC_IDLE_SEC, _close_if_idle, args=(tid, gen))
+    timer.daemon = True
+    timer.start()
+
+
+def _close_if_idle(tid: int, gen: int) -> None:
+    with _docs_lock:
+        entry = _docs.get(tid)
+        # 그 사이 다시 썼으면(세대가 바뀜) 그 작업의 타이머가 맡음
+        if entry is None or entry[2] or entry[3] != gen:
+            return
+        del _docs[tid]
+    entry[1].close()
+
+
+def _render_chunk(
+    pdf_path: str, page_indices: List[int], zoom: float, profile: Dict[str, Any]
+) -> List[Tuple[int, bytes, Dict[str, int], float]]:
+    """
+    워커에서 실행: 임시파일 경로로 PDF를 열어(워커마다 문서당 한 번) 지정 페이지들을 전처리 프로파일대로 렌더링.
+    PDF bytes 대신 경로만 넘겨서 작업마다 파일 전체를 pickle/IPC하지 않음.
+    페이지별 렌더링 시간(초)도 같이 반환 (워커 프로세스 지표는 부모에서 기록).
+    """
+    doc, gen = _acquire_doc(pdf_path)
+    try:
+        out = []
+        for i in page_indices:
+            t = time.perf_counter()
+            image, stat = render_page_image(doc.load_page(i), zoom, profile)
+            out.append((i, image, stat, time.perf_counter() - t))
+        return out
+    finally:
+        _release_doc(gen)
+
+
+def _render_local(
+    doc: fitz.Document, todo: List[int], zoom: float, profile: Dict[str, Any], stats: Optional[Dict[int, Dict[str, int]]],
+) -> Iterator[Tuple[int, bytes]]:
+    for i in todo:
+        with STAGE_SECONDS.time(stage="render_page"):
+            page_bytes, stat = render_page_image(doc.load_page(i), zoom, profile)
+        if stats is not None:
+            stats[i] = stat
+        yield i, page_bytes
+
+
+def iter_pdf_pages_pooled(
+    pdf_bytes: bytes,
+    doc: fitz.Document,
+    zoom: float = 2.0,
+    text_layer: bool = True,
+    profile: Optional[Dict[str, Any]] = None,
+    stats: Optional[Dict[int, Dict[str, int]]] = None,
+    executor: Optional[Executor] = None,
+) -> Iterator[Tuple[int, Union[str, bytes]]]:
+    """
+    iter_pdf_pages와 같은 (페이지 인덱스, 내용) 형식이지만, 렌더링할 페이지는 워커 풀에 나눠서
+    끝나는 순서대로 넘겨줌 (페이지 순서는 인덱스로 맞춤).
+    - 텍스트 레이어 확인은 가벼워서 여기서 바로 처리
+    - 풀에 동시에 걸어두는 작업 수를 워커 수 x 2로 제한 → 다 못 가져간 결과가 무한정 쌓이지 않음
+    - 렌더링할 페이지가 RASTER_POOL_MIN_PAGES보다 적으면 풀 없이 여기서 바로 렌더링
+    - PDF는 임시파일로 한 번 써서 워커에 경로만 넘김 (작업마다 bytes를 pickle하지 않음)
+    """
+    profile = profile or get_profile(None)
+    todo: List[int] = []
+    for i in range(doc.page_count):
+        text = page_text_layer(doc.load_page(i)) if text_layer else None
+        if text is not None:
+            yield i, text
+        else:
+            todo.append(i)
+
+    if len(todo) < max(1, RASTER_POOL_MIN_PAGES):
+        yield from _render_local(doc, todo, zoom, profile, stats)
+        return
+
+    ex = executor or get_executor()
+    # 요청마다 파일 한 번만 쓰고 워커에는 경로만
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf", dir=RASTER_TMP_DIR)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf_bytes)
+
+    chunks = [todo[k : k + RASTER_CHUNK_PAGES] for k in range(0, len(todo), max(1, RASTER_CHUNK_PAGES))]
+    max_in_flight = max(1, RASTER_WORKERS) * 2
+    pending = set()
+    try:
+        while chunks or pending:
+            while chunks and len(pending) < max_in_flight:
+                pending.add(ex.submit(_render_chunk, pdf_path, chunks.pop(0), zoom, profile))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                for i, page_bytes, stat, secs in fut.result():
+                    STAGE_SECONDS.observe(secs, stage="render_page")
+                    if stats is not None:
+                        stats[i] = stat
+                    yield i, page_bytes
+    finally:
+        for fut in pending:
+            fut.cancel()
+        # 워커가 열어둔 문서는 파일이 지워져도 읽을 수 있음 (POSIX). 쉬는 문서는 RASTER_DOC_IDLE_SEC 뒤에 닫힘
+        os.unlink(pdf_path)
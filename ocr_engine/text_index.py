@@ -0,0 +1,130 @@
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+# ---------------------------------------------------------------------------
+# 계약서에서 찾는 라벨/키워드 (validators, lease_parser가 같이 씀)
+# 문서는 TextIndex로 한 번만 쪼개고, 각 함수는 그 인덱스 결과만 조회
+# ---------------------------------------------------------------------------
+
+# 계약서마다 표현이 조금씩 달라서 label 후보를 여러 개 둠
+REQUIRED_FIELDS: List[Tuple[str, List[str]]] = [
+    ("임대인",  [r"임\s*대\s*인", r"임대인"]),
+    ("임차인",  [r"임\s*차\s*인", r"임차인"]),
+    ("소재지",  [r"소\s*재\s*지", r"주소", r"소재지"]),
+    ("보증금",  [r"보\s*증\s*금", r"전\s*세\s*금", r"임\s*대\s*보\s*증\s*금"]),
+    ("차임",    [r"차\s*임", r"월\s*세", r"임\s*대\s*료"]),
+    ("계약기간",[r"계\s*약\s*기\s*간", r"임\s*대\s*기\s*간"]),
+    ("특약",    [r"특\s*약", r"특약사항"]),
+    ("서명",    [r"서\s*명", r"날\s*인", r"인\s*감", r"서명\s*또는\s*날인"]),
+]
+
+# 주소 라벨 (라인 맨 앞의 '소 재 지')
+ADDRESS_LABEL = r"^\s*소\s*재\s*지\s*"
+
+TEMPLATE_KEYWORDS: List[str] = [
+    "주택임대차", "임대인", "임차인", "소재지", "보증금",
+    "월세", "전세", "계약기간", "특약", "중개", "공인중개사",
+    "작성일", "서명", "날인"
+]
+
+# lease_parser가 라인 위치를 찾는 단순 문자열
+PARTY_TERMS = ["임대인", "임차인"]
+NAME_TERM = "성명"
+
+
+class LabelScanner:
+    """
+    라벨 정규식 여러 개를 미리 컴파일해두고, 패턴별 '처음 매칭되는 라인'을 찾음.
+    라인을 하나씩 돌지 않고 라인들을 이어 붙인 문서 전체에 패턴마다 search 1번
+    (\\s는 줄바꿈을 넘지 않게 바꿔서 컴파일 → 라인 단위 search와 결과 같음).
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns: List[str] = list(dict.fromkeys(patterns))
+        self.compiled = [re.compile(p.replace(r"\s", r"[^\S\n]"), re.M) for p in self.patterns]
+
+    def first_hits(self, joined: str, line_starts: List[int]) -> Dict[str, Tuple[int, int]]:
+        """
+        반환: 패턴 → (라인 번호, 라인 안에서 라벨이 끝나는 위치)
+        """
+        hits: Dict[str, Tuple[int, int]] = {}
+        for p, rx in zip(self.patterns, self.compiled):
+            m = rx.search(joined)
+            if m:
+                li = bisect_right(line_starts, m.start()) - 1
+                hits[p] = (li, m.end() - line_starts[li])
+        return hits
+
+
+class TermScanner:
+    """
+    고정 문자열 키워드가 텍스트에 있는지 확인.
+    (키워드 수십 개 수준에서는 정규식/Aho-Corasick보다 str의 부분 문자열 검색이 더 빠름)
+    """
+
+    def __init__(self, terms: List[str]):
+        self.terms: List[str] = list(dict.fromkeys(terms))
+
+    def present(self, text: str) -> Set[str]:
+        return {t for t in self.terms if t in text}
+
+
+LABEL_SCANNER = LabelScanner([p for _, pats in REQUIRED_FIELDS for p in pats] + [ADDRESS_LABEL])
+TERM_SCANNER = TermScanner(TEMPLATE_KEYWORDS + PARTY_TERMS + [NAME_TERM])
+
+
+class TextIndex:
+    """
+    OCR 텍스트를 한 번만 쪼개고 훑어서 만든 인덱스.
+    - lines: 공백 제거 후 빈 줄을 뺀 라인 목록
+    - label_hits: 라벨 패턴별 처음 매칭된 (라인 번호, 라벨 끝 위치)
+    - terms: 텍스트에 있는 키워드 집합
+    find_required_fields / template_keyword_score / extract_lease_fields가 같이 사용.
+    """
+
+    def __init__(self, full_text: Optional[str]):
+        self.text = full_text or ""
+        self.lines: List[str] = [l.strip() for l in self.text.splitlines() if l.strip()]
+
+        # 라인들을 \n으로 이어 붙인 문서 + 라인 시작 위치 (문서 위치 → 라인 번호 변환용)
+        self.joined = "\n".join(self.lines)
+        self.line_starts: List[int] = []
+        pos = 0
+        for line in self.lines:
+            self.line_starts.append(pos)
+            pos += len(line) + 1
+
+        self.label_hits = LABEL_SCANNER.first_hits(self.joined, self.line_starts)
+        self.terms: Set[str] = TERM_SCANNER.present(self.joined)
+        self._term_lines: Dict[str, List[int]] = {}
+
+    def label_tail(self, pattern: str) -> Optional[str]:
+        """
+        pattern이 처음 매칭된 라인에서 라벨 뒤쪽 문자열. 매칭 없으면 None.
+        """
+        hit = self.label_hits.get(pattern)
+        if hit is None:
+            return None
+        li, end = hit
+        return self.lines[li][end:]
+
+    def has_term(self, term: str) -> bool:
+        return term in self.terms
+
+    def term_lines(self, term: str) -> List[int]:
+        """
+        term이 들어있는 라인 번호 목록 (문서에 아예 없으면 라인을 훑지 않음).
+        """
+        out = self._term_lines.get(term)
+        if out is None:
+            if term in self.terms:
+                out = [i for i, line in enumerate(self.lines) if term in line]
+            else:
+                out = []
+            self._term_lines[term] = out
+        return out
+
+
+def as_index(text: Union[str, TextIndex, None]) -> TextIndex:
+    return text if isinstance(text, TextIndex) else TextIndex(text)
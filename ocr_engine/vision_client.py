@@ -1,15 +1,61 @@
+import os
+import threading
+from typing import List, Optional, Tuple
+
 from google.cloud import vision
 
-def ocr_document_text(image_bytes: bytes) -> str:
+# batch_annotate_images 한 번에 보낼 이미지 수 (API 최대 16)
+VISION_BATCH_SIZE = min(16, int(os.getenv("VISION_BATCH_SIZE", "8")))
+# 요청 크기 제한(약 10MB) 안쪽으로 유지하기 위한 배치당 이미지 bytes 합계 상한
+VISION_BATCH_MAX_BYTES = int(os.getenv("VISION_BATCH_MAX_BYTES", str(8 * 1024 * 1024)))
+# 로컬 대역 서버(bench/standins.py)로 부하 테스트할 때:
+#   VISION_API_ENDPOINT=http://127.0.0.1:18090 VISION_TRANSPORT=rest VISION_ANONYMOUS=1
+VISION_API_ENDPOINT = os.getenv("VISION_API_ENDPOINT", "")
+VISION_TRANSPORT = os.getenv("VISION_TRANSPORT", "")  # 비우면 라이브러리 기본(grpc), rest 가능
+VISION_ANONYMOUS = os.getenv("VISION_ANONYMOUS", "0") == "1"
+
+_client: Optional[vision.ImageAnnotatorClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> vision.ImageAnnotatorClient:
     """
-    Google Vision DOCUMENT_TEXT_DETECTION로 문서 OCR 수행.
-    반환: 전체 텍스트(문서 단위)
+    프로세스 전체에서 공유하는 Vision 클라이언트.
+    자격증명 로드/gRPC 채널 생성은 처음 한 번만 함.
     """
-    client = vision.ImageAnnotatorClient()
-    image = vision.Image(content=image_bytes)
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _new_client()
+    return _client
+
+
+def _new_client() -> vision.ImageAnnotatorClient:
+    kwargs = {}
+    if VISION_API_ENDPOINT:
+        kwargs["client_options"] = {"api_endpoint": VISION_API_ENDPOINT}
+    if VISION_TRANSPORT:
+        kwargs["transport"] = VISION_TRANSPORT
+    if VISION_ANONYMOUS:
+        # 대역 서버는 인증을 안 봐서 자격증명 파일 없이 띄움
+        from google.auth.credentials import AnonymousCredentials
+        kwargs["credentials"] = AnonymousCredentials()
+    return vision.ImageAnnotatorClient(**kwargs)
+
 
-    response = client.document_text_detection(image=image)
+def close_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            try:
+                _client.transport.close()
+            except Exception:
+                pass
+            _client = None
 
+
+def _response_text(response) -> str:
     if response.error and response.error.message:
         raise RuntimeError(f"Vision OCR error: {response.error.message}")
 
@@ -22,3 +68,39 @@ def ocr_document_text(image_bytes: bytes) -> str:
         return response.text_annotations[0].description
 
     return ""
+
+
+def ocr_document_text(image_bytes: bytes) -> str:
+    """
+    Google Vision DOCUMENT_TEXT_DETECTION로 문서 OCR 수행.
+    반환: 전체 텍스트(문서 단위)
+    """
+    image = vision.Image(content=image_bytes)
+    response = get_client().document_text_detection(image=image)
+    return _response_text(response)
+
+
+def ocr_document_texts_batch(images: List[bytes]) -> List[Tuple[str, Optional[str]]]:
+    """
+    여러 페이지 이미지를 batch_annotate_images 한 번으로 OCR.
+    반환: 입력 순서대로 (text, error) 목록. 페이지 단위 에러는 error에 메시지로 담김.
+    요청 자체가 실패하면 예외를 그대로 올림.
+    """
+    if not images:
+        return []
+
+    feature = vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
+    requests = [
+        vision.AnnotateImageRequest(image=vision.Image(content=b), features=[feature])
+        for b in images
+    ]
+    batch = get_client().batch_annotate_images(requests=requests)
+
+    outs: List[Tuple[str, Optional[str]]] = []
+    for response in batch.responses:
+        try:
+            outs.append((_response_text(response), None))
+        except RuntimeError as e:
+            outs.append(("", str(e)))
+    return outs
+
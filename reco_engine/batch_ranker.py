@@ -0,0 +1,234 @@
+import heapq
+from functools import lru_cache
+from typing import Optional, Dict, List, Any, Sequence, Tuple, Union
+
+import numpy as np
+
+from reco_engine.schemas import PropertyBrief
+from reco_engine.ranker import _to_num, _trend_score, _is_monthly
+from reco_engine.price_series import effective_trends, effective_trend
+
+# calc_score_0_100과 같은 가중치/순서 (합산 순서가 같아야 float 결과도 같음)
+WEIGHTS = (("dist", 0.30), ("price", 0.30), ("area", 0.15), ("rating", 0.15), ("trend", 0.10))
+
+# trend 문자열 → 정수 코드. 0은 None/빈 문자열, 스키마 밖 값(클라이언트가 보낸 임의 문자열)은 전부 TREND_OTHER 하나로
+# (값마다 코드를 늘리면 표가 끝없이 커지고 score_columns의 점수표도 같이 커짐)
+TREND_OTHER = 5
+_TREND_CODES: Dict[str, int] = {"": 0, "UP": 1, "DOWN": 2, "FLAT": 3, "UNKNOWN": 4}
+# 점수표용 이름. TREND_OTHER는 어떤 trend와도 같지 않은 값으로 점수를 매김
+# (calc_breakdown과 다른 곳은 기준 매물과 후보가 같은 스키마 밖 문자열일 때뿐: 거기선 1.0, 여기선 0.2)
+_TREND_NAMES: Tuple[Optional[str], ...] = (None, "UP", "DOWN", "FLAT", "UNKNOWN", "\0other")
+
+Candidate = Union[PropertyBrief, Dict[str, Any]]
+
+# 같은 가격 문자열("43,000만" 등)이 계속 들어오니 파싱 결과를 재사용
+_to_num_cached = lru_cache(maxsize=65536)(_to_num)
+
+
+def trend_code(trend: Optional[str]) -> int:
+    if not trend:
+        return 0
+    return _TREND_CODES.get(trend, TREND_OTHER)
+
+
+_FIELDS = ("propertyId", "distM", "area", "price", "deposit", "rating")
+
+
+def _rows(cands: Sequence[Candidate]) -> List[tuple]:
+    return [
+        tuple(c.get(f) for f in _FIELDS) if isinstance(c, dict)
+        else (c.propertyId, c.distM, c.area, c.price, c.deposit, c.rating)
+        for c in cands
+    ]
+
+
+def _opt_float(v: Any) -> float:
+    if v is None:
+        return np.nan
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _num(v: Any) -> float:
+    if not v:
+        return np.nan
+    x = _to_num_cached(str(v))
+    return np.nan if x is None else x
+
+
+def _float_col(vals: Sequence[Any]) -> np.ndarray:
+    # 숫자/숫자 문자열/None(→NaN)이면 numpy가 한 번에 변환, 이상한 값이 섞였을 때만 하나씩 _opt_float
+    try:
+        out = np.array(vals, dtype=np.float64)
+        if out.ndim == 1:
+            return out
+    except (TypeError, ValueError):
+        pass
+    return np.array([_opt_float(x) for x in vals], dtype=np.float64)
+
+
+def _mapped_col(vals: Sequence[Any], fn, dtype) -> np.ndarray:
+    # 가격 문자열/trend는 종류가 적어서 서로 다른 값만 변환하고 나머지는 dict 조회로
+    try:
+        memo = {v: fn(v) for v in set(vals)}
+    except TypeError:
+        return np.array([fn(x) for x in vals], dtype=dtype)
+    return np.fromiter(map(memo.__getitem__, vals), dtype=dtype, count=len(vals))
+
+
+def build_columns(cands: Sequence[Candidate]) -> Dict[str, np.ndarray]:
+    """
+    후보 목록(PropertyBrief 또는 같은 키의 dict)을 점수 계산용 컬럼 배열로 한 번에 변환.
+    값이 없으면 NaN (dist는 calc_breakdown처럼 99999m, 숫자로 못 읽는 값도 없는 것으로).
+    요청 전체 점수 계산 시간은 score_columns(벡터 연산)가 아니라 여기가 대부분임:
+    필드별 변환은 numpy 한 번/서로 다른 값만 변환하지만, 후보 객체에서 값을 꺼내는 것(_rows)과
+    series trend(effective_trends)는 후보마다 파이썬 코드가 돎 (bench_ranker에서 둘을 따로 잼).
+    """
+    if not cands:
+        return {
+            "propertyId": np.empty(0, dtype=np.int64),
+            **{k: np.empty(0, dtype=np.float64) for k in ("dist", "area", "price", "deposit", "rating")},
+            "trend": np.empty(0, dtype=np.int32),
+        }
+
+    pid, dist, area, price, deposit, rating = zip(*_rows(cands))
+    # trend는 series가 있는 후보끼리 모아서 한 번에 계산 (calc_breakdown과 같은 effective_trend 규칙)
+    trend = effective_trends(cands)
+    try:
+        pids = np.array(pid, dtype=np.int64)
+    except (TypeError, ValueError, OverflowError):
+        ints = [int(x) for x in pid]
+        try:
+            pids = np.array(ints, dtype=np.int64)
+        except OverflowError:
+            # int64 밖 ID는 파이썬 int 그대로 (propertyId 컬럼은 기준 매물 ID와 비교만 함)
+            pids = np.array(ints, dtype=object)
+    dists = _float_col(dist)
+    dists[np.isnan(dists)] = 99999.0
+    return {
+        "propertyId": pids,
+        "dist": dists,
+        "area": _float_col(area),
+        "price": _mapped_col(price, _num, np.float64),
+        "deposit": _mapped_col(deposit, _num, np.float64),
+        "rating": _float_col(rating),
+        "trend": _mapped_col(trend, trend_code, np.int32),
+    }
+
+
+def _sim_vec(a: Optional[float], b: np.ndarray) -> np.ndarray:
+    # ranker._sim과 같은 식. 값이 없으면(None/NaN) 0
+    if a is None:
+        return np.zeros(b.shape, dtype=np.float64)
+    denom = max(abs(a), 1.0)
+    diff = np.abs(a - b) / denom
+    out = np.maximum(0.0, 1.0 - diff)
+    out[np.isnan(b) | np.isnan(out)] = 0.0
+    return out
+
+
+def _round2(x: np.ndarray) -> np.ndarray:
+    # np.round는 x*100을 반올림해서 .xx5 경계에서 파이썬 round(x, 2)와 다를 수 있음
+    # → 경계 근처 값만 파이썬 round로 다시 계산해서 calc_score_0_100과 똑같이 맞춤
+    y = np.round(x, 2)
+    x100 = x * 100.0
+    for i in np.flatnonzero(np.abs(x100 - np.floor(x100) - 0.5) < 1e-6):
+        y[i] = round(float(x[i]), 2)
+    return y
+
+
+def score_columns(base: PropertyBrief, cols: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    calc_breakdown + calc_score_0_100을 후보 전체에 대해 벡터 연산으로 계산.
+    반환: breakdown 항목별 배열(dist/price/area/rating/trend) + score(0~100, 소수 둘째 자리)
+    """
+    dist_score = 1.0 / (1.0 + cols["dist"] / 500.0)
+    area_score = _sim_vec(base.area, cols["area"])
+
+    if _is_monthly(base):
+        rent_score = _sim_vec(_to_num(base.price), cols["price"])
+        dep_score = _sim_vec(_to_num(base.deposit), cols["deposit"])
+        price_score = 0.6 * rent_score + 0.4 * dep_score
+    else:
+        price_score = _sim_vec(_to_num(base.price), cols["price"])
+
+    rating_score = _sim_vec(base.rating, cols["rating"])
+
+    # trend는 종류가 몇 개 안 되니 코드별 점수표를 만들어서 인덱싱
+    base_trend = effective_trend(base)
+    lut = np.array([_trend_score(base_trend, name) for name in _TREND_NAMES], dtype=np.float64)
+    trend_score = lut[cols["trend"]]
+
+    out = {
+        "dist": dist_score,
+        "price": price_score,
+        "area": area_score,
+        "rating": rating_score,
+        "trend": trend_score,
+    }
+    s = np.zeros(len(dist_score), dtype=np.float64)
+    for k, wk in WEIGHTS:
+        s = s + wk * out[k]
+    out["score"] = _round2(s * 100.0)
+    return out
+
+
+def breakdown_at(scored: Dict[str, np.ndarray], i: int) -> Dict[str, float]:
+    return {k: float(scored[k][i]) for k, _ in WEIGHTS}
+
+
+def rank_order(scores: np.ndarray) -> np.ndarray:
+    # 점수 내림차순, 동점이면 원래 순서 (sorted(..., reverse=True)와 동일)
+    return np.argsort(-scores, kind="stable")
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    상위 k개 인덱스만 뽑아서 rank_order와 같은 순서로 반환.
+    전체 정렬 대신 partition으로 k번째 점수를 찾고, 그 이상인 후보만 정렬.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return rank_order(scores)
+    thr = np.partition(scores, n - k)[n - k]
+    # 동점자는 원래 순서가 앞선 쪽이 남도록 threshold 이상 전부 모아서 안정 정렬
+    idx = np.flatnonzero(scores >= thr)
+    return idx[np.argsort(-scores[idx], kind="stable")][:k]
+
+
+class TopKCollector:
+    """
+    후보를 청크 단위로 받아가며 점수 계산하고, 지금까지의 상위 k개만 들고 있음.
+    (후보 전체를 리스트로 모으지 않고 스트리밍으로 들어오는 요청용)
+    """
+
+    def __init__(self, base: PropertyBrief, k: int):
+        self.base = base
+        self.k = k
+        self.seen = 0
+        # (score, -입력순번, 후보, breakdown) min-heap → 루트가 현재 k등
+        # 입력순번이 겹치지 않아서 비교는 앞의 두 값에서 끝남
+        self._heap: List[tuple] = []
+
+    def add_chunk(self, cands: Sequence[Candidate]) -> None:
+        if not cands:
+            return
+        scored = score_columns(self.base, build_columns(cands))
+        for i in top_k(scored["score"], self.k):
+            item = (float(scored["score"][i]), -(self.seen + int(i)), cands[i], breakdown_at(scored, i))
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, item)
+        self.seen += len(cands)
+
+    def results(self) -> List[tuple]:
+        """
+        반환: 순위 순서대로 (후보, score, breakdown) 목록
+        """
+        items = sorted(self._heap, key=lambda x: (-x[0], -x[1]))
+        return [(c, score, bd) for score, _, c, bd in items]
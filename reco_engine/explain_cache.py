@@ -0,0 +1,70 @@
+import os
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# 후보별 LLM 설명 캐시 (같은 기준/후보 조합이 페이지 넘길 때마다 다시 나옴)
+RECO_EXPLAIN_CACHE_ITEMS = int(os.getenv("RECO_EXPLAIN_CACHE_ITEMS", "5000"))
+RECO_EXPLAIN_CACHE_TTL_SEC = int(os.getenv("RECO_EXPLAIN_CACHE_TTL_SEC", str(6 * 3600)))
+
+
+def fingerprint(obj: Any) -> str:
+    raw = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def explain_key(base_fp: str, candidate: Dict[str, Any], prompt_version: str, max_reasons: Any, mode: Any) -> str:
+    """
+    (기준 매물, 후보, 프롬프트 버전, maxReasons, mode)가 모두 같을 때만 같은 키.
+    후보는 프롬프트에 들어가는 값 전체(점수/breakdown 포함)로 fingerprint.
+    """
+    return fingerprint([base_fp, fingerprint(candidate), prompt_version, max_reasons, mode])
+
+
+class ExplainCache:
+    """
+    메모리 LRU + TTL. 값은 reco_llm이 정규화한 후보별 결과 dict.
+    """
+
+    def __init__(self, max_items: int = RECO_EXPLAIN_CACHE_ITEMS, ttl_sec: int = RECO_EXPLAIN_CACHE_TTL_SEC):
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "sets": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None:
+                value, created_at = hit
+                if now - created_at <= self.ttl_sec:
+                    self._items.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return value
+                del self._items[key]
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._items[key] = (value, time.time())
+            self._items.move_to_end(key)
+            self.counters["sets"] += 1
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            c = dict(self.counters)
+            c["items"] = len(self._items)
+        lookups = c["hits"] + c["misses"]
+        c["hit_ratio"] = round(c["hits"] / lookups, 4) if lookups else 0.0
+        return c
+
+
+explain_cache = ExplainCache()
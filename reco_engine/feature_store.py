@@ -0,0 +1,269 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from reco_engine.schemas import PropertyBrief
+from reco_engine.batch_ranker import trend_code, _num, _opt_float
+from reco_engine.geo import dist_column, GridIndex
+from reco_engine.price_series import effective_trends
+
+# 매물 카탈로그 파일 (JSON Lines, 한 줄에 PropertyBrief 하나). 비어 있으면 빈 스토어로 시작해서 upsert로 채움
+RECO_CATALOG_PATH = os.getenv("RECO_CATALOG_PATH", "")
+# upsert를 저장하는 SQLite 파일 (uvicorn 워커끼리 공유 + 재시작해도 유지).
+# 비어 있으면 upsert는 요청을 받은 워커 메모리에만 있고 재시작하면 사라짐 → 워커 1개일 때만 씀
+RECO_CATALOG_DB = os.getenv("RECO_CATALOG_DB", "")
+# 다른 워커가 저장한 upsert를 확인하는 최소 간격(초). 0이면 읽는 요청마다 확인
+RECO_CATALOG_SYNC_SEC = float(os.getenv("RECO_CATALOG_SYNC_SEC", "1"))
+
+# 주변 매물 검색용 격자 한 칸 크기(도). 0.01도 ≈ 위도 방향 1.1km
+RECO_GRID_CELL_DEG = float(os.getenv("RECO_GRID_CELL_DEG", "0.01"))
+# 주변 검색 반경 상한(m). k개만 달라고 해도 이 반경 밖은 안 찾음
+RECO_NEARBY_MAX_RADIUS_M = float(os.getenv("RECO_NEARBY_MAX_RADIUS_M", "20000"))
+
+# 점수 계산에 쓰는 숫자 컬럼 (값이 없으면 NaN)
+_FLOAT_COLS = ("price", "deposit", "area", "rating", "lat", "lng")
+_INITIAL_CAPACITY = 1024
+
+
+class FeatureStore:
+    """
+    propertyId → 행 번호 인덱스 + 컬럼별 NumPy 배열.
+    가격/보증금 문자열("43,000만")은 넣을 때 한 번만 숫자로 바꿔 두고,
+    요청에서는 ID로 행만 골라서 batch_ranker.score_columns에 바로 넘김.
+    PropertyBrief 원본은 상위 topK 결과/LLM 설명을 만들 때만 꺼내 씀.
+    좌표가 있는 매물은 격자 인덱스(GridIndex)에도 넣어서 주변 매물을 ID 목록 없이 찾을 수 있음.
+    attach_db로 SQLite를 붙이면 upsert_shared가 거기에 먼저 쓰고(seq 증가), 각 워커는 sync로
+    자기가 본 seq 뒤에 바뀐 매물만 가져와서 반영함 (워커끼리 RECO_CATALOG_SYNC_SEC 안에 같아짐).
+    """
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY, cell_deg: float = RECO_GRID_CELL_DEG):
+        self._lock = threading.Lock()
+        self.grid = GridIndex(cell_deg)
+        self._index: Dict[int, int] = {}
+        self._briefs: List[PropertyBrief] = []
+        self._n = 0
+        self._cols: Dict[str, np.ndarray] = {}
+        self._alloc(max(1, capacity))
+        self.loaded_at: Optional[float] = None
+        self.source: Optional[str] = None
+        self.counters = {"upserts": 0, "inserted": 0, "updated": 0, "lookups": 0, "missing": 0, "synced": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.db_path: Optional[str] = None
+        self._seen_seq = 0
+        self._next_sync = 0.0
+
+    def _alloc(self, capacity: int) -> None:
+        # 용량을 두 배씩 늘려서 upsert가 많아도 복사 횟수를 줄임
+        old, n = self._cols, self._n
+        cols = {
+            "propertyId": np.zeros(capacity, dtype=np.int64),
+            "trend": np.zeros(capacity, dtype=np.int32),
+            **{k: np.full(capacity, np.nan, dtype=np.float64) for k in _FLOAT_COLS},
+        }
+        for k, arr in old.items():
+            cols[k][:n] = arr[:n]
+        self._cols = cols
+
+    def __len__(self) -> int:
+        return self._n
+
+    def upsert(self, items: Iterable[PropertyBrief]) -> Dict[str, int]:
+        """
+        propertyId가 이미 있으면 그 행을 덮어쓰고, 없으면 끝에 추가.
+        """
+        items = list(items)
+        # series → trend는 upsert 때 한 번에 계산해 두고 요청에서는 코드만 씀
+        trends = effective_trends(items)
+        inserted = updated = 0
+        with self._lock:
+            for p, trend in zip(items, trends):
+                row = self._index.get(p.propertyId)
+                if row is None:
+                    row = self._n
+                    if row >= len(self._cols["propertyId"]):
+                        self._alloc(len(self._cols["propertyId"]) * 2)
+                    self._index[p.propertyId] = row
+                    self._briefs.append(p)
+                    self._n += 1
+                    inserted += 1
+                else:
+                    self._briefs[row] = p
+                    updated += 1
+                c = self._cols
+                c["propertyId"][row] = p.propertyId
+                c["price"][row] = _num(p.price)
+                c["deposit"][row] = _num(p.deposit)
+                c["area"][row] = _opt_float(p.area)
+                c["rating"][row] = _opt_float(p.rating)
+                c["lat"][row] = _opt_float(p.lat)
+                c["lng"][row] = _opt_float(p.lng)
+                c["trend"][row] = trend_code(trend)
+                self.grid.put(row, p.lat, p.lng)
+            self.counters["upserts"] += 1
+            self.counters["inserted"] += inserted
+            self.counters["updated"] += updated
+        return {"inserted": inserted, "updated": updated, "total": self._n}
+
+    def load_jsonl(self, path: str) -> Dict[str, int]:
+        """
+        카탈로그 파일을 읽어서 upsert. 빈 줄은 건너뛰고, 깨진 줄은 줄 번호와 함께 ValueError.
+        """
+        items = []
+        with open(path, encoding="utf-8") as f:
+            for no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    items.append(PropertyBrief.model_validate_json(line))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{no}: {e}") from e
+        out = self.upsert(items)
+        self.loaded_at = time.time()
+        self.source = path
+        return out
+
+    def attach_db(self, path: str) -> None:
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        # 여러 워커 프로세스가 동시에 읽고 쓸 수 있게 WAL
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reco_catalog ("
+            " propertyId INTEGER PRIMARY KEY, body TEXT NOT NULL, seq INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS reco_catalog_seq ON reco_catalog (seq)")
+        self._db.commit()
+        self.db_path = path
+        self._seen_seq = 0
+        self._next_sync = 0.0
+
+    def upsert_shared(self, items: Iterable[PropertyBrief]) -> Dict[str, int]:
+        """
+        DB가 붙어 있으면 먼저 저장하고(다른 워커/재시작용) 이 워커 메모리에 반영. 없으면 upsert와 같음.
+        (블로킹 I/O라 이벤트 루프에서는 asyncio.to_thread로 부름)
+        """
+        items = list(items)
+        if self._db is not None:
+            with self._db_lock:
+                db = self._db
+                # seq는 워커끼리 겹치지 않게 쓰기 잠금 안에서 이어서 매김
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    seq = db.execute("SELECT COALESCE(MAX(seq), 0) FROM reco_catalog").fetchone()[0]
+                    db.executemany(
+                        "INSERT OR REPLACE INTO reco_catalog (propertyId, body, seq) VALUES (?, ?, ?)",
+                        [(p.propertyId, p.model_dump_json(), seq + k) for k, p in enumerate(items, 1)],
+                    )
+                    db.commit()
+                except BaseException:
+                    db.rollback()
+                    raise
+        # _seen_seq는 안 올림: 그 사이 다른 워커가 쓴 더 낮은 seq를 건너뛰지 않게 (자기 것은 sync 때 한 번 더 덮어씀)
+        return self.upsert(items)
+
+    def sync_due(self) -> bool:
+        return self._db is not None and time.monotonic() >= self._next_sync
+
+    def sync(self, force: bool = False) -> int:
+        """
+        DB에서 마지막으로 본 seq 뒤에 저장된 매물을 가져와서 반영. 반환: 반영한 매물 수.
+        """
+        if self._db is None or not (force or self.sync_due()):
+            return 0
+        with self._db_lock:
+            self._next_sync = time.monotonic() + RECO_CATALOG_SYNC_SEC
+            rows = self._db.execute(
+                "SELECT body, seq FROM reco_catalog WHERE seq > ? ORDER BY seq", (self._seen_seq,),
+            ).fetchall()
+            if not rows:
+                return 0
+            self.upsert(PropertyBrief.model_validate_json(body) for body, _ in rows)
+            self._seen_seq = rows[-1][1]
+            self.counters["synced"] += len(rows)
+        return len(rows)
+
+    def get(self, pid: int) -> Optional[PropertyBrief]:
+        row = self._index.get(pid)
+        return None if row is None else self._briefs[row]
+
+    def row_of(self, pid: int) -> Optional[int]:
+        return self._index.get(pid)
+
+    def rows(self, ids: Sequence[int]) -> Tuple[np.ndarray, List[int]]:
+        """
+        ID 목록 → (있는 것들의 행 번호 배열, 카탈로그에 없는 ID 목록). 행 순서는 요청 순서 그대로.
+        """
+        index = self._index
+        found: List[int] = []
+        missing: List[int] = []
+        for pid in ids:
+            row = index.get(pid)
+            if row is None:
+                missing.append(pid)
+            else:
+                found.append(row)
+        self.counters["lookups"] += len(ids)
+        self.counters["missing"] += len(missing)
+        return np.array(found, dtype=np.int64), missing
+
+    def columns(self, rows: np.ndarray, base: PropertyBrief, dist: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        score_columns 입력과 같은 모양의 컬럼. dist는 요청마다 달라서 기준 매물 좌표로 여기서 계산
+        (nearby처럼 이미 계산한 거리가 있으면 그대로 씀).
+        """
+        c = self._cols
+        out = {k: c[k][rows] for k in ("propertyId", "price", "deposit", "area", "rating", "trend")}
+        out["dist"] = dist if dist is not None else dist_column(base.lat, base.lng, c["lat"][rows], c["lng"][rows])
+        return out
+
+    def nearby(
+        self, lat: float, lng: float, radius_m: Optional[float] = None, k: Optional[int] = None,
+        exclude_pid: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        좌표 주변 매물 (행 번호, 거리m), 가까운 순.
+        - radius_m만: 반경 안 전부 / k만: 가까운 k개 (RECO_NEARBY_MAX_RADIUS_M 안) / 둘 다: 반경 안 가까운 k개
+        """
+        radius = min(radius_m or RECO_NEARBY_MAX_RADIUS_M, RECO_NEARBY_MAX_RADIUS_M)
+        exclude = self._index.get(exclude_pid) if exclude_pid is not None else None
+        lats, lngs = self._cols["lat"], self._cols["lng"]
+        if k is not None:
+            return self.grid.nearest(lat, lng, k, radius, lats, lngs, exclude=exclude)
+        rows, d = self.grid.within(lat, lng, radius, lats, lngs)
+        if exclude is not None:
+            keep = rows != exclude
+            rows, d = rows[keep], d[keep]
+        return rows, d
+
+    def get_at(self, row: int) -> PropertyBrief:
+        return self._briefs[row]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "items": self._n,
+            "capacity": len(self._cols["propertyId"]),
+            "geo_indexed": len(self.grid),
+            "column_bytes": int(sum(a.nbytes for a in self._cols.values())),
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "db": self.db_path,
+            "synced_seq": self._seen_seq,
+        }
+
+
+feature_store = FeatureStore()
+
+
+def load_catalog(path: str = RECO_CATALOG_PATH, db_path: str = RECO_CATALOG_DB) -> Optional[Dict[str, int]]:
+    # 카탈로그 파일을 먼저 읽고, DB에 저장된 upsert를 그 위에 덮어씀 (upsert가 더 최신)
+    out = feature_store.load_jsonl(path) if path else None
+    if db_path:
+        feature_store.attach_db(db_path)
+        feature_store.sync(force=True)
+    return out
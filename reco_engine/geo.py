@@ -0,0 +1,131 @@
+import math
+from itertools import chain
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+EARTH_RADIUS_M = 6_371_008.8
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def haversine_m(lat1: ArrayLike, lng1: ArrayLike, lat2: ArrayLike, lng2: ArrayLike) -> np.ndarray:
+    """
+    두 좌표(도 단위) 사이 대원 거리(m). 배열끼리 / 한 점 대 배열 모두 브로드캐스트로 한 번에 계산.
+    좌표가 NaN이면 결과도 NaN.
+    """
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    dlat = lat2 - lat1
+    dlng = np.radians(lng2) - np.radians(lng1)
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def dist_column(lat: Optional[float], lng: Optional[float], lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """
+    기준 좌표에서 후보 좌표 배열까지 거리(m). 어느 한쪽 좌표가 없으면
+    calc_breakdown에서 distM이 없을 때처럼 99999m.
+    """
+    if lat is None or lng is None:
+        return np.full(len(lats), 99999.0, dtype=np.float64)
+    d = haversine_m(lat, lng, lats, lngs)
+    d[np.isnan(d)] = 99999.0
+    return d
+
+
+# 위도 1도 길이(m). haversine_m과 같은 지구 반지름으로 계산 (≈ 111.195km)
+_M_PER_DEG = math.radians(1.0) * EARTH_RADIUS_M
+
+
+class GridIndex:
+    """
+    위경도 격자(cell_deg 크기) → 그 칸에 있는 행 번호 목록.
+    반경 검색은 반경을 덮는 칸들만 모아서 haversine으로 다시 거름 (전체 스캔 없음).
+    행 번호는 호출하는 쪽(feature_store) 배열의 인덱스이고, 좌표 배열도 그쪽 것을 받아서 씀.
+    """
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._cell_of: Dict[int, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def put(self, row: int, lat: Optional[float], lng: Optional[float]) -> None:
+        # 좌표가 바뀌었으면 칸을 옮기고, 좌표가 없어졌으면 인덱스에서 뺌
+        old = self._cell_of.get(row)
+        new = None if lat is None or lng is None or math.isnan(lat) or math.isnan(lng) else self._cell(lat, lng)
+        if old == new:
+            return
+        if old is not None:
+            bucket = self._cells[old]
+            bucket.remove(row)
+            if not bucket:
+                del self._cells[old]
+            del self._cell_of[row]
+        if new is not None:
+            self._cells.setdefault(new, []).append(row)
+            self._cell_of[row] = new
+
+    def candidates(self, lat: float, lng: float, radius_m: float) -> np.ndarray:
+        """
+        반경 radius_m 원을 덮는 칸들에 든 행 번호 (원 밖 행도 섞여 있음 → within으로 거름).
+        경도 폭은 원에서 극 쪽 끝 위도 기준 (경도 1도가 가장 짧은 곳), 부동소수 오차 대비 사방 한 칸씩 더 덮음.
+        극이나 경도 ±180도를 넘는 원이면 경도 방향은 전부.
+        """
+        dlat = radius_m / _M_PER_DEG
+        edge_lat = abs(lat) + dlat
+        cos_edge = math.cos(math.radians(edge_lat)) if edge_lat < 90.0 else 0.0
+        if cos_edge * 180.0 * _M_PER_DEG <= radius_m or abs(lng) + radius_m / (_M_PER_DEG * cos_edge) >= 180.0:
+            j0, j1 = self._cell(0.0, -360.0)[1], self._cell(0.0, 360.0)[1]
+        else:
+            dlng = radius_m / (_M_PER_DEG * cos_edge)
+            j0, j1 = self._cell(0.0, lng - dlng)[1], self._cell(0.0, lng + dlng)[1]
+        i0, i1 = self._cell(lat - dlat, 0.0)[0], self._cell(lat + dlat, 0.0)[0]
+        i0, j0, i1, j1 = i0 - 1, j0 - 1, i1 + 1, j1 + 1
+        # 반경이 커서 훑을 칸이 채워진 칸보다 많으면 채워진 칸만 돌기
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._cells):
+            buckets = [b for (i, j), b in self._cells.items() if i0 <= i <= i1 and j0 <= j <= j1]
+        else:
+            cells = self._cells
+            buckets = [cells[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in cells]
+        if not buckets:
+            return np.empty(0, dtype=np.int64)
+        return np.fromiter(chain.from_iterable(buckets), dtype=np.int64, count=sum(len(b) for b in buckets))
+
+    def within(
+        self, lat: float, lng: float, radius_m: float, lats: np.ndarray, lngs: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        반경 안 (행 번호, 거리m). 거리 오름차순, 같으면 행 번호 순.
+        """
+        rows = self.candidates(lat, lng, radius_m)
+        if not len(rows):
+            return rows, np.empty(0, dtype=np.float64)
+        d = haversine_m(lat, lng, lats[rows], lngs[rows])
+        keep = d <= radius_m
+        rows, d = rows[keep], d[keep]
+        order = np.lexsort((rows, d))
+        return rows[order], d[order]
+
+    def nearest(
+        self, lat: float, lng: float, k: int, max_radius_m: float, lats: np.ndarray, lngs: np.ndarray,
+        exclude: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        가까운 순 최대 k개 (max_radius_m 안에서). 한 칸 크기 반경부터 두 배씩 넓혀가며 찾음.
+        """
+        radius = min(self.cell_deg * _M_PER_DEG, max_radius_m)
+        while True:
+            rows, d = self.within(lat, lng, radius, lats, lngs)
+            if exclude is not None:
+                keep = rows != exclude
+                rows, d = rows[keep], d[keep]
+            if len(rows) >= k or radius >= max_radius_m:
+                return rows[:k], d[:k]
+            radius = min(radius * 2.0, max_radius_m)
@@ -0,0 +1,284 @@
+import os
+import re
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from operator import attrgetter
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# recentPriceSeries가 있으면 거기서 trend(UP/DOWN/FLAT)를 직접 계산해서 점수에 씀 (0이면 요청의 trend 문자열만)
+RECO_SERIES_TREND = os.getenv("RECO_SERIES_TREND", "1") == "1"
+# trend를 계산할 최소 거래 건수 (이보다 적으면 요청의 trend 문자열 사용)
+RECO_SERIES_MIN_POINTS = int(os.getenv("RECO_SERIES_MIN_POINTS", "3"))
+# 월 환산 기울기(평균 대비 %)가 이 값 안쪽이면 FLAT
+RECO_SERIES_FLAT_PCT = float(os.getenv("RECO_SERIES_FLAT_PCT", "0.5"))
+# series 내용 → 계산 결과 메모 (같은 매물이 요청마다 같은 series로 다시 들어옴)
+RECO_SERIES_MEMO_ITEMS = int(os.getenv("RECO_SERIES_MEMO_ITEMS", "50000"))
+
+# 계산하는 특징 (값이 없으면 NaN)
+# - n: 읽을 수 있었던 거래 건수
+# - slopePct: 최소제곱 기울기를 30일 단위로 환산해서 평균 가격 대비 % (월 변화율)
+# - volPct: 가격 표준편차 / 평균 (%)
+# - recentChgPct: 마지막 거래가 직전 거래 대비 몇 % 변했는지
+# - chgPct: 처음 → 마지막 변화율 (%)
+# - last: 마지막 거래 금액 (만원)
+FEATURES = ("n", "slopePct", "volPct", "recentChgPct", "chgPct", "last")
+
+_AMOUNT_UNIT = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(억|천만|만|천)?")
+# "2억 5천"처럼 천만을 "천"으로 줄여 쓰는 경우가 많아서 천 = 천만으로 봄
+_UNIT_MANWON = {"억": 10000.0, "천만": 1000.0, "천": 1000.0, "만": 1.0, None: 1.0}
+_DATE = re.compile(r"(\d{4})[-./년\s]*(\d{1,2})(?:[-./월\s]*(\d{1,2}))?")
+
+
+@lru_cache(maxsize=65536)
+def _parse_amount_str(s: str) -> Optional[float]:
+    total = 0.0
+    found = False
+    for num, unit in _AMOUNT_UNIT.findall(s):
+        try:
+            total += float(num.replace(",", "")) * _UNIT_MANWON[unit or None]
+        except ValueError:
+            continue
+        found = True
+    return total if found else None
+
+
+def parse_amount(s: Any) -> Optional[float]:
+    """
+    금액 문자열 → 만원 단위 숫자. "4억 3,000만" → 43000, "43,000만" → 43000, "120" → 120.
+    단위 없는 숫자는 다른 가격 필드처럼 이미 만원 단위라고 봄.
+    """
+    if s is None:
+        return None
+    if isinstance(s, (int, float)):
+        return float(s)
+    return _parse_amount_str(str(s))
+
+
+def parse_date(s: Any) -> Optional[int]:
+    """
+    "2024-03-15" / "2024.03" / "2024년 3월 15일" / "20240315" → 날짜 서수(일). 일이 없으면 1일.
+    """
+    if not s:
+        return None
+    return _parse_date_str(str(s))
+
+
+@lru_cache(maxsize=65536)
+def _parse_date_str(s: str) -> Optional[int]:
+    text = s.strip()
+    if len(text) == 8 and text.isdigit():
+        text = f"{text[:4]}-{text[4:6]}-{text[6:]}"
+    m = _DATE.search(text)
+    if not m:
+        return None
+    try:
+        return date(int(m.group(1)), int(m.group(2)), int(m.group(3) or 1)).toordinal()
+    except ValueError:
+        return None
+
+
+def _get(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+_date_amount = attrgetter("date", "amount")
+
+
+def series_key(points: Optional[Sequence[Any]]) -> Optional[Tuple[Tuple[str, str], ...]]:
+    # PricePoint / {"date","amount"} dict 둘 다 받음. 내용이 같으면 같은 키
+    if not points:
+        return None
+    if isinstance(points[0], dict):
+        return tuple((str(p.get("date") or ""), str(p.get("amount") or "")) for p in points)
+    return tuple(map(_date_amount, points))
+
+
+class _Memo:
+    """series 키 → 특징 튜플 LRU."""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0}
+
+    def get_many(self, keys: Sequence[tuple]) -> List[Optional[tuple]]:
+        out = []
+        with self._lock:
+            for k in keys:
+                v = self._items.get(k)
+                if v is not None:
+                    self._items.move_to_end(k)
+                out.append(v)
+            hits = sum(1 for v in out if v is not None)
+            self.counters["hits"] += hits
+            self.counters["misses"] += len(out) - hits
+        return out
+
+    def set_many(self, items: Dict[tuple, tuple]) -> None:
+        with self._lock:
+            for k, v in items.items():
+                self._items[k] = v
+                self._items.move_to_end(k)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "items": len(self._items),
+            "hit_ratio": round(self.counters["hits"] / total, 4) if total else 0.0,
+        }
+
+
+series_memo = _Memo(RECO_SERIES_MEMO_ITEMS)
+
+
+def _compute(keys: Sequence[tuple]) -> List[tuple]:
+    """
+    series 여러 개를 한 번에: 모든 점을 (series 번호, 날짜, 금액) 평평한 배열로 펼친 뒤
+    bincount로 series별 합계를 구해서 기울기/분산/변화율 계산.
+    """
+    sid: List[int] = []
+    xs: List[float] = []
+    ys: List[float] = []
+    for i, key in enumerate(keys):
+        for d, a in key:
+            x = parse_date(d)
+            y = parse_amount(a)
+            if x is None or y is None:
+                continue
+            sid.append(i)
+            xs.append(x)
+            ys.append(y)
+
+    m = len(keys)
+    nan = np.full(m, np.nan)
+    if not sid:
+        return [(0.0,) + (math.nan,) * (len(FEATURES) - 1)] * m
+
+    s = np.array(sid, dtype=np.int64)
+    x = np.array(xs, dtype=np.float64)
+    y = np.array(ys, dtype=np.float64)
+    # series 안에서 날짜순 (같은 날짜는 입력 순서)
+    order = np.lexsort((np.arange(len(s)), x, s))
+    s, x, y = s[order], x[order], y[order]
+
+    n = np.bincount(s, minlength=m).astype(np.float64)
+    ends = np.cumsum(n).astype(np.int64)
+    starts = ends - n.astype(np.int64)
+    has = n > 0
+    has2 = n > 1
+
+    # 날짜는 series 첫 날짜 기준 일수로 (서수 그대로 제곱하면 정밀도가 떨어짐)
+    x = x - x[starts[s]]
+    sx = np.bincount(s, x, m)
+    sy = np.bincount(s, y, m)
+    sxx = np.bincount(s, x * x, m)
+    sxy = np.bincount(s, x * y, m)
+    syy = np.bincount(s, y * y, m)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(has, sy / np.maximum(n, 1), np.nan)
+        denom = n * sxx - sx * sx
+        slope = np.where(has2 & (denom > 0), (n * sxy - sx * sy) / np.where(denom > 0, denom, 1.0), np.nan)
+        slope_pct = slope * 30.0 / np.abs(mean) * 100.0
+        var = np.maximum(syy / np.maximum(n, 1) - mean * mean, 0.0)
+        vol_pct = np.where(has2, np.sqrt(var) / np.abs(mean) * 100.0, np.nan)
+
+        last = nan.copy()
+        last[has] = y[ends[has] - 1]
+        first = nan.copy()
+        first[has] = y[starts[has]]
+        prev = nan.copy()
+        prev[has2] = y[ends[has2] - 2]
+        recent = (last - prev) / np.abs(prev) * 100.0
+        chg = np.where(has2, (last - first) / np.abs(first) * 100.0, np.nan)
+
+    cols = [n, slope_pct, vol_pct, recent, chg, last]
+    for c in cols[1:]:
+        c[~np.isfinite(c)] = np.nan
+    return list(zip(*(c.tolist() for c in cols)))
+
+
+def series_features(series_list: Sequence[Optional[Sequence[Any]]]) -> Dict[str, np.ndarray]:
+    """
+    후보별 recentPriceSeries 목록 → 특징별 배열 (FEATURES 순서, 길이 = 후보 수).
+    series가 없거나 못 읽으면 n=0, 나머지 NaN. 메모에 없는 series만 한 번에 계산.
+    """
+    keys = [series_key(p) for p in series_list]
+    known = [k for k in keys if k is not None]
+    cached = dict(zip(known, series_memo.get_many(known)))
+    todo = list({k: None for k, v in cached.items() if v is None})
+    if todo:
+        fresh = dict(zip(todo, _compute(todo)))
+        series_memo.set_many(fresh)
+        cached.update(fresh)
+
+    empty = (0.0,) + (math.nan,) * (len(FEATURES) - 1)
+    rows = [empty if k is None else cached[k] for k in keys]
+    if not rows:
+        return {f: np.empty(0, dtype=np.float64) for f in FEATURES}
+    arr = np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURES))
+    return {f: arr[:, j] for j, f in enumerate(FEATURES)}
+
+
+def features_at(feats: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    # 한 후보 특징 dict (NaN → None, 소수 둘째 자리)
+    out: Dict[str, Any] = {}
+    for f in FEATURES:
+        v = float(feats[f][i])
+        out[f] = None if math.isnan(v) else (int(v) if f == "n" else round(v, 2))
+    return out
+
+
+def trend_labels(feats: Dict[str, np.ndarray]) -> List[Optional[str]]:
+    """
+    기울기 → UP/DOWN/FLAT. 거래 건수가 RECO_SERIES_MIN_POINTS보다 적거나 기울기를 못 구하면 None.
+    """
+    slope = feats["slopePct"]
+    with np.errstate(invalid="ignore"):
+        label = np.where(np.abs(slope) < RECO_SERIES_FLAT_PCT, "FLAT", np.where(slope > 0, "UP", "DOWN")).astype(object)
+    label[(feats["n"] < RECO_SERIES_MIN_POINTS) | np.isnan(slope)] = None
+    return label.tolist()
+
+
+def effective_trends(items: Sequence[Any]) -> List[Optional[str]]:
+    """
+    점수 계산에 쓸 trend: series로 계산할 수 있으면 그 값, 아니면 요청에 들어온 trend 문자열.
+    (스칼라 calc_breakdown / 벡터 score_columns / 카탈로그 모두 이 함수로 맞춤)
+    """
+    out: List[Optional[str]] = []
+    idx: List[int] = []
+    series: List[Any] = []
+    # series 있는 항목만 모아서 한 번에 계산
+    for i, p in enumerate(items):
+        if isinstance(p, dict):
+            out.append(p.get("trend"))
+            ps = p.get("recentPriceSeries")
+        else:
+            out.append(p.trend)
+            ps = p.recentPriceSeries
+        if ps and RECO_SERIES_TREND:
+            idx.append(i)
+            series.append(ps)
+    if not idx:
+        return out
+    for i, label in zip(idx, trend_labels(series_features(series))):
+        if label is not None:
+            out[i] = label
+    return out
+
+
+def effective_trend(item: Any) -> Optional[str]:
+    return effective_trends([item])[0]
@@ -1,6 +1,7 @@
 import re
 from typing import Optional, Dict
 from reco_engine.schemas import PropertyBrief
+from reco_engine.price_series import effective_trend
 
 
 def _to_num(s: Optional[str]) -> Optional[float]:
@@ -70,7 +71,8 @@ def calc_breakdown(base: PropertyBrief, c: PropertyBrief) -> Dict[str, float]:
         price_score = _sim(_to_num(base.price), _to_num(c.price))
 
     rating_score = _sim(base.rating, c.rating)
-    trend_score = _trend_score(base.trend, c.trend)
+    # recentPriceSeries가 있으면 거기서 계산한 trend 우선 (없으면 trend 문자열)
+    trend_score = _trend_score(effective_trend(base), effective_trend(c))
 
     return {
         "dist": float(dist_score),
@@ -1,12 +1,30 @@
 # reco_engine/reco_llm.py
-import os, json
-import httpx
-from typing import Dict, Any
-from reco_engine.reco_prompt import build_reco_prompt, PROMPT_VERSION
+import os, json, math, asyncio
+from common.gms_http import stream_events, post_json, GMS_CALL_ERRORS
+from common.metrics import STAGE_SECONDS, LLM_PROMPT_CHARS, LLM_PROMPT_TOKENS, LLM_RESPONSE_CHARS
+from typing import Dict, Any, List, Tuple, Optional, AsyncIterator
+from reco_engine.reco_prompt import (
+    build_reco_prompt_with_stats,
+    build_reco_batch_prompt,
+    batch_group_block,
+    count_tokens,
+    PROMPT_VERSION,
+)
+from reco_engine.explain_cache import explain_cache, explain_key, fingerprint
+from reco_engine.stream_parser import ResultsStreamParser
 
 GMS_BASE_URL = os.getenv("GMS_BASE_URL", "https://gms.ssafy.io/gmsapi/api.openai.com/v1")
 GMS_KEY = os.getenv("GMS_KEY")
 GMS_MODEL = os.getenv("GMS_MODEL", "gpt-4.1")
+GMS_RECO_TIMEOUT = float(os.getenv("GMS_RECO_TIMEOUT", "30"))
+
+# 배치(기준 매물 여러 개) 설명: LLM 호출 하나에 묶는 기준 매물 수 / 요청 하나의 호출 수 상한 / 호출당 토큰 예산 / 동시 호출 수
+# 기준 매물이 BASES_PER_CALL × MAX_CALLS보다 많으면 호출 수를 늘리는 대신 호출 하나에 더 묶음 (토큰 예산은 넘지 않음)
+RECO_BATCH_BASES_PER_CALL = int(os.getenv("RECO_BATCH_BASES_PER_CALL", "4"))
+RECO_BATCH_MAX_CALLS = int(os.getenv("RECO_BATCH_MAX_CALLS", "4"))
+RECO_BATCH_TOKEN_BUDGET = int(os.getenv("RECO_BATCH_TOKEN_BUDGET", "16000"))
+RECO_BATCH_CONCURRENCY = int(os.getenv("RECO_BATCH_CONCURRENCY", "4"))
+GMS_RECO_BATCH_TIMEOUT = float(os.getenv("GMS_RECO_BATCH_TIMEOUT", "60"))
 
 def _extract_output_text(data: Dict[str, Any]) -> str:
     text = data.get("output_text")
@@ -26,11 +44,155 @@ def _safe_float(x, default=None):
     except Exception:
         return default
 
+def split_cached(payload: Dict[str, Any]) -> Tuple[Dict[int, str], Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    후보를 캐시 hit/miss로 나눔.
+    반환: (propertyId → 캐시 키, propertyId → 캐시된 설명, 캐시에 없는 후보 목록(순위 순서))
+    """
+    cands = payload.get("candidates") or []
+    base_fp = fingerprint(payload.get("base"))
+    keys = {
+        c["propertyId"]: explain_key(base_fp, c, PROMPT_VERSION, payload.get("maxReasons"), payload.get("mode"))
+        for c in cands
+    }
+
+    cached: Dict[int, Dict[str, Any]] = {}
+    misses = []
+    for c in cands:
+        hit = explain_cache.get(keys[c["propertyId"]])
+        if hit is not None:
+            cached[c["propertyId"]] = hit
+        else:
+            misses.append(c)
+    return keys, cached, misses
+
+
+async def iter_misses(
+    payload: Dict[str, Any],
+    keys: Dict[int, str],
+    misses: List[Dict[str, Any]],
+    info: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    캐시에 없는 후보만 프롬프트에 넣어서 LLM 스트리밍 호출.
+    설명이 하나 완성될 때마다 캐시에 저장하고 바로 yield.
+    """
+    miss_keys = {c["propertyId"]: keys[c["propertyId"]] for c in misses}
+    async for item in iter_explanations({**payload, "candidates": misses}, info):
+        key = miss_keys.get(item["propertyId"])
+        if key is not None:
+            explain_cache.set(key, item)
+        yield item
+
+
+async def explain_misses(payload: Dict[str, Any], keys: Dict[int, str], misses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    iter_misses 결과를 모아서 explain_rank_and_summary와 같은 형태로 반환.
+    (misses가 비어 있으면 호출 없이 빈 results)
+    """
+    if not misses:
+        return {
+            "enabled": True,
+            "prompt_version": PROMPT_VERSION,
+            "model": GMS_MODEL,
+            "model_name": PROMPT_VERSION,
+            "results": [],
+            "meta": {},
+        }
+
+    info: Dict[str, Any] = {}
+    normalized = [item async for item in iter_misses(payload, keys, misses, info)]
+    return _explain_result(normalized, info)
+
+
 async def explain_rank_and_summary(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    후보별 설명을 캐시에서 먼저 찾고, 없는 후보만 LLM 프롬프트에 넣어서 생성.
+    결과는 payload["candidates"] 순위 순서대로 합쳐서 반환 (캐시로 다 채워지면 LLM 호출 없음).
+    GMS 호출이 실패하면(GMS_CALL_ERRORS: HTTP 오류, JSON이 아닌 응답) 예외 대신 캐시된 설명만 / 없으면 enabled=False + error.
+    """
     if not GMS_KEY:
         return {"enabled": False, "error": "GMS_KEY not set"}
 
-    prompt = build_reco_prompt(payload)
+    keys, cached, misses = split_cached(payload)
+    try:
+        out = await explain_misses(payload, keys, misses)
+    except GMS_CALL_ERRORS as e:
+        # GMS 오류/한도 초과(GmsOverloaded)/JSON이 아닌 응답: 캐시에 있는 설명만, 하나도 없으면 템플릿 fallback
+        error = f"{type(e).__name__}: {e}"
+        if not cached:
+            return {"enabled": False, "error": error}
+        out = {
+            "enabled": True,
+            "prompt_version": PROMPT_VERSION,
+            "model": GMS_MODEL,
+            "model_name": PROMPT_VERSION,
+            "results": [],
+            "meta": {},
+            "warning": error,
+        }
+
+    fresh = {x["propertyId"]: x for x in out.get("results") or []}
+    merged = []
+    for c in payload.get("candidates") or []:
+        pid = c["propertyId"]
+        item = fresh.get(pid) or cached.get(pid)
+        if item is not None:
+            merged.append(item)
+
+    out["results"] = merged
+    out["cache"] = {"hits": len(cached), "misses": len(misses)}
+    return out
+
+def _normalize_item(item: Any) -> Optional[Dict[str, Any]]:
+    # 최소 보정/정규화 (propertyId가 없거나 이상한 원소는 버림)
+    if not isinstance(item, dict):
+        return None
+    pid = item.get("propertyId")
+    if pid is None:
+        return None
+    try:
+        pid = int(pid)
+    except (TypeError, ValueError):
+        return None
+
+    aiScore = _safe_float(item.get("aiScore"), 0.0)
+    code = str(item.get("aiJudgeCode", "RECO")).strip() or "RECO"
+
+    summary = str(item.get("aiSummary", "")).strip()
+    reasons = item.get("aiReasons") or []
+    warnings = item.get("aiWarnings") or []
+
+    reasons = [str(x).strip() for x in reasons if str(x).strip()]
+    warnings = [str(x).strip() for x in warnings if str(x).strip()]
+
+    breakdown = item.get("aiBreakdown") or {}
+    # breakdown은 dict면 그대로 둠(없어도 OK)
+
+    return {
+        "propertyId": pid,
+        "aiScore": aiScore,
+        "aiJudgeCode": code,
+        "aiSummary": summary,
+        "aiReasons": reasons[:6],
+        "aiWarnings": warnings[:2],
+        "aiBreakdown": breakdown,
+    }
+
+
+async def iter_explanations(payload: Dict[str, Any], info: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Responses API를 stream=True로 호출하고, 출력 텍스트를 받는 대로 파싱해서
+    results 원소가 하나 닫힐 때마다 정규화한 결과를 yield.
+    info(dict)를 넘기면 prompt(토큰 수 등 프롬프트 통계), 끝난 뒤 text(전체 출력),
+    document(전체 JSON 또는 None), error(스트림이 중간에 끊긴 경우)를 채워줌.
+    이미 꺼낸 원소가 있으면 스트림이 끊겨도 예외 대신 info["error"]만 남김.
+    """
+    info = {} if info is None else info
+    with STAGE_SECONDS.time(stage="reco_prompt_build"):
+        prompt, info["prompt"] = build_reco_prompt_with_stats(payload)
+    LLM_PROMPT_CHARS.observe(len(prompt), op="reco_explain")
+    LLM_PROMPT_TOKENS.observe(info["prompt"]["tokens"], op="reco_explain")
 
     url = f"{GMS_BASE_URL}/responses"
     headers = {
@@ -40,59 +202,204 @@ async def explain_rank_and_summary(payload: Dict[str, Any]) -> Dict[str, Any]:
     body = {
         "model": GMS_MODEL,
         "input": prompt,
+        "stream": True,
     }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.post(url, headers=headers, json=body)
-        r.raise_for_status()
-        data = r.json()
-
-    text = _extract_output_text(data)
-
+    parser = ResultsStreamParser()
+    got = 0
     try:
-        parsed = json.loads(text)
-    except Exception:
-        return {"enabled": True, "raw": text, "prompt_version": PROMPT_VERSION}
-
-    results = parsed.get("results")
-    if not isinstance(results, list):
-        return {"enabled": True, "raw": text, "prompt_version": PROMPT_VERSION, "warning": "Invalid schema"}
-
-    # 최소 보정/정규화
-    normalized = []
-    for item in results:
-        pid = item.get("propertyId")
-        if pid is None:
-            continue
+        # 공유 커넥션 풀 사용 (요청마다 TCP/TLS 연결을 새로 맺지 않음)
+        async for ev in stream_events(url, headers, body, timeout=GMS_RECO_TIMEOUT, op="reco_explain"):
+            etype = ev.get("type")
+            if etype == "response.output_text.delta":
+                done = parser.feed(ev.get("delta") or "")
+            elif etype == "response.completed" and not parser.text:
+                # 스트리밍 없이 한 번에 온 응답
+                done = parser.feed(_extract_output_text(ev.get("response") or {}))
+            elif etype in ("error", "response.failed"):
+                info["error"] = str(ev.get("error") or ev.get("response", {}).get("error") or etype)
+                break
+            else:
+                continue
 
-        aiScore = _safe_float(item.get("aiScore"), 0.0)
-        code = str(item.get("aiJudgeCode", "RECO")).strip() or "RECO"
+            for raw in done:
+                item = _normalize_item(raw)
+                if item is not None:
+                    got += 1
+                    yield item
+    except GMS_CALL_ERRORS as e:
+        if not got:
+            raise
+        info["error"] = f"stream truncated: {type(e).__name__}"
 
-        summary = str(item.get("aiSummary", "")).strip()
-        reasons = item.get("aiReasons") or []
-        warnings = item.get("aiWarnings") or []
+    info["text"] = parser.text.strip()
+    info["document"] = parser.document()
+    LLM_RESPONSE_CHARS.observe(len(info["text"]), op="reco_explain")
 
-        reasons = [str(x).strip() for x in reasons if str(x).strip()]
-        warnings = [str(x).strip() for x in warnings if str(x).strip()]
 
-        breakdown = item.get("aiBreakdown") or {}
-        # breakdown은 dict면 그대로 둠(없어도 OK)
+def _explain_result(normalized: List[Dict[str, Any]], info: Dict[str, Any]) -> Dict[str, Any]:
+    text = info.get("text", "")
+    parsed = info.get("document")
+    prompt = info.get("prompt")
 
-        normalized.append({
-            "propertyId": int(pid),
-            "aiScore": aiScore,
-            "aiJudgeCode": code,
-            "aiSummary": summary,
-            "aiReasons": reasons[:6],
-            "aiWarnings": warnings[:2],
-            "aiBreakdown": breakdown,
-        })
+    if not normalized:
+        if not isinstance(parsed, dict):
+            return {"enabled": True, "raw": text, "prompt_version": PROMPT_VERSION, "prompt": prompt}
+        if not isinstance(parsed.get("results"), list):
+            return {"enabled": True, "raw": text, "prompt_version": PROMPT_VERSION, "prompt": prompt, "warning": "Invalid schema"}
 
-    return {
+    # 스트림이 끊겨서 전체 JSON이 없으면 model_name/meta는 기본값
+    parsed = parsed if isinstance(parsed, dict) else {}
+    out = {
         "enabled": True,
         "prompt_version": PROMPT_VERSION,
         "model": GMS_MODEL,
         "model_name": parsed.get("model_name", "reco-rank-explain-v3-dozip"),
         "results": normalized,
         "meta": parsed.get("meta", {}),
+        "prompt": prompt,
+    }
+    if info.get("error"):
+        out["warning"] = info["error"]
+    return out
+
+
+# ---------------------------------------------------------------------------
+# 배치: 기준 매물 여러 개의 설명을 LLM 호출 몇 개로 묶어서
+# ---------------------------------------------------------------------------
+
+def pack_groups(costs: List[int], overhead: int, per_call: int, max_calls: int, budget: int) -> List[List[int]]:
+    """
+    그룹(기준 매물)별 토큰 수 → 호출별 그룹 번호 목록. 순서대로 채우고,
+    호출당 그룹 수는 max(per_call, ceil(n / max_calls)), 토큰 예산을 넘으면 다음 호출로.
+    (그룹 하나가 예산보다 커도 혼자 한 호출로 보냄)
+    """
+    if not costs:
+        return []
+    per = max(1, per_call, math.ceil(len(costs) / max(1, max_calls)))
+    packs: List[List[int]] = []
+    cur: List[int] = []
+    used = overhead
+    for i, cost in enumerate(costs):
+        if cur and (len(cur) >= per or used + cost > budget):
+            packs.append(cur)
+            cur, used = [], overhead
+        cur.append(i)
+        used += cost
+    packs.append(cur)
+    return packs
+
+
+async def _explain_pack(groups: List[Dict[str, Any]]) -> Tuple[List[List[Dict[str, Any]]], Dict[str, Any]]:
+    """
+    그룹 여러 개를 프롬프트 하나로 호출 → (그룹별 정규화된 설명 목록, 프롬프트 통계).
+    응답을 JSON으로 못 읽으면 ValueError (호출한 쪽에서 그 그룹들만 실패 처리).
+    """
+    with STAGE_SECONDS.time(stage="reco_prompt_build"):
+        prompt, stats = build_reco_batch_prompt(groups)
+    LLM_PROMPT_CHARS.observe(len(prompt), op="reco_explain_batch")
+    LLM_PROMPT_TOKENS.observe(stats["tokens"], op="reco_explain_batch")
+
+    url = f"{GMS_BASE_URL}/responses"
+    headers = {
+        "Authorization": f"Bearer {GMS_KEY}",
+        "Content-Type": "application/json",
+    }
+    body = {
+        "model": GMS_MODEL,
+        "input": prompt,
     }
+    data = await post_json(url, headers, body, timeout=GMS_RECO_BATCH_TIMEOUT, op="reco_explain_batch")
+    text = _extract_output_text(data)
+    LLM_RESPONSE_CHARS.observe(len(text), op="reco_explain_batch")
+
+    parsed = json.loads(text)
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("results"), list):
+        raise ValueError("Invalid schema")
+
+    # group 번호(1부터)로 나누고, 그 그룹에 없는 propertyId는 버림
+    allowed = [{c["propertyId"] for c in g.get("candidates") or []} for g in groups]
+    out: List[List[Dict[str, Any]]] = [[] for _ in groups]
+    for raw in parsed["results"]:
+        g = _safe_float(raw.get("group")) if isinstance(raw, dict) else None
+        item = _normalize_item(raw)
+        if g is None or item is None or not g.is_integer() or not 1 <= g <= len(groups):
+            continue
+        g = int(g) - 1
+        if item["propertyId"] in allowed[g]:
+            out[g].append(item)
+    return out, stats
+
+
+async def explain_batch(payloads: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    단건 payload 여러 개 → payload별 explain_rank_and_summary와 같은 모양의 결과 + 배치 통계.
+    캐시에 없는 후보가 있는 기준 매물만 pack_groups로 묶어서 동시에 호출하고,
+    호출이 실패한 묶음의 기준 매물은 캐시에 있던 설명만 (하나도 없으면 enabled=False로 템플릿 fallback).
+    """
+    if not GMS_KEY:
+        return [{"enabled": False, "error": "GMS_KEY not set"} for _ in payloads], {"calls": 0, "groups": 0}
+
+    splits = [split_cached(p) for p in payloads]
+    todo = [i for i, (_, _, misses) in enumerate(splits) if misses]
+    groups = [{**payloads[i], "candidates": splits[i][2]} for i in todo]
+    costs = [count_tokens("\n\n" + batch_group_block(n, g)) for n, g in enumerate(groups, 1)]
+    packs = pack_groups(
+        costs, count_tokens(build_reco_batch_prompt([])[0]),
+        RECO_BATCH_BASES_PER_CALL, RECO_BATCH_MAX_CALLS, RECO_BATCH_TOKEN_BUDGET,
+    )
+
+    sem = asyncio.Semaphore(max(1, RECO_BATCH_CONCURRENCY))
+
+    async def _run(pack: List[int]):
+        async with sem:
+            return await _explain_pack([groups[j] for j in pack])
+
+    done = await asyncio.gather(*(_run(pack) for pack in packs), return_exceptions=True)
+
+    fresh: Dict[int, Dict[int, Dict[str, Any]]] = {}
+    errors: Dict[int, str] = {}
+    prompts: Dict[int, Dict[str, Any]] = {}
+    for pack, res in zip(packs, done):
+        if isinstance(res, asyncio.CancelledError):
+            raise res
+        if isinstance(res, Exception):
+            for j in pack:
+                errors[todo[j]] = f"{type(res).__name__}: {res}"
+            continue
+        per_group, stats = res
+        for j, items in zip(pack, per_group):
+            i = todo[j]
+            keys = splits[i][0]
+            prompts[i] = stats
+            fresh[i] = {}
+            for item in items:
+                explain_cache.set(keys[item["propertyId"]], item)
+                fresh[i][item["propertyId"]] = item
+
+    outs = []
+    for i, payload in enumerate(payloads):
+        _, cached, misses = splits[i]
+        if i in errors and not cached:
+            outs.append({"enabled": False, "error": errors[i]})
+            continue
+        got = fresh.get(i, {})
+        merged = []
+        for c in payload.get("candidates") or []:
+            item = got.get(c["propertyId"]) or cached.get(c["propertyId"])
+            if item is not None:
+                merged.append(item)
+        out = {
+            "enabled": True,
+            "prompt_version": PROMPT_VERSION,
+            "model": GMS_MODEL,
+            "model_name": PROMPT_VERSION,
+            "results": merged,
+            "meta": {},
+            "cache": {"hits": len(cached), "misses": len(misses)},
+            "prompt": prompts.get(i),
+        }
+        if i in errors:
+            out["warning"] = errors[i]
+        outs.append(out)
+    return outs, {"calls": len(packs), "groups": len(groups), "failedCalls": sum(1 for r in done if isinstance(r, Exception))}
@@ -1,10 +1,63 @@
 # reco_engine/reco_prompt.py
+import os
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
-PROMPT_VERSION = "reco-rank-explain-v3-dozip"
+from reco_engine.price_series import parse_amount, series_features, features_at, effective_trend
 
-def build_reco_prompt(payload: Dict[str, Any]) -> str:
+# compact(기본): 값 없는 필드 제거 + 후보 표 형식 + 토큰 예산 / legacy: 예전 JSON 통째로
+RECO_PROMPT_FORMAT = os.getenv("RECO_PROMPT_FORMAT", "compact")
+# 프롬프트 입력 토큰 상한 (넘으면 순위 낮은 후보부터 뺌)
+RECO_PROMPT_TOKEN_BUDGET = int(os.getenv("RECO_PROMPT_TOKEN_BUDGET", "6000"))
+
+LEGACY_PROMPT_VERSION = "reco-rank-explain-v3-dozip"
+COMPACT_PROMPT_VERSION = "reco-rank-explain-v5-compact"
+PROMPT_VERSION = LEGACY_PROMPT_VERSION if RECO_PROMPT_FORMAT == "legacy" else COMPACT_PROMPT_VERSION
+
+_SCHEMA = {
+    "model_name": "string",
+    "results": [
+        {
+            "propertyId": "int",
+            "aiScore": "number (0~100)",
+            "aiJudgeCode": "string (STRONG_RECO|RECO|CAUTION|WEAK)",
+            "aiSummary": "string (2~3문장, 두집이 말투, 친절/자연스러움)",
+            "aiReasons": [
+                "string (사용자 혜택/리스크 관점, 4~6개)",
+            ],
+            "aiWarnings": [
+                "string (주의/리스크 0~2개, 없으면 빈 배열)"
+            ],
+            "aiBreakdown": {
+                "dist": "number(0~1)",
+                "price": "number(0~1)",
+                "area": "number(0~1)",
+                "rating": "number(0~1)",
+                "trend": "number(0~1)"
+            }
+        }
+    ],
+    "meta": {
+        "tone": "dozip-friendly",
+        "notes": "string"
+    }
+}
+
+_RULES = [
+    "너는 ToTheZip 서비스의 안내자 '두집이'야. (캐릭터 느낌은 있지만 너무 동물처럼 말하지 마.)",
+    "사용자에게 설명하듯 친절하고 자연스럽게 말해. 존댓말 유지.",
+    "과장/단정 금지. 데이터에 없는 사실은 만들지 마.",
+    "반드시 JSON만 출력. 코드블록/설명문 금지.",
+    "aiSummary는 2~3문장. '왜 이 매물이 괜찮은지 + 어떤 점은 주의해야 하는지'가 들어가면 좋아.",
+    "aiReasons는 최소 4개, 최대 6개. '점수 이름 나열' 금지. 반드시 사용자 입장에서 의미 있는 표현으로 풀어써.",
+    "가능하면 비교형 문장으로 작성(기준 매물 대비). 예: '가격이 더 낮은 편이라 부담이 덜할 수 있어요.'",
+    "trend는 UP/DOWN/FLAT/UNKNOWN을 보고 의미를 풀어 설명해.",
+    "rating이 None이면 '후기 데이터가 부족해요'처럼 말해.",
+    "최근 거래 series가 있으면 '최근 n건 기준' 같은 표현을 써도 되지만, 숫자 조작은 하지 마."
+]
+
+
+def build_reco_prompt_legacy(payload: Dict[str, Any]) -> str:
     """
     payload = {
       "base": {...},
@@ -14,53 +67,220 @@ def build_reco_prompt(payload: Dict[str, Any]) -> str:
       ...
     }
     """
+    return (
+        "출력 JSON 스키마(반드시 준수):\n"
+        f"{json.dumps(_SCHEMA, ensure_ascii=False)}\n\n"
+        "작성 규칙:\n- " + "\n- ".join(_RULES) + "\n\n"
+        "입력 데이터(JSON):\n"
+        f"{json.dumps(payload, ensure_ascii=False)}"
+    )
 
-    schema = {
-        "model_name": "string",
-        "results": [
-            {
-                "propertyId": "int",
-                "aiScore": "number (0~100)",
-                "aiJudgeCode": "string (STRONG_RECO|RECO|CAUTION|WEAK)",
-                "aiSummary": "string (2~3문장, 두집이 말투, 친절/자연스러움)",
-                "aiReasons": [
-                    "string (사용자 혜택/리스크 관점, 4~6개)",
-                ],
-                "aiWarnings": [
-                    "string (주의/리스크 0~2개, 없으면 빈 배열)"
-                ],
-                "aiBreakdown": {
-                    "dist": "number(0~1)",
-                    "price": "number(0~1)",
-                    "area": "number(0~1)",
-                    "rating": "number(0~1)",
-                    "trend": "number(0~1)"
-                }
-            }
-        ],
-        "meta": {
-            "tone": "dozip-friendly",
-            "notes": "string"
-        }
+
+# ---------------------------------------------------------------------------
+# compact 인코더
+# ---------------------------------------------------------------------------
+
+# compact 형식에서만 쓰는 규칙 (입력 표 읽는 법)
+_COMPACT_RULES = [r.replace("rating이 None이면", "rating이 '-'(없음)이면") for r in _RULES] + [
+    "후보는 '|'로 구분한 표로 줌. 첫 줄이 컬럼 이름이고 '-'는 값 없음. 표 순서가 정량 점수 순위야.",
+    "b_dist/b_price/b_area/b_rating/b_trend는 기준 매물 대비 항목별 유사도(0~1)야.",
+    "n/slope%/vol%/recent%는 최근 거래 series 요약이야: 거래 건수, 월 환산 가격 변화율, 가격 변동폭(표준편차/평균), 직전 거래 대비 변화율.",
+]
+
+# 후보 표 컬럼 (payload 후보 dict 키, 표에 쓸 이름)
+_CAND_COLUMNS = [
+    ("propertyId", "id"), ("aptName", "apt"), ("score", "score"), ("judgeCode", "judge"),
+    ("price", "price"), ("deposit", "deposit"), ("area", "area"), ("distM", "distM"),
+    ("rating", "rating"), ("trend", "trend"),
+    ("seriesN", "n"), ("slopePct", "slope%"), ("volPct", "vol%"), ("recentChgPct", "recent%"),
+]
+_BREAKDOWN_KEYS = ("dist", "price", "area", "rating", "trend")
+# 기준 매물에서 프롬프트에 안 넣는 필드 (series는 요약으로 대체)
+_BASE_DROP = {"recentPriceSeries", "extra"}
+
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding("o200k_base")
+    TOKENIZER = "tiktoken:o200k_base"
+except Exception:
+    # tiktoken 없으면 근사치: ASCII 4자당 1토큰 + 한글 등 그 외 문자는 1자당 1토큰
+    _ENC = None
+    TOKENIZER = "estimate"
+
+
+def count_tokens(text: str) -> int:
+    if _ENC is not None:
+        return len(_ENC.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _fmt(v: Any) -> str:
+    if v is None or v == "":
+        return "-"
+    if isinstance(v, float):
+        return f"{round(v, 2):g}"
+    return str(v).replace("|", "/").replace("\n", " ")
+
+
+def summarize_series(points: Optional[List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    recentPriceSeries([{date, amount}]) → 건수/기간/최근값/최저/최고/변동률/월 기울기/변동폭 몇 개로 요약.
+    금액을 못 읽는 점은 건너뜀.
+    """
+    if not points:
+        return None
+    vals = []
+    for p in sorted(points, key=lambda x: str(x.get("date") or "")):
+        x = parse_amount(p.get("amount"))
+        if x is not None:
+            vals.append((str(p.get("date") or ""), x))
+    if not vals:
+        return {"n": len(points)}
+    first, last = vals[0][1], vals[-1][1]
+    nums = [x for _, x in vals]
+    out = {
+        "n": len(vals),
+        "from": vals[0][0],
+        "to": vals[-1][0],
+        "last": round(last, 2),
+        "min": round(min(nums), 2),
+        "max": round(max(nums), 2),
     }
+    if first:
+        out["chgPct"] = round((last - first) / abs(first) * 100.0, 1)
+    f = features_at(series_features([points]), 0)
+    for k in ("slopePct", "volPct"):
+        if f[k] is not None:
+            out[k] = f[k]
+    return out
+
+
+def _compact_base(base: Dict[str, Any]) -> Dict[str, Any]:
+    out = {k: v for k, v in base.items() if v is not None and v != "" and k not in _BASE_DROP}
+    # 월세 여부를 extra.type에 넣는 경우가 있어서 dealType이 없으면 그걸로 채움
+    extra = base.get("extra")
+    if "dealType" not in out and isinstance(extra, dict) and extra.get("type"):
+        out["dealType"] = extra["type"]
+    series = summarize_series(base.get("recentPriceSeries"))
+    if series:
+        out["series"] = series
+    # 점수 계산과 같은 trend (series에서 계산한 값 우선)
+    trend = effective_trend(base)
+    if trend:
+        out["trend"] = trend
+    return out
+
 
-    rules = [
-        "너는 ToTheZip 서비스의 안내자 '두집이'야. (캐릭터 느낌은 있지만 너무 동물처럼 말하지 마.)",
-        "사용자에게 설명하듯 친절하고 자연스럽게 말해. 존댓말 유지.",
-        "과장/단정 금지. 데이터에 없는 사실은 만들지 마.",
-        "반드시 JSON만 출력. 코드블록/설명문 금지.",
-        "aiSummary는 2~3문장. '왜 이 매물이 괜찮은지 + 어떤 점은 주의해야 하는지'가 들어가면 좋아.",
-        "aiReasons는 최소 4개, 최대 6개. '점수 이름 나열' 금지. 반드시 사용자 입장에서 의미 있는 표현으로 풀어써.",
-        "가능하면 비교형 문장으로 작성(기준 매물 대비). 예: '가격이 더 낮은 편이라 부담이 덜할 수 있어요.'",
-        "trend는 UP/DOWN/FLAT/UNKNOWN을 보고 의미를 풀어 설명해.",
-        "rating이 None이면 '후기 데이터가 부족해요'처럼 말해.",
-        "최근 거래 series가 있으면 '최근 n건 기준' 같은 표현을 써도 되지만, 숫자 조작은 하지 마."
-    ]
+def _candidate_row(c: Dict[str, Any]) -> str:
+    bd = c.get("breakdown") or {}
+    cells = [_fmt(c.get(k)) for k, _ in _CAND_COLUMNS] + [_fmt(bd.get(k)) for k in _BREAKDOWN_KEYS]
+    return "|".join(cells)
 
+
+def _group_head(payload: Dict[str, Any]) -> str:
+    # 설정 + 기준 매물 + 후보 표 머리줄 (단건/배치 프롬프트 공용)
+    cands = payload.get("candidates") or []
+    header = "|".join([name for _, name in _CAND_COLUMNS] + [f"b_{k}" for k in _BREAKDOWN_KEYS])
+    settings = {k: payload[k] for k in ("maxReasons", "mode") if payload.get(k) is not None}
     return (
+        f"설정: {json.dumps(settings, ensure_ascii=False, separators=(',', ':'))}\n"
+        f"기준 매물: {json.dumps(_compact_base(payload.get('base') or {}), ensure_ascii=False, separators=(',', ':'))}\n"
+        f"후보({len(cands)}개, 순위순):\n{header}"
+    )
+
+
+def build_reco_prompt_compact(payload: Dict[str, Any], budget: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    compact 프롬프트 + 통계.
+    - 기준 매물: null/빈 값/extra 제거, recentPriceSeries는 요약 통계로
+    - 후보: 컬럼 이름 한 줄 + 후보당 한 줄 표
+    - 토큰 예산을 넘으면 순위 낮은(뒤쪽) 후보부터 뺌 (최소 1개는 남김)
+    반환: (프롬프트, {"tokens", "budget", "candidates", "trimmed", "tokenizer"})
+    """
+    budget = RECO_PROMPT_TOKEN_BUDGET if budget is None else budget
+    cands = payload.get("candidates") or []
+
+    head = (
         "출력 JSON 스키마(반드시 준수):\n"
-        f"{json.dumps(schema, ensure_ascii=False)}\n\n"
-        "작성 규칙:\n- " + "\n- ".join(rules) + "\n\n"
-        "입력 데이터(JSON):\n"
-        f"{json.dumps(payload, ensure_ascii=False)}"
+        f"{json.dumps(_SCHEMA, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        "작성 규칙:\n- " + "\n- ".join(_COMPACT_RULES) + "\n\n"
+        + _group_head(payload)
     )
+
+    rows = [_candidate_row(c) for c in cands]
+    # 줄마다 토큰 수를 한 번씩만 세서 예산 안에 들어가는 앞쪽 후보까지만 남김
+    used = count_tokens(head)
+    kept = 0
+    for row in rows:
+        cost = count_tokens("\n" + row)
+        if kept and used + cost > budget:
+            break
+        used += cost
+        kept += 1
+
+    if kept < len(rows):
+        head = head.replace(f"후보({len(cands)}개, 순위순)", f"후보({kept}개, 순위순)", 1)
+    prompt = "\n".join([head] + rows[:kept])
+    return prompt, {
+        "tokens": count_tokens(prompt),
+        "budget": budget,
+        "candidates": kept,
+        "trimmed": len(rows) - kept,
+        "tokenizer": TOKENIZER,
+    }
+
+
+def build_reco_prompt_with_stats(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    if RECO_PROMPT_FORMAT == "legacy":
+        prompt = build_reco_prompt_legacy(payload)
+        n = len(payload.get("candidates") or [])
+        return prompt, {"tokens": count_tokens(prompt), "budget": None, "candidates": n, "trimmed": 0, "tokenizer": TOKENIZER}
+    return build_reco_prompt_compact(payload)
+
+
+def build_reco_prompt(payload: Dict[str, Any]) -> str:
+    return build_reco_prompt_with_stats(payload)[0]
+
+
+# ---------------------------------------------------------------------------
+# 배치(기준 매물 여러 개를 LLM 호출 하나로) 인코더
+# ---------------------------------------------------------------------------
+
+_BATCH_SCHEMA = {
+    **_SCHEMA,
+    "results": [{"group": "int (입력 그룹 번호)", **_SCHEMA["results"][0]}],
+}
+_BATCH_RULES = _COMPACT_RULES + [
+    "입력은 '[그룹 N]'으로 나뉜 여러 그룹이야. 그룹마다 기준 매물과 후보 표가 따로 있고, 후보는 자기 그룹의 기준 매물하고만 비교해.",
+    "results에는 모든 그룹의 후보를 한 배열로 넣고, 원소마다 그 후보가 속한 그룹 번호(group)를 꼭 넣어.",
+]
+
+
+def batch_group_block(group_no: int, payload: Dict[str, Any]) -> str:
+    """
+    배치 프롬프트의 그룹 하나 (그룹 번호는 1부터). 토큰 예산으로 그룹을 묶을 때도 이걸로 셈.
+    """
+    rows = [_candidate_row(c) for c in payload.get("candidates") or []]
+    return "\n".join([f"[그룹 {group_no}]", _group_head(payload)] + rows)
+
+
+def build_reco_batch_prompt(payloads: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    기준 매물 여러 개(각각 단건 payload와 같은 모양)를 compact 형식 그룹으로 이어 붙인 프롬프트 + 통계.
+    후보를 빼는 예산 처리는 없음 (그룹을 몇 개씩 묶을지는 reco_llm이 토큰 수를 보고 정함).
+    """
+    prompt = (
+        "출력 JSON 스키마(반드시 준수):\n"
+        f"{json.dumps(_BATCH_SCHEMA, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        "작성 규칙:\n- " + "\n- ".join(_BATCH_RULES) + "\n\n"
+        + "\n\n".join(batch_group_block(g, p) for g, p in enumerate(payloads, 1))
+    )
+    return prompt, {
+        "tokens": count_tokens(prompt),
+        "budget": None,
+        "groups": len(payloads),
+        "candidates": sum(len(p.get("candidates") or []) for p in payloads),
+        "trimmed": 0,
+        "tokenizer": TOKENIZER,
+    }
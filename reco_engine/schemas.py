@@ -19,6 +19,9 @@ class PropertyBrief(BaseModel):
     buildYear: Optional[int] = None
 
     distM: Optional[float] = None
+    # 좌표 (매물 카탈로그/ID 요청에서 distM 대신 거리 계산용)
+    lat: Optional[float] = None
+    lng: Optional[float] = None
 
     # ✅ 추가
     rating: Optional[float] = None
@@ -36,6 +39,49 @@ class RecoRankExplainRequest(BaseModel):
     maxReasons: int = Field(3, ge=1, le=5)
 
 
+class RecoRankByIdRequest(BaseModel):
+    # 매물 정보는 서버 카탈로그(feature_store)에서 꺼내 쓰고 ID만 받음
+    baseId: int
+    candidateIds: List[int]
+    mode: str = Field("compare", description="compare")
+    topK: int = Field(10, ge=1, le=30)
+    maxReasons: int = Field(3, ge=1, le=5)
+
+
+class RecoNearbyRequest(BaseModel):
+    # 후보 목록 없이 기준 매물 주변(반경 radiusM 안 / 가까운 k개)을 카탈로그에서 찾아서 추천
+    baseId: int
+    radiusM: Optional[float] = Field(None, gt=0)
+    k: Optional[int] = Field(None, ge=1, le=10000)
+    mode: str = Field("compare", description="compare")
+    topK: int = Field(10, ge=1, le=30)
+    maxReasons: int = Field(3, ge=1, le=5)
+
+
+class RecoBatchItem(BaseModel):
+    # 배치 요청의 기준 매물 하나. candidates가 없으면 요청의 공유 후보 풀(RecoRankBatchRequest.candidates)을 씀
+    key: Optional[str] = None  # 결과 dict 키 (없으면 base.propertyId)
+    base: PropertyBrief
+    candidates: Optional[List[PropertyBrief]] = None
+    mode: str = Field("compare", description="compare")
+    topK: int = Field(10, ge=1, le=30)
+    maxReasons: int = Field(3, ge=1, le=5)
+
+
+class RecoRankBatchRequest(BaseModel):
+    # 기준 매물 여러 개를 한 요청으로 (공유 후보 풀은 컬럼 변환을 한 번만 하고 기준 매물마다 점수만 다시 계산)
+    items: List[RecoBatchItem] = Field(..., min_length=1, max_length=50)
+    candidates: Optional[List[PropertyBrief]] = None
+
+
+class RecoRankStreamHeader(BaseModel):
+    # NDJSON 요청 첫 줄: 후보 목록을 뺀 나머지 (후보는 다음 줄부터 한 줄에 하나)
+    base: PropertyBrief
+    mode: str = Field("compare", description="compare")
+    topK: int = Field(10, ge=1, le=30)
+    maxReasons: int = Field(3, ge=1, le=5)
+
+
 class CandidateRankExplain(BaseModel):
     propertyId: int
     score: float
@@ -50,3 +96,16 @@ class RecoRankExplainResponse(BaseModel):
     model: Optional[str] = None
     results: List[CandidateRankExplain]
     error: Optional[str] = None
+    # ID 요청에서 카탈로그에 없어서 빠진 후보
+    missingIds: Optional[List[int]] = None
+    # 주변 검색 요청에서 찾은(점수 계산한) 후보 수
+    candidateCount: Optional[int] = None
+    promptTokens: Optional[int] = None  # LLM 프롬프트 입력 토큰 수 (캐시로 호출 안 했으면 None)
+
+
+class RecoRankBatchResponse(BaseModel):
+    status: str = "ok"
+    # 기준 매물 키 → 단건 /reco/rank-explain과 같은 모양의 결과
+    results: Dict[str, RecoRankExplainResponse]
+    llmCalls: int = 0  # 설명에 쓴 LLM 호출 수 (캐시로 다 채워지면 0)
+    error: Optional[str] = None
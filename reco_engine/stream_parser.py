@@ -0,0 +1,92 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class ResultsStreamParser:
+    """
+    LLM이 조각조각 보내는 JSON 텍스트에서 {"results": [ {...}, {...} ]} 배열의 원소를
+    닫는 중괄호가 도착하는 대로 하나씩 꺼냄.
+    - 문자열 안의 괄호/이스케이프는 무시
+    - 원소 하나가 깨져 있어도 그 원소만 버리고 계속 진행
+    - 스트림이 중간에 끊겨도 그때까지 닫힌 원소는 이미 반환된 상태
+    """
+
+    def __init__(self, key: str = "results"):
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_str = False
+        self._esc = False
+        self._str_start = 0
+        self._last_str: Optional[str] = None
+        self._last_key: Optional[str] = None
+        self._in_results = False
+        self._obj_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        텍스트 조각을 넣고, 이번 조각에서 완성된 results 원소들을 반환.
+        """
+        self.text += chunk
+        text = self.text
+        out: List[Dict[str, Any]] = []
+        stack = self._stack
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    if len(stack) == 1:
+                        self._last_str = text[self._str_start + 1:i]
+                continue
+
+            if not stack and ch != "{":
+                # 최상위 객체 앞의 잡문자(코드블록 표시 등)는 건너뜀
+                continue
+
+            if ch == '"':
+                self._in_str = True
+                self._str_start = i
+            elif ch == ":" and len(stack) == 1:
+                self._last_key = self._last_str
+            elif ch == "," and len(stack) == 1:
+                self._last_key = None
+            elif ch == "{" or ch == "[":
+                if ch == "[" and len(stack) == 1 and self._last_key == self.key:
+                    self._in_results = True
+                elif ch == "{" and self._in_results and len(stack) == 2:
+                    self._obj_start = i
+                stack.append(ch)
+            elif ch == "}" or ch == "]":
+                if stack:
+                    stack.pop()
+                if ch == "}" and self._obj_start is not None and len(stack) == 2:
+                    try:
+                        obj = json.loads(text[self._obj_start:i + 1])
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        out.append(obj)
+                    self._obj_start = None
+                elif ch == "]" and self._in_results and len(stack) == 1:
+                    self._in_results = False
+
+        self._pos = len(text)
+        return out
+
+    def document(self) -> Optional[Any]:
+        """
+        지금까지 받은 텍스트 전체를 JSON으로 파싱 (끊긴 스트림/JSON 아님이면 None).
+        model_name, meta 같은 나머지 필드를 읽을 때 사용.
+        """
+        try:
+            return json.loads(self.text)
+        except ValueError:
+            return None
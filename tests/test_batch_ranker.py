@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+import pytest
+
+from bench.bench_ranker import check_parity, make_base, make_candidates, make_series
+from reco_engine.batch_ranker import build_columns, score_columns, top_k, rank_order, TREND_OTHER, _TREND_NAMES
+from reco_engine.schemas import PricePoint
+
+
+@pytest.mark.parametrize("monthly", [False, True])
+def test_vectorized_scoring_matches_scalar(monthly):
+    # breakdown/score가 calc_breakdown/calc_score_0_100과 숫자까지 같고, 순위도 sorted(..., reverse=True)와 같음
+    check_parity(make_base(monthly), make_candidates(3000, seed=1 + monthly))
+
+
+@pytest.mark.parametrize("monthly", [False, True])
+def test_parity_when_base_has_price_series(monthly):
+    base = make_base(monthly)
+    base.recentPriceSeries = make_series(random.Random(3)) or [PricePoint(date="2024-01-01", amount="43,000만")]
+    check_parity(base, make_candidates(3000, seed=3 + monthly))
+
+
+def test_dict_candidates_build_the_same_columns():
+    cands = make_candidates(500, seed=7)
+    dicts = [c.model_dump() for c in cands]
+
+    a, b = build_columns(cands), build_columns(dicts)
+
+    assert a.keys() == b.keys()
+    for k in a:
+        np.testing.assert_array_equal(a[k], b[k])
+
+
+def test_unparseable_values_count_as_missing():
+    cols = build_columns([
+        {"propertyId": "1", "distM": "120.5", "area": "59", "price": "43,000만", "rating": None},
+        {"propertyId": 2, "distM": None, "area": "넓음", "price": "가격문의", "rating": [4]},
+        {"propertyId": 3, "distM": "abc", "area": 84.0, "price": None, "rating": 4.5},
+        {"propertyId": 2**70, "distM": 10, "area": None, "price": "50,000만", "rating": 3},
+    ])
+
+    assert cols["propertyId"].tolist() == [1, 2, 3, 2**70]
+    np.testing.assert_array_equal(cols["dist"], [120.5, 99999.0, 99999.0, 10.0])
+    np.testing.assert_array_equal(cols["area"], [59.0, np.nan, 84.0, np.nan])
+    np.testing.assert_array_equal(cols["price"], [43000.0, np.nan, np.nan, 50000.0])
+    np.testing.assert_array_equal(cols["rating"], [np.nan, np.nan, 4.5, 3.0])
+
+
+def test_unknown_trends_share_one_code():
+    cands = [{"propertyId": i, "trend": t} for i, t in enumerate(["UP", "rising", "x" * 40, None, "FLAT", "아무거나"])]
+    cols = build_columns(cands)
+
+    np.testing.assert_array_equal(cols["trend"], [1, TREND_OTHER, TREND_OTHER, 0, 3, TREND_OTHER])
+    # 새 문자열을 계속 보내도 코드 표/점수표가 커지지 않음
+    build_columns([{"propertyId": i, "trend": f"t{i}"} for i in range(1000)])
+    assert len(_TREND_NAMES) == TREND_OTHER + 1
+
+    for base_trend, want in (("UP", 0.2), ("FLAT", 0.6), ("UNKNOWN", 0.3), (None, 0.3)):
+        base = make_base(False)
+        base.trend, base.recentPriceSeries = base_trend, None
+        assert score_columns(base, cols)["trend"][1] == want
+
+
+def test_top_k_matches_full_sort():
+    scores = score_columns(make_base(False), build_columns(make_candidates(2000, seed=11)))["score"]
+
+    for k in (1, 10, 30, 2000, 5000):
+        np.testing.assert_array_equal(top_k(scores, k), rank_order(scores)[:k])
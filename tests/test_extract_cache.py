@@ -0,0 +1,42 @@
+import asyncio
+import uuid
+
+import pytest
+
+import app as app_module
+from ocr_engine.ocr_cache import content_key
+
+
+async def _fake_ocr(images, cache_params=None, on_page=None):
+    return {"texts": ["제1조 임대인 홍길동 임차인 김철수 보증금 일억원"] * len(images), "errors": [], "sources": ["ocr"] * len(images)}
+
+
+def _run(monkeypatch, llm_out):
+    async def fake_analyze(full_text, pages=None):
+        return llm_out
+
+    monkeypatch.setattr(app_module, "ocr_pages", _fake_ocr)
+    monkeypatch.setattr(app_module, "analyze_contract_text", fake_analyze)
+    image = uuid.uuid4().bytes  # 테스트마다 다른 캐시 키
+    plan = app_module._extract_plan(["a.jpg"], "default")
+    out = asyncio.run(app_module._run_extract(plan, [image], llm=1, text_layer=1))
+    key = content_key([image], kind="images", llm=1, profile="default")
+    return out, app_module.doc_cache.get_json(key)
+
+
+@pytest.mark.parametrize("llm_out", [
+    {"enabled": True, "suspicious": False, "risk": 10, "reasons": [], "chunks": 3,
+     "chunk_errors": [{"chunk": 1, "error": "503 Service Unavailable"}]},
+    {"enabled": False, "error": "HTTPStatusError: 503"},
+])
+def test_degraded_llm_analysis_is_not_cached(monkeypatch, llm_out):
+    out, cached = _run(monkeypatch, llm_out)
+
+    assert out["analysis"]["llm"] == llm_out
+    assert cached is None
+
+
+def test_complete_llm_analysis_is_cached(monkeypatch):
+    out, cached = _run(monkeypatch, {"enabled": True, "suspicious": False, "risk": 10, "reasons": []})
+
+    assert cached == out
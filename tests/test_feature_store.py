@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from reco_engine import feature_store as fs
+from reco_engine.feature_store import FeatureStore
+from reco_engine.schemas import PropertyBrief
+
+# 다른 테스트의 propertyId와 안 겹치게
+_pids = itertools.count(800_000)
+
+
+def _brief(pid: int, price: str = "80") -> PropertyBrief:
+    return PropertyBrief(propertyId=pid, dealType="월세", price=price, deposit="1000만", lat=37.5, lng=127.0)
+
+
+def test_upserts_reach_other_workers_and_survive_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "RECO_CATALOG_SYNC_SEC", 0.0)
+    db = str(tmp_path / "catalog.db")
+    a, b = FeatureStore(), FeatureStore()
+    a.attach_db(db)
+    b.attach_db(db)
+    pid = next(_pids)
+
+    a.upsert_shared([_brief(pid, "80")])
+    assert b.sync() == 1
+    assert b.get(pid).price == "80"
+
+    b.upsert_shared([_brief(pid, "95")])
+    a.sync()
+    assert a.get(pid).price == "95"
+    assert a.nearby(37.5, 127.0, radius_m=100)[0].tolist() == [a.row_of(pid)]
+
+    restarted = FeatureStore()
+    restarted.attach_db(db)
+    restarted.sync(force=True)
+    assert restarted.get(pid).price == "95"
+    assert len(restarted) == 1
+
+
+def test_sync_is_throttled(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "RECO_CATALOG_SYNC_SEC", 3600.0)
+    db = str(tmp_path / "catalog.db")
+    a, b = FeatureStore(), FeatureStore()
+    a.attach_db(db)
+    b.attach_db(db)
+    b.sync()
+
+    a.upsert_shared([_brief(next(_pids))])
+
+    assert not b.sync_due()
+    assert b.sync() == 0
+    assert b.sync(force=True) == 1
+
+
+@pytest.mark.parametrize("configured,sent,status", [("", "x", 403), ("secret", None, 401), ("secret", "nope", 401), ("secret", "secret", 200)])
+def test_upsert_endpoint_requires_admin_token(monkeypatch, configured, sent, status):
+    monkeypatch.setattr(app_module, "RECO_ADMIN_TOKEN", configured)
+    pid = next(_pids)
+    headers = {"X-Admin-Token": sent} if sent is not None else {}
+
+    r = TestClient(app_module.app).post("/reco/catalog/upsert", json=[_brief(pid).model_dump()], headers=headers)
+
+    assert r.status_code == status
+    assert (app_module.feature_store.get(pid) is not None) == (status == 200)
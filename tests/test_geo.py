@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from reco_engine.feature_store import FeatureStore
+from reco_engine.geo import GridIndex, haversine_m
+from reco_engine.schemas import PropertyBrief
+
+
+def make_points(rng, n, lat, lng, spread_deg):
+    lats = lat + rng.uniform(-spread_deg, spread_deg, n)
+    lngs = lng + rng.uniform(-spread_deg, spread_deg, n)
+    return lats, lngs
+
+
+def brute_within(lat, lng, radius_m, lats, lngs):
+    d = haversine_m(lat, lng, lats, lngs)
+    rows = np.flatnonzero(d <= radius_m)
+    order = np.lexsort((rows, d[rows]))
+    return rows[order], d[rows][order]
+
+
+@pytest.mark.parametrize("center", [(37.5, 127.0), (33.2, 126.5), (-45.0, 170.0), (64.0, -21.0), (89.9, 0.0), (0.0, 179.99)])
+def test_within_matches_brute_force(center):
+    rng = np.random.default_rng(22)
+    lats, lngs = make_points(rng, 4000, *center, spread_deg=0.2)
+    lats = np.clip(lats, -90.0, 90.0)
+    lngs = (lngs + 180.0) % 360.0 - 180.0
+    grid = GridIndex(0.01)
+    for row, (a, b) in enumerate(zip(lats, lngs)):
+        grid.put(row, float(a), float(b))
+
+    for _ in range(60):
+        lat = float(np.clip(center[0] + rng.uniform(-0.1, 0.1), -90.0, 90.0))
+        lng = float((center[1] + rng.uniform(-0.1, 0.1) + 180.0) % 360.0 - 180.0)
+        radius = float(rng.choice([50.0, 500.0, 999.5, 1000.0, 3000.0, 15000.0]))
+        rows, d = grid.within(lat, lng, radius, lats, lngs)
+        want_rows, want_d = brute_within(lat, lng, radius, lats, lngs)
+
+        np.testing.assert_array_equal(rows, want_rows)
+        np.testing.assert_allclose(d, want_d)
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(7)
+    lats, lngs = make_points(rng, 3000, 37.5, 127.0, spread_deg=0.3)
+    grid = GridIndex(0.01)
+    for row, (a, b) in enumerate(zip(lats, lngs)):
+        grid.put(row, float(a), float(b))
+
+    for _ in range(50):
+        lat, lng = 37.5 + rng.uniform(-0.2, 0.2), 127.0 + rng.uniform(-0.2, 0.2)
+        k = int(rng.integers(1, 40))
+        rows, d = grid.nearest(lat, lng, k, 20000.0, lats, lngs)
+        want_rows, want_d = brute_within(lat, lng, 20000.0, lats, lngs)
+
+        np.testing.assert_array_equal(rows, want_rows[:k])
+        np.testing.assert_allclose(d, want_d[:k])
+
+
+def test_row_just_inside_radius_is_found():
+    store = FeatureStore()
+    store.upsert([PropertyBrief(propertyId=1, lat=37.0100005, lng=127.0)])
+
+    rows, d = store.nearby(37.001012, 127.0, radius_m=1000)
+
+    assert rows.tolist() == [0]
+    assert d[0] < 1000
@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from common import gms_http
+from common.limiter import AdaptiveLimiter
+from ocr_engine import gms_llm
+from reco_engine import reco_llm
+
+# 테스트마다 다른 propertyId (설명 캐시에 이전 테스트 결과가 남아 있어도 안 걸리게)
+_pids = itertools.count(900_000)
+
+
+def _brief(pid: int, price: str = "80") -> dict:
+    return {"propertyId": pid, "dealType": "월세", "price": price, "deposit": "1000만", "area": 59.0, "rating": 4.0}
+
+
+@pytest.fixture
+def gms(monkeypatch):
+    """
+    GMS를 MockTransport로 바꿔 끼움. calls에 실제로 나간 요청 수, status로 응답 코드 지정.
+    text를 주면 그 본문을 그대로 (JSON이 아닌 응답 재현용).
+    """
+    state = {"calls": 0, "status": 503, "text": None}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        state["calls"] += 1
+        if state["text"] is not None:
+            return httpx.Response(state["status"], text=state["text"], headers={"content-type": state["content_type"]})
+        return httpx.Response(state["status"], json={"error": "unavailable"})
+
+    monkeypatch.setattr(reco_llm, "GMS_KEY", "test")
+    monkeypatch.setattr(gms_llm, "GMS_KEY", "test")
+    monkeypatch.setattr(gms_http, "gms_limiter", AdaptiveLimiter(initial=4, max_limit=4))
+    monkeypatch.setattr(gms_http, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield state
+    monkeypatch.setattr(gms_http, "_client", None)
+
+
+def _rank_request() -> dict:
+    base = next(_pids)
+    return {"base": _brief(base), "candidates": [_brief(next(_pids), str(p)) for p in (70, 80, 95)], "topK": 2}
+
+
+def test_rank_explain_degrades_on_gms_503(gms):
+    r = TestClient(app_module.app).post("/reco/rank-explain", json=_rank_request())
+
+    assert r.status_code == 200
+    body = r.json()
+    assert gms["calls"] == 1
+    assert body["model"] is None
+    assert "503" in body["error"]
+    assert len(body["results"]) == 2
+    assert all(x["summary"] and x["reasons"] for x in body["results"])
+    # 503은 과부하 신호 → 한도가 줄어듦
+    assert gms_http.gms_limiter.stats()["drops"] == 1
+
+
+def test_rank_explain_degrades_when_limiter_rejects(gms, monkeypatch):
+    # 자리 하나가 이미 차 있고 대기열 0 → 호출 없이 GmsOverloaded
+    limiter = AdaptiveLimiter(initial=1, max_limit=1, max_queue=0)
+    limiter.in_flight = 1
+    monkeypatch.setattr(gms_http, "gms_limiter", limiter)
+
+    r = TestClient(app_module.app).post("/reco/rank-explain", json=_rank_request())
+
+    assert r.status_code == 200
+    assert gms["calls"] == 0
+    assert "GmsOverloaded" in r.json()["error"]
+    assert limiter.stats()["rejected"] == 1
+    assert len(r.json()["results"]) == 2
+
+
+def test_rank_explain_keeps_cached_explanations_on_failure(gms):
+    req = _rank_request()
+    enriched = app_module._rank_enriched(app_module.RecoRankExplainRequest(**req))
+    payload = app_module._explain_payload(app_module.PropertyBrief(**req["base"]), enriched, 3, "compare")
+    keys, _, _ = reco_llm.split_cached(payload)
+    first = enriched[0]["propertyId"]
+    reco_llm.explain_cache.set(keys[first], {"propertyId": first, "aiSummary": "캐시된 설명", "aiReasons": ["a"]})
+
+    out = asyncio.run(reco_llm.explain_rank_and_summary(payload))
+
+    assert out["enabled"] is True
+    assert "503" in out["warning"]
+    assert [x["propertyId"] for x in out["results"]] == [first]
+
+
+def test_contract_analysis_degrades_on_gms_503(gms):
+    out = asyncio.run(gms_llm.analyze_contract_text("제1조 임대인과 임차인은 ..."))
+
+    assert out["enabled"] is False
+    assert "503" in out["error"]
+
+
+def test_contract_analysis_all_chunks_fail(gms, monkeypatch):
+    text = "\n".join(f"제{i}조 " + "가" * 50 for i in range(1, 7))
+    chunks = gms_llm.split_contract_text(text, limit=120)
+    assert len(chunks) > 1
+
+    monkeypatch.setattr(gms_llm, "split_contract_text", lambda full_text, pages=None: chunks)
+    out = asyncio.run(gms_llm.analyze_contract_text(text))
+
+    assert out["enabled"] is False
+    assert out["chunks"] == len(chunks)
+    assert len(out["chunk_errors"]) == len(chunks)
+
+
+NON_JSON_BODIES = [("<html><body>502 Bad Gateway</body></html>", "text/html"), ("upstream error", "text/plain")]
+
+
+@pytest.mark.parametrize("text,content_type", NON_JSON_BODIES)
+def test_rank_explain_degrades_on_non_json_200(gms, text, content_type):
+    gms.update(status=200, text=text, content_type=content_type)
+
+    r = TestClient(app_module.app).post("/reco/rank-explain", json=_rank_request())
+
+    assert r.status_code == 200
+    assert gms["calls"] == 1
+    assert r.json()["model"] is None
+    assert "JSONDecodeError" in r.json()["error"]
+    assert len(r.json()["results"]) == 2
+
+
+@pytest.mark.parametrize("text,content_type", NON_JSON_BODIES)
+def test_contract_analysis_degrades_on_non_json_200(gms, text, content_type):
+    gms.update(status=200, text=text, content_type=content_type)
+
+    out = asyncio.run(gms_llm.analyze_contract_text("제1조 임대인과 임차인은 ..."))
+
+    assert out["enabled"] is False
+    assert "JSONDecodeError" in out["error"]
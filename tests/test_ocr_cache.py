@@ -0,0 +1,50 @@
+import asyncio
+import sqlite3
+
+from ocr_engine import ocr_cache
+from ocr_engine.ocr_cache import OcrCache
+
+
+def _last_access(db_path, key):
+    with sqlite3.connect(db_path) as db:
+        return db.execute("SELECT last_access FROM ocr_cache WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_async_disk_hit_runs_off_the_event_loop(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "cache.db")
+    asyncio.run(OcrCache("doc", db_path=db_path).aset_json("k", {"a": 1}))
+
+    calls = []
+    real_to_thread = asyncio.to_thread
+
+    async def spy(fn, *args):
+        calls.append(fn.__name__)
+        return await real_to_thread(fn, *args)
+
+    monkeypatch.setattr(ocr_cache.asyncio, "to_thread", spy)
+    cache = OcrCache("doc", db_path=db_path)  # 메모리는 비어 있음 → 디스크에서
+
+    assert asyncio.run(cache.aget_json("k")) == {"a": 1}
+    assert asyncio.run(cache.aget_json("k")) == {"a": 1}
+    assert calls == ["_get_disk"]  # 두 번째는 메모리 적중이라 스레드도 안 씀
+    assert cache.stats()["hits_disk"] == 1 and cache.stats()["hits_mem"] == 1
+
+
+def test_disk_hit_does_not_rewrite_recent_last_access(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    OcrCache("page", db_path=db_path).set("k", "text")
+    before = _last_access(db_path, "k")
+
+    assert OcrCache("page", db_path=db_path, touch_sec=3600).get("k") == "text"
+    assert _last_access(db_path, "k") == before
+
+    assert OcrCache("page", db_path=db_path, touch_sec=0).get("k") == "text"
+    assert _last_access(db_path, "k") > before
+
+
+def test_miss_is_counted_once(tmp_path):
+    cache = OcrCache("page", db_path=str(tmp_path / "cache.db"))
+
+    assert asyncio.run(cache.aget("nope")) is None
+    assert cache.get("nope") is None
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,42 @@
+import pytest
+
+from bench.bench_raster import make_scanned_pdf
+from ocr_engine.pdf_render import open_pdf, render_page_image, preprocess_image_bytes, PROFILES
+
+
+@pytest.fixture(scope="module")
+def page():
+    doc = open_pdf(make_scanned_pdf(1), max_pages=0)
+    yield doc.load_page(0)
+    doc.close()
+
+
+def test_default_profile_reports_no_savings(page):
+    out, stat = render_page_image(page, 2.0, PROFILES["default"])
+
+    assert stat == {"bytes_before": len(out), "bytes_after": len(out)}
+
+
+@pytest.mark.parametrize("name", [n for n in PROFILES if n != "default"])
+def test_before_is_default_profile_output_size(page, name):
+    default_out, _ = render_page_image(page, 2.0, PROFILES["default"])
+    out, stat = render_page_image(page, 2.0, PROFILES[name], measure_before=True)
+
+    assert stat["bytes_before"] == len(default_out)
+    assert stat["bytes_after"] == len(out)
+
+
+@pytest.mark.parametrize("name", [n for n in PROFILES if n != "default"])
+def test_before_is_not_measured_by_default(page, name):
+    # 운영 기본값: default 재인코딩 비용을 안 씀
+    out, stat = render_page_image(page, 2.0, PROFILES[name])
+
+    assert stat == {"bytes_before": None, "bytes_after": len(out)}
+
+
+def test_image_path_uses_the_same_baseline(page):
+    # 업로드 이미지도 default 프로파일이 보낼 bytes(=원본)가 before
+    default_out, _ = render_page_image(page, 2.0, PROFILES["default"])
+    _, stat = preprocess_image_bytes(default_out, PROFILES["compact"])
+
+    assert stat["bytes_before"] == len(default_out)
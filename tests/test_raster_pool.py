@@ -0,0 +1,57 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ocr_engine.raster_pool as rp
+from bench.bench_raster import make_scanned_pdf
+from ocr_engine.pdf_render import open_pdf, iter_pdf_pages
+
+
+@pytest.fixture(scope="module")
+def pdf_bytes():
+    return make_scanned_pdf(6)
+
+
+def _pages(pdf_bytes, pooled, executor=None):
+    doc = open_pdf(pdf_bytes, max_pages=0)
+    try:
+        if pooled:
+            return dict(rp.iter_pdf_pages_pooled(pdf_bytes, doc, text_layer=False, executor=executor))
+        return dict(iter_pdf_pages(doc, text_layer=False))
+    finally:
+        doc.close()
+
+
+def test_pooled_matches_serial_and_cleans_up(pdf_bytes, tmp_path, monkeypatch):
+    monkeypatch.setattr(rp, "RASTER_TMP_DIR", str(tmp_path))
+    monkeypatch.setattr(rp, "RASTER_POOL_MIN_PAGES", 2)
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        pooled = _pages(pdf_bytes, True, ex)
+
+    assert pooled == _pages(pdf_bytes, False)
+    # 워커에 넘긴 임시파일은 끝나면 지움
+    assert os.listdir(tmp_path) == []
+
+
+def test_small_documents_render_in_process(pdf_bytes, monkeypatch):
+    monkeypatch.setattr(rp, "RASTER_POOL_MIN_PAGES", 100)
+
+    def no_pool():
+        raise AssertionError("풀을 쓰면 안 됨")
+
+    monkeypatch.setattr(rp, "get_executor", no_pool)
+    assert _pages(pdf_bytes, True) == _pages(pdf_bytes, False)
+
+
+def test_idle_worker_documents_are_closed(pdf_bytes, monkeypatch):
+    monkeypatch.setattr(rp, "RASTER_POOL_MIN_PAGES", 2)
+    monkeypatch.setattr(rp, "RASTER_DOC_IDLE_SEC", 0.05)
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        _pages(pdf_bytes, True, ex)
+        # 쉬는 워커가 지운 임시파일의 문서를 계속 들고 있지 않음
+        deadline = time.monotonic() + 5
+        while rp._docs and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert rp._docs == {}
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+
+_HEADER = {"base": {"propertyId": 1, "dealType": "월세", "price": "80", "deposit": "1000만", "area": 59.0}, "topK": 2}
+
+
+def _post(rows):
+    body = "\n".join(json.dumps(x, ensure_ascii=False) for x in [_HEADER] + rows)
+    return TestClient(app_module.app).post(
+        "/reco/rank-explain/ndjson", content=body.encode("utf-8"), headers={"content-type": "application/x-ndjson"},
+    )
+
+
+def _row(pid, **kw):
+    return {"propertyId": pid, "price": "75", "area": 60.0, "distM": 300, **kw}
+
+
+@pytest.mark.parametrize("bad, field", [
+    ({"distM": "abc"}, "distM"),
+    ({"area": [1]}, "area"),
+    ({"price": 75}, "price"),
+    ({"trend": ["UP"]}, "trend"),
+    ({"recentPriceSeries": "2024-01 5억"}, "recentPriceSeries"),
+    ({"recentPriceSeries": [{"date": "2024-01-01"}]}, "recentPriceSeries"),
+])
+def test_bad_scoring_field_is_422_with_line_number(bad, field):
+    # 나쁜 줄은 topK 밖(점수가 낮음)이어도 거절
+    low = _row(4, price="5", area=5.0, distM=9000)
+    low.update(bad)
+    r = _post([_row(2), _row(3), low])
+
+    assert r.status_code == 422
+    assert r.json()["detail"].startswith("4번째 줄 ")
+    assert field in r.json()["detail"]
+
+
+def test_valid_rows_with_numeric_strings_are_scored():
+    rows = [
+        _row(2, distM="120.5"),
+        _row(3, recentPriceSeries=[{"date": "2024-01-01", "amount": "70"}, {"date": "2024-03-01", "amount": "75"}]),
+        _row(4),
+    ]
+    r = _post(rows)
+
+    assert r.status_code == 200
+    assert len(r.json()["results"]) == 2
+
+
+def test_missing_property_id_is_still_400():
+    r = _post([_row(2), {"price": "75"}])
+
+    assert r.status_code == 400
+    assert r.json()["detail"] == "3번째 줄 propertyId 없음"
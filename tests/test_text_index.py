@@ -0,0 +1,38 @@
+import random
+import re
+
+import pytest
+
+from ocr_engine.text_index import LABEL_SCANNER, TextIndex
+
+FRAGMENTS = [
+    "임대인", "임 대 인", "임차인", "소재지", "소 재 지", "주소", "보증금", "임대보증금", "전 세 금",
+    "차임", "월 세", "임대료", "계약기간", "임 대 기 간", "특약사항", "서명 또는 날인", "날 인", "인감",
+    "임", "서", ":", "가나다", "  ", "\t", "\n", "\n  ", "\n\t소 재 지",
+]
+
+
+def line_by_line_hits(idx):
+    # 라인마다 원래 패턴으로 search (\s가 줄바꿈을 넘지 않는 기준 동작)
+    hits = {}
+    for p in LABEL_SCANNER.patterns:
+        for li, line in enumerate(idx.joined.split("\n")):
+            m = re.search(p, line)
+            if m:
+                hits[p] = (li, m.end())
+                break
+    return hits
+
+
+def test_first_hits_match_line_by_line_search():
+    rng = random.Random(10)
+    for _ in range(2000):
+        idx = TextIndex("".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 40))))
+        assert LABEL_SCANNER.first_hits(idx.joined, idx.line_starts) == line_by_line_hits(idx)
+
+
+@pytest.mark.parametrize("text", ["임대보증금 1억", "서명 또는 날인", "임대인\n 소 재 지 서울", "임 대\n인"])
+def test_overlapping_and_split_labels(text):
+    idx = TextIndex(text)
+
+    assert LABEL_SCANNER.first_hits(idx.joined, idx.line_starts) == line_by_line_hits(idx)